@@ -1,9 +1,9 @@
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side
-import xml.etree.ElementTree as ET
 import os
+from api import xml_backend
 from api.ds_i_utils import d_si
-from api.ds_i_utils import convert_unit
+from api.ds_i_utils import convert_unit, convert_unit_list
 import base64
 import tempfile
 from openpyxl.drawing.image import Image
@@ -149,9 +149,8 @@ def convert_xml_to_excel(xml_file_path: str):
     try:
         
         
-        # Load XML using ElementTree
-        tree = ET.parse(xml_file_path)
-        root = tree.getroot()
+        # Load XML (lxml jika terpasang, selain itu ElementTree)
+        root = xml_backend.parse(xml_file_path)
 
         # Initialize Excel workbook
         wb = Workbook()
@@ -659,11 +658,13 @@ def convert_xml_to_excel(xml_file_path: str):
                     values = value_elem.text.strip().split() if value_elem is not None and value_elem.text else []
                     units = unit_elem.text.strip().split() if unit_elem is not None and unit_elem.text else []
 
+                    # Satuan yang berulang hanya dikonversi sekali
+                    units = convert_unit_list(units)
                     if len(units) == 1:
                         unit = units[0]
-                        quantity_data.append([(v, convert_unit(unit)) for v in values])
+                        quantity_data.append([(v, unit) for v in values])
                     else:
-                        quantity_data.append([(v, convert_unit(unit)) for v, unit in zip(values, units)])
+                        quantity_data.append(list(zip(values, units)))
 
                 all_quantity_data.append(quantity_data)
                 if quantity_data:
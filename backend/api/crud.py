@@ -1,4 +1,5 @@
 import logging
+import hashlib
 import json
 from pathlib import Path
 import api.models as models
@@ -6,9 +7,6 @@ import api.schemas as schemas
 from sqlalchemy.orm import Session
 from datetime import datetime
 import os
-import pythoncom
-from yattag import Doc, indent
-import win32com.client as win32
 from datetime import datetime
 import base64
 import tempfile
@@ -17,8 +15,16 @@ import logging
 import base64
 import tempfile
 from api.pdf_generator import PDFGenerator
+from api import excel_index, excel_reader, extraction_templates, table_cache
+from api.result_table import ResultColumn, ResultTable, close_tables, normalize_units
+from api.table_validation import validate_tables
+from yattag.simpledoc import html_escape
+from api.xml_writer import FragmentCache, IndentedXMLWriter, StaticFragment, iter_base64_file
 import uuid
 
+# Folder file upload (sama dengan UPLOAD_DIR di main.py)
+UPLOAD_DIR = Path(__file__).parent / "uploads"
+
 def get_progress_message(key: str, lang: str = 'en') -> str:
     """Get localized progress messages"""
     messages = {
@@ -117,137 +123,150 @@ def save_image_and_get_base64(upload_file):
         logging.error(f"Error in save_image_and_get_base64: {str(e)}")
         return '', ''
 
+def _build_table_data(extracted_tables: list, results_data: list):
+    """Pasangkan tabel hasil ekstraksi dengan konfigurasi results; juga daftar (nama, kolom) untuk cache"""
+    table_data = {}
+    parsed_tables = []
+
+    # Hanya sejumlah tabel sesuai jumlah results
+    for idx, extracted_data in enumerate(extracted_tables):
+        # Ambil konfigurasi dari results_data
+        result_config = results_data[idx]
+        param_root = result_config.parameters.root
+        table_name = param_root.get('id') or f"Table_{idx+1}"
+        
+        table_data[table_name] = ResultTable(table_name, extracted_data, result_config)
+        parsed_tables.append((table_name, extracted_data))
+    return table_data, parsed_tables
+
+def _cached_table_data(cached_tables: list, results_data: list) -> dict:
+    return {
+        table_name: ResultTable(table_name, extracted_data, results_data[idx])
+        for idx, (table_name, extracted_data) in enumerate(cached_tables)
+    }
+
 # Memproses data Excel dan mengembalikan hasil terstruktur untuk XML
-def read_excel_tables(excel_path: str, sheet_name: str, results_data: list) -> dict:
-    """Membaca tabel dari file Excel dengan struktur sesuai kebutuhan XML"""
-    pythoncom.CoInitialize()
-    excel = None
-    wb = None
-    
+def read_excel_tables(excel_path: str, sheet_name: str, results_data: list, template=None) -> dict:
+    """Membaca tabel dari file Excel dengan struktur sesuai kebutuhan XML
+
+    Dengan template lab, hanya blok sel yang dideklarasikan template yang dibaca (tanpa deteksi tabel).
+    """
     try:
-        excel = win32.Dispatch("Excel.Application")
-        excel.Visible = False
-        wb = excel.Workbooks.Open(excel_path)
-        
-        # Cari sheet yang sesuai (case insensitive)
-        sheet_found = None
-        for sheet in wb.Sheets:
-            if sheet.Name.lower() == sheet_name.lower():
-                sheet_found = sheet
-                break
-        
-        if not sheet_found:
-            raise FileNotFoundError(f"Sheet '{sheet_name}' tidak ditemukan")
-        
-        ws = sheet_found
-        max_columns = ws.UsedRange.Columns.Count
-        max_rows = ws.UsedRange.Rows.Count
-        
-        # Deteksi tabel: baris dengan >2 sel terisi
-        tables = []
-        in_table = False
-        first_row, last_row = None, None
-        
-        for row in range(1, max_rows + 1):
-            # Gunakan .Text untuk mendapatkan nilai yang terlihat
-            filled_cells = [
-                ws.Cells(row, col).Text.strip() if ws.Cells(row, col).Text else ""
-                for col in range(1, max_columns + 1)
+        # Workbook + sheet + results yang sama cukup diparse sekali (preview lalu create)
+        cache_key = table_cache.make_key(excel_path, sheet_name, results_data, template)
+        cached_tables = table_cache.get(cache_key)
+        if cached_tables is not None:
+            logging.info(f"Using cached tables for {os.path.basename(excel_path)} [{sheet_name}]")
+            return _cached_table_data(cached_tables, results_data)
+
+        if template is not None:
+            logging.info(f"Reading {os.path.basename(excel_path)} [{sheet_name}] with template {template.id}")
+            blocks = extraction_templates.resolve_blocks(template, excel_path, sheet_name)[:len(results_data)]
+            extracted_tables = excel_reader.extract_blocks(excel_path, sheet_name, blocks)
+            table_data, parsed_tables = _build_table_data(extracted_tables, results_data)
+            table_cache.put(cache_key, parsed_tables)
+            return table_data
+
+        # Jika indeks upload masih berlaku, langsung baca rentang tabel yang sudah diketahui
+        known_tables = excel_index.current_sheet_tables(excel_path, sheet_name)
+        if known_tables is not None:
+            known_tables = known_tables[:len(results_data)]
+            tables = [
+                (table["first_row"], table["last_row"], table["first_col"], table["last_col"])
+                for table in known_tables
             ]
-            filled_cells = [cell for cell in filled_cells if cell != ""]
-            
-            if len(filled_cells) > 2:
-                if not in_table:
-                    first_row = row
-                    in_table = True
-                last_row = row
-            else:
-                if in_table:
-                    tables.append((first_row, last_row))
-                    in_table = False
-        
-        if in_table:
-            tables.append((first_row, last_row))
-        
-        table_data = {}
 
-        # Proses setiap tabel yang terdeteksi
-        for idx, (first_row, last_row) in enumerate(tables):
-            if idx >= len(results_data):
-                break  # Hanya proses sesuai jumlah results
-                
-            first_col, last_col = None, None
-            # Tentukan rentang kolom
-            for col in range(1, max_columns + 1):
-                col_has_data = any(
-                    ws.Cells(row, col).Text.strip() != ""
-                    for row in range(first_row, last_row + 1)
+        # Sheet sangat besar: baris dibaca bertahap ke ColumnBuffer supaya memori tetap terbatas
+        streaming = excel_reader.is_large_sheet(excel_path, sheet_name)
+        if streaming:
+            logging.info(f"Streaming large sheet {os.path.basename(excel_path)} [{sheet_name}]")
+            if known_tables is not None:
+                numeric_cols = [table["numeric_columns"] for table in known_tables]
+            else:
+                masks = excel_reader.scan_sheet(excel_path, sheet_name)
+                tables = excel_reader.detect_tables(masks)[:len(results_data)]
+                numeric_cols = [excel_reader.numeric_columns(masks, *bounds) for bounds in tables]
+            extracted_tables = excel_reader.stream_tables(excel_path, sheet_name, tables, numeric_cols)
+        else:
+            if known_tables is None:
+                # Baca used range sekali lewat openpyxl (read-only), tanpa Excel/COM
+                grid = excel_reader.load_sheet_grid(excel_path, sheet_name)
+                tables = excel_reader.detect_tables(grid)[:len(results_data)]
+            elif known_tables:
+                # Sampai baris terakhir tabel dan kolom satuan paling kanan
+                grid = excel_reader.load_sheet_grid(
+                    excel_path, sheet_name,
+                    max_row=max(table["last_row"] for table in known_tables) + 1,
+                    max_col=max(table["last_col"] for table in known_tables) + 2,
                 )
-                if col_has_data:
-                    if first_col is None:
-                        first_col = col
-                    last_col = col
-            
-            extracted_data = []
-            
-            # Ekstrak data per kolom
-            for col in range(first_col, last_col + 1):
-                numbers = []
-                units = []
-                has_data = False
-                
-                for row in range(first_row, last_row + 1):
-                    # Ambil nilai yang terlihat (formatted)
-                    display_value = ws.Cells(row, col).Text.strip()
-                    
-                    # Cek apakah bisa dikonversi ke angka
-                    if display_value and display_value != "":
-                        try:
-                            normalized_value = (
-                                display_value
-                                .replace("\u00A0", "")  # remove non-breaking spaces
-                                .replace(" ", "")       # remove normal spaces
-                                .replace(",", ".")      # decimal separator
-                            )
-                            float(normalized_value)
-                            
-                            numbers.append(normalized_value)
-                            has_data = True
-                            
-                            # Ambil satuan dari kolom sebelah (juga menggunakan .Text)
-                            unit_text = ws.Cells(row, col + 1).Text.strip()
-                            unit = unit_text.replace(".", "") if unit_text else ""
-                            units.append(d_si(unit))
-                            
-                        except ValueError:
-                            # Bukan angka, skip
-                            continue
-                
-                # Hanya tambahkan kolom yang memiliki data numerik
-                if has_data:
-                    extracted_data.append((numbers, units))
-            
-            # Ambil konfigurasi dari results_data
-            result_config = results_data[idx]
-            param_root = result_config.parameters.root
-            table_name = param_root.get('id') or f"Table_{idx+1}"
-            
-            table_data[table_name] = {
-                "data": extracted_data,
-                "config": result_config
-            }
+            extracted_tables = [excel_reader.extract_table(grid, *bounds) for bounds in tables]
+        
+        table_data, parsed_tables = _build_table_data(extracted_tables, results_data)
         
+        # Buffer streaming terikat ke file sementara, jadi tidak disimpan di cache
+        if not streaming:
+            table_cache.put(cache_key, parsed_tables)
         return table_data
         
     except Exception as e:
         logging.error(f"Error reading Excel: {str(e)}")
         raise
-    finally:
-        if wb:
-            wb.Close(False)
-        if excel:
-            excel.Quit()
-        pythoncom.CoUninitialize()
+
+def read_dcc_tables(dcc: schemas.DCCFormCreate, excel_path: str) -> dict:
+    """Tabel untuk satu DCC, memakai template lab jika dipilih di request"""
+    template = None
+    if dcc.extraction_template:
+        try:
+            template = extraction_templates.get_template(dcc.extraction_template)
+        except FileNotFoundError as e:
+            raise extraction_templates.TemplateError(str(e))
+    table_data = read_excel_tables(excel_path, dcc.sheet_name, dcc.results, template)
+    return normalize_units(table_data) if dcc.normalize_units else table_data
+
+def read_validated_tables(dcc: schemas.DCCFormCreate) -> dict:
+    """Tabel DCC yang sudah lolos validate_tables; pemanggil menutupnya dengan close_tables"""
+    table_data = read_dcc_tables(dcc, str(get_project_paths(dcc)['excel']))
+    try:
+        validate_tables(table_data, dcc.results)
+    except Exception:
+        close_tables(table_data)
+        raise
+    return table_data
+
+def read_workbook_tables(excel_path: str, sheet_results: dict) -> dict:
+    """Baca tabel banyak sheet dari satu workbook sekaligus: {sheet: results} -> {sheet: table_data}"""
+    try:
+        workbook_tables = {}
+        pending = {}
+
+        for sheet_name, results_data in sheet_results.items():
+            cache_key = table_cache.make_key(excel_path, sheet_name, results_data)
+            cached_tables = table_cache.get(cache_key)
+            if cached_tables is not None:
+                logging.info(f"Using cached tables for {os.path.basename(excel_path)} [{sheet_name}]")
+                workbook_tables[sheet_name] = _cached_table_data(cached_tables, results_data)
+            elif excel_reader.is_large_sheet(excel_path, sheet_name):
+                # Sheet sangat besar tetap lewat jalur streaming (buffer tidak bisa dikirim antar proses)
+                workbook_tables[sheet_name] = read_excel_tables(excel_path, sheet_name, results_data)
+            else:
+                pending[sheet_name] = (results_data, cache_key)
+
+        if pending:
+            logging.info(f"Extracting {len(pending)} sheet(s) from {os.path.basename(excel_path)} in one pass")
+            extracted = excel_reader.extract_workbook_tables(
+                excel_path,
+                {sheet_name: len(results_data) for sheet_name, (results_data, _) in pending.items()},
+            )
+            for sheet_name, (results_data, cache_key) in pending.items():
+                table_data, parsed_tables = _build_table_data(extracted[sheet_name], results_data)
+                table_cache.put(cache_key, parsed_tables)
+                workbook_tables[sheet_name] = table_data
+
+        return {sheet_name: workbook_tables[sheet_name] for sheet_name in sheet_results}
+
+    except Exception as e:
+        logging.error(f"Error reading Excel: {str(e)}")
+        raise
 
 def clean_text(value):
     """Membersihkan teks dengan menghilangkan spasi di awal/akhir dan mengonversi None ke string kosong"""
@@ -255,27 +274,334 @@ def clean_text(value):
         return ""
     return str(value).strip()
 
-def invert_number_str(n: str) -> str:
-    """Invert sign of a numeric string while preserving format."""
-    n = n.strip()
-    if not n:
-        return n
+def uploaded_file_path(file_name):
+    """Path lampiran di folder upload; None jika tidak ada atau nama mengarah keluar folder"""
+    if not file_name:
+        return None
+    path = (UPLOAD_DIR / file_name).resolve()
+    if not path.is_relative_to(UPLOAD_DIR.resolve()) or not path.is_file():
+        return None
+    return path
+
+class AttachmentNotFoundError(FileNotFoundError):
+    """Lampiran DCC tanpa base64 yang file-nya tidak ada di folder upload"""
+
+def attachment_file(base64_str, file_name):
+    """Path file upload untuk lampiran yang base64-nya tidak disimpan; None jika base64 dipakai
+
+    Lampiran seperti itu hanya direferensikan lewat nama file, jadi file yang hilang atau
+    diganti namanya adalah error, bukan lampiran yang diam-diam tidak ditulis.
+    """
+    if base64_str or not file_name:
+        return None
+    path = uploaded_file_path(file_name)
+    if path is None:
+        raise AttachmentNotFoundError(f"Attachment {file_name} not found in the upload folder")
+    return path
+
+def write_base64(doc, base64_str, file_path, indent_spaces: int, closing_spaces: int):
+    """Isi dcc:dataBase64: file upload di-encode per potongan (76 kolom), base64 dari form per baris"""
+    doc.asis('\n')
+    indent_str = ' ' * indent_spaces
+    if file_path:
+        doc.asis_stream(iter_base64_file(file_path, indent_str))
+    else:
+        for line in base64_str.splitlines():
+            doc.asis(f"{indent_str}{line}\n")
+    doc.asis(' ' * closing_spaces)
+
+def _ref_type_definitions(doc, tag, text):
+    with tag('dcc:refTypeDefinitions'):
+        with tag('dcc:refTypeDefinition'):
+            with tag('dcc:name'):
+                with tag('dcc:content', lang="de"): text("Namensraum für Querschnitts-RefTypes")
+                with tag('dcc:content', lang="en"): text("Namespace for Cross-Community RefTypes")
+            with tag('dcc:description'):
+                with tag('dcc:content', lang="de"): text("Der Namensraum 'basic' beinhaltet allgemeine RefTypes die messgrößenübergreifend genutzt werden.")
+                with tag('dcc:content', lang="en"): text("The \"basic\" namespace contains RefTypes common for multiple communities.")
+            with tag('dcc:namespace'): text('basic')
+            with tag('dcc:link'): text('https://digilab.ptb.de/dkd/refType/vocab/index.php?tema=2')
+
+        with tag('dcc:refTypeDefinition'):
+            with tag('dcc:name'):
+                with tag('dcc:content', lang="de"): text("Namensraum für mathematische RefTypes")
+                with tag('dcc:content', lang="en"): text("Namespace for mathematical RefTypes")
+            with tag('dcc:description'):
+                with tag('dcc:content', lang="de"): text("Der Namensraum 'math' beinhaltet RefTypes mathematischer Operationen.")
+                with tag('dcc:content', lang="en"): text("The \"math\" namespace contains RefTypes for mathematical operations.")
+            with tag('dcc:namespace'): text('math')
+            with tag('dcc:link'): text('https://digilab.ptb.de/dkd/refType/vocab/index.php?tema=292')
+
+def _calibration_laboratory(doc, tag, text):
+    with tag('dcc:calibrationLaboratory'):
+        with tag('dcc:calibrationLaboratoryCode'): text('LK-070-IDN')
+        with tag('dcc:contact'):
+            with tag('dcc:name'):
+                with tag('dcc:content'): text('Laboratorium Standar Nasional Satuan Ukuran, Badan Standarisasi Nasional (SNSU-BSN)')
+            with tag('dcc:eMail'): text('nmi@bsn.go.id')
+            with tag('dcc:phone'): text('Telephone +62-21-7560534, +62-21-7560571, Mobile +62-857-8085-7833')
+            with tag('dcc:link'): text('www.bsn.go.id')
+            with tag('dcc:location'):
+                with tag('dcc:city'): text('Tangerang Selatan')
+                with tag('dcc:countryCode'): text('ID')
+                with tag('dcc:postCode'): text('15314')
+                with tag('dcc:state'): text('Banten')
+                with tag('dcc:street'): text('KST BJ Habibie Setu')
+                with tag('dcc:streetNo'): text('Gedung 420')
+        # with tag('dcc:cryptElectronicSignature'): pass
+        # with tag('dcc:cryptElectronicTimeStamp'): pass
+
+# Bagian yang sama di setiap sertifikat: dirender sekali saat import di kedalaman tempatnya muncul
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+DCC_ROOT_TAG = '<dcc:digitalCalibrationCertificate xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="https://ptb.de/dcc https://ptb.de/dcc/v3.3.0/dcc.xsd" xmlns:dcc="https://ptb.de/dcc" xmlns:si="https://ptb.de/si" schemaVersion="3.3.0">'
+REF_TYPE_DEFINITIONS = StaticFragment(_ref_type_definitions, level=2)
+CALIBRATION_LABORATORY = StaticFragment(_calibration_laboratory, level=2)
+
+def _resp_persons(doc, tag, text, persons, languages):
+    """dcc:respPersons: pelaksana, penyelia, kepala dan direktur"""
+    # Iterasi untuk penyelia
+    with tag('dcc:respPersons'): 
+        for resp in persons.pelaksana:
+            with tag('dcc:respPerson'): 
+                with tag('dcc:person'): 
+                    with tag('dcc:name'): 
+                        with tag('dcc:content'): text(clean_text(resp.nama_resp))
+                with tag('dcc:description'): 
+                    # with tag('dcc:name'): 
+                    with tag('dcc:content'): text(clean_text(resp.nip))
+                with tag('dcc:role'): text(clean_text(resp.peran))
+                with tag('dcc:mainSigner'): text(int(resp.main_signer))
+                with tag('dcc:cryptElectronicSignature'): text(int(resp.signature))
+                with tag('dcc:cryptElectronicTimeStamp'): text(int(resp.timestamp))
     
-    # Handle explicit + sign
-    if n.startswith("+"):
-        return "-" + n[1:]
-    elif n.startswith("-"):
-        return n[1:]  # remove the minus → makes it positive
+        # Iterasi untuk penyelia
+        for resp in persons.penyelia:
+            with tag('dcc:respPerson'): 
+                with tag('dcc:person'): 
+                    with tag('dcc:name'): 
+                        with tag('dcc:content'): text(resp.nama_resp)
+                with tag('dcc:description'): 
+                    # with tag('dcc:name'): 
+                    with tag('dcc:content'): text(resp.nip)
+                with tag('dcc:role'): text(resp.peran)
+                with tag('dcc:mainSigner'): text(int(resp.main_signer))
+                with tag('dcc:cryptElectronicSignature'): text(int(resp.signature))
+                with tag('dcc:cryptElectronicTimeStamp'): text(int(resp.timestamp))
+    
+        # Iterasi untuk kepala laboratorium
+        with tag('dcc:respPerson'): 
+            with tag('dcc:person'): 
+                with tag('dcc:name'): 
+                    with tag('dcc:content'): text(persons.kepala.nama_resp)
+            with tag('dcc:description'): 
+                # with tag('dcc:name'): 
+                with tag('dcc:content'): text(persons.kepala.nip)
+            with tag('dcc:role'): text(persons.kepala.peran)
+            with tag('dcc:mainSigner'): text(int(persons.kepala.main_signer))
+            with tag('dcc:cryptElectronicSignature'): text(int(persons.kepala.signature))
+            with tag('dcc:cryptElectronicTimeStamp'): text(int(persons.kepala.timestamp))
+    
+        # Iterasi untuk direktur
+        with tag('dcc:respPerson'): 
+            with tag('dcc:person'): 
+                with tag('dcc:name'): 
+                    with tag('dcc:content'): text(persons.direktur.nama_resp)
+            with tag('dcc:description'): 
+                # with tag('dcc:name'): 
+                with tag('dcc:content'): text(persons.direktur.nip)
+            with tag('dcc:role'): text(persons.direktur.peran)
+            with tag('dcc:mainSigner'): text(int(persons.direktur.main_signer))
+            with tag('dcc:cryptElectronicSignature'): text(int(persons.direktur.signature))
+            with tag('dcc:cryptElectronicTimeStamp'): text(int(persons.direktur.timestamp))
+
+def _customer(doc, tag, text, owner, languages):
+    """dcc:customer dari data pemilik alat"""
+    with tag('dcc:customer'):
+        with tag('dcc:name'):
+            with tag('dcc:content'): 
+                text(clean_text(owner.nama_cust))
+        with tag('dcc:location'):
+            with tag('dcc:city'):
+                text(clean_text(owner.kota_cust))
+            with tag('dcc:countryCode'):
+                text(clean_text(owner.negara_cust))
+            with tag('dcc:postCode'):
+                text(clean_text(owner.pos_cust))
+            with tag('dcc:state'):
+                text(clean_text(owner.state_cust))
+            with tag('dcc:street'):
+                text(clean_text(owner.jalan_cust))
+            with tag('dcc:streetNo'):
+                text(clean_text(owner.no_jalan_cust))
+
+def _used_methods(doc, tag, text, methods, languages):
+    """dcc:usedMethods termasuk formula dan gambar"""
+    with tag('dcc:usedMethods'):
+        for method in methods:                        
+            with tag('dcc:usedMethod', **({"refType": method.refType} if method.refType != "other" else {})):
+                with tag('dcc:name'):
+                    for lang in languages:
+                        with tag('dcc:content', lang=lang): text(clean_text(method.method_name.root.get(lang, ""))) #Multilang
+                with tag('dcc:description'):
+                    for lang in languages:
+                        with tag('dcc:content', lang=lang): text(clean_text(method.method_desc.root.get(lang, ""))) #Multilang
+                    if method.has_formula and method.formula:
+                        with tag('dcc:formula'):
+                            with tag('dcc:latex'): text(method.formula.latex or "")
+                            # with tag('dcc:mathml'): text(method.formula.mathml or "")
+                    if method.has_image and method.image:
+                        with tag('dcc:file'):
+                            if getattr(method.image, 'fileName', None):
+                                with tag('dcc:fileName'):
+                                    text(method.image.fileName)
+                            if getattr(method.image, 'mimeType', None):
+                                with tag('dcc:mimeType'):
+                                    text(method.image.mimeType)         
+                            method_file = attachment_file(getattr(method.image, 'base64', None), method.image.gambar)
+                            if getattr(method.image, 'base64', None) or method_file:
+                                with tag('dcc:dataBase64'):
+                                    write_base64(doc, method.image.base64, method_file, 24, 20)
+    
+                with tag('dcc:norm'): text(clean_text(method.norm))
+
+def _measuring_equipments(doc, tag, text, equipments, languages):
+    """dcc:measuringEquipments"""
+    with tag('dcc:measuringEquipments'):
+        for equip in equipments:
+            with tag('dcc:measuringEquipment', **({"refType": equip.refType} if equip.refType != "other" else {})):
+                with tag('dcc:name'):
+                    for lang in languages:
+                        with tag('dcc:content', lang=lang): text(clean_text(equip.nama_alat.root.get(lang, ""))) #Multilang
+                with tag('dcc:manufacturer'):
+                    with tag('dcc:name'):
+                        for lang in languages:
+                            with tag('dcc:content', lang=lang): text(clean_text(equip.model.root.get(lang, ""))) #Multilang
+                with tag('dcc:identifications'):
+                    with tag('dcc:identification', refType='basic_serialNumber'):
+                        with tag('dcc:issuer'): text('manufacturer')
+                        with tag('dcc:value'): text(clean_text(equip.seri_measuring))
+                        with tag('dcc:name'):
+                             for lang in languages:
+                                with tag('dcc:content', lang=lang): text(clean_text(equip.manuf_model.root.get(lang, ""))) #Multilang
+
+def _influence_conditions(doc, tag, text, conditions, languages):
+    """dcc:influenceConditions (suhu, kelembapan) dengan nilai minimum/maksimum"""
+    with tag('dcc:influenceConditions'):
+        for condition in conditions:
+            if condition.jenis_kondisi == 'suhu':
+                reftype_value = 'basic_temperature'
+            elif condition.jenis_kondisi == 'lembap':
+                reftype_value = 'basic_humidityRelative'
+            else:
+                reftype_value = None
+    
+            with tag('dcc:influenceCondition', **({'refType': reftype_value} if reftype_value else {})):
+                with tag('dcc:name'):
+                    with tag('dcc:content'): text(clean_text(condition.jenis_kondisi))
+                with tag('dcc:description'):
+                    for lang in languages:
+                        with tag('dcc:content', lang=lang): text(clean_text(condition.desc.root.get(lang, "") or "")) #Multilang
+    
+                with tag('dcc:data'):
+                    # Tengah / nilai minimum
+                    with tag('dcc:quantity', refType='math_minimum'):
+                        with tag('dcc:name'):
+                            with tag('dcc:content'): text('nilai minimum') 
+                        with tag('si:real'):
+                            tengah_val = float(condition.tengah) if condition.tengah not in (None, "") else 0.0
+                            rentang_val = float(condition.rentang) if condition.rentang not in (None, "") else 0.0
+                            min_value = tengah_val - rentang_val
+    
+                            with tag('si:value'): text(f"{min_value}") 
+                            unit_str = ""
+                            if condition.tengah_unit.prefix:
+                                unit_str += condition.tengah_unit.prefix + " "
+                            if condition.tengah_unit.unit:
+                                unit_str += condition.tengah_unit.unit
+                            if condition.tengah_unit.eksponen:
+                                unit_str += f"\\tothe{{{condition.tengah_unit.eksponen}}}"
+                            with tag('si:unit'): text(d_si(unit_str.strip()))
+    
+                    # Rentang / nilai maksimum        
+                    with tag('dcc:quantity', refType='math_maximum'):
+                        with tag('dcc:name'):
+                            with tag('dcc:content'): text('nilai maksimum') 
+                        with tag('si:real'):
+                            tengah_val = float(condition.tengah) if condition.tengah not in (None, "") else 0.0
+                            rentang_val = float(condition.rentang) if condition.rentang not in (None, "") else 0.0
+                            max_value = tengah_val + rentang_val
+    
+                            with tag('si:value'): text(f"{max_value}")  
+                            unit_str = ""
+                            if condition.rentang_unit.prefix:
+                                unit_str += condition.rentang_unit.prefix + " "
+                            if condition.rentang_unit.unit:
+                                unit_str += condition.rentang_unit.unit
+                            if condition.rentang_unit.eksponen:
+                                unit_str += f"\\tothe{{{condition.rentang_unit.eksponen}}}"
+                            with tag('si:unit'): text(d_si(unit_str.strip()))
+
+# Section yang sering sama antar sertifikat satu lab/customer dirender sekali per isi
+SECTION_CACHE_BYTES = 32 * 1024 * 1024
+SECTION_CACHE = FragmentCache(SECTION_CACHE_BYTES)
+
+def _attachment_stamps(items) -> list:
+    """(nama, ukuran, mtime) file upload yang ditulis sebagai base64, jadi file yang diganti
+    dengan nama sama tidak memakai fragment lama"""
+    stamps = []
+    for item in items if isinstance(items, list) else [items]:
+        image = getattr(item, 'image', None)
+        if getattr(item, 'has_image', False) and image and not getattr(image, 'base64', None):
+            path = uploaded_file_path(image.gambar)
+            if path:
+                stat = path.stat()
+                stamps.append((image.gambar, stat.st_size, stat.st_mtime_ns))
+    return stamps
+
+def _has_inline_base64(items) -> bool:
+    """Lampiran dengan base64 dari form (file di luar folder upload)"""
+    return any(
+        getattr(item, 'has_image', False) and getattr(getattr(item, 'image', None), 'base64', None)
+        for item in (items if isinstance(items, list) else [items])
+    )
+
+# Isi lampiran diwakili stamps, jadi base64 tidak ikut di-dump dan di-hash
+_SECTION_KEY_EXCLUDE = {"image": {"base64"}}
+
+def _section_key(build, model, languages, stamps) -> str:
+    if isinstance(model, list):
+        data = [item.model_dump(mode="json", exclude=_SECTION_KEY_EXCLUDE) for item in model]
     else:
-        return "-" + n  # add minus if positive
+        data = model.model_dump(mode="json", exclude=_SECTION_KEY_EXCLUDE)
+    payload = json.dumps([build.__name__, data, list(languages), stamps], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _section(doc, build, model, languages, level: int):
+    """Tulis section build(doc, tag, text, model, languages) lewat SECTION_CACHE
+
+    Section dengan lampiran besar ditulis langsung supaya base64 tetap di-stream, tidak ditahan di cache.
+    Begitu juga section dengan base64 dari form: isinya tidak punya stamp, dan meng-hash base64
+    di setiap pemanggilan sama mahalnya dengan menulisnya.
+    """
+    if _has_inline_base64(model):
+        build(*doc.tagtext(), model, languages)
+        return
+    stamps = _attachment_stamps(model)
+    # Perkiraan ukuran base64 (4/3 ukuran file)
+    if sum(size for _, size, _ in stamps) * 4 // 3 > SECTION_CACHE.max_entry_bytes:
+        build(*doc.tagtext(), model, languages)
+        return
+    key = _section_key(build, model, languages, stamps)
+    doc.splice(SECTION_CACHE.fragment(key, lambda doc, tag, text: build(doc, tag, text, model, languages), level))
 
 #XML
-def generate_xml(dcc, table_data):
-        #Generate XML for DCC
-        doc, tag, text = Doc().tagtext() 
+def generate_xml(dcc, table_data, write=None):
+        """Generate XML for DCC; dengan write(str) XML ditulis bertahap, tanpa write dikembalikan sebagai string"""
+        chunks = []
+        doc, tag, text = IndentedXMLWriter(write or chunks.append).tagtext()
 
-        doc.asis('<?xml version="1.0" encoding="UTF-8"?>')
-        doc.asis('<dcc:digitalCalibrationCertificate xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="https://ptb.de/dcc https://ptb.de/dcc/v3.3.0/dcc.xsd" xmlns:dcc="https://ptb.de/dcc" xmlns:si="https://ptb.de/si" schemaVersion="3.3.0">')
+        doc.asis(XML_DECLARATION)
+        doc.asis(DCC_ROOT_TAG)
         
         # Administrative Data section
         with tag('dcc:administrativeData'):
@@ -288,27 +614,8 @@ def generate_xml(dcc, table_data):
                     with tag('dcc:release'): text(clean_text(dcc.version))
             
             #DEFINISI REFTYPE        
-            with tag('dcc:refTypeDefinitions'):
-                with tag('dcc:refTypeDefinition'):
-                    with tag('dcc:name'):
-                        with tag('dcc:content', lang="de"): text("Namensraum für Querschnitts-RefTypes")
-                        with tag('dcc:content', lang="en"): text("Namespace for Cross-Community RefTypes")
-                    with tag('dcc:description'):
-                        with tag('dcc:content', lang="de"): text("Der Namensraum 'basic' beinhaltet allgemeine RefTypes die messgrößenübergreifend genutzt werden.")
-                        with tag('dcc:content', lang="en"): text("The \"basic\" namespace contains RefTypes common for multiple communities.")
-                    with tag('dcc:namespace'): text('basic')
-                    with tag('dcc:link'): text('https://digilab.ptb.de/dkd/refType/vocab/index.php?tema=2')
-
-                with tag('dcc:refTypeDefinition'):
-                    with tag('dcc:name'):
-                        with tag('dcc:content', lang="de"): text("Namensraum für mathematische RefTypes")
-                        with tag('dcc:content', lang="en"): text("Namespace for mathematical RefTypes")
-                    with tag('dcc:description'):
-                        with tag('dcc:content', lang="de"): text("Der Namensraum 'math' beinhaltet RefTypes mathematischer Operationen.")
-                        with tag('dcc:content', lang="en"): text("The \"math\" namespace contains RefTypes for mathematical operations.")
-                    with tag('dcc:namespace'): text('math')
-                    with tag('dcc:link'): text('https://digilab.ptb.de/dkd/refType/vocab/index.php?tema=292')
-                        
+            doc.splice(REF_TYPE_DEFINITIONS)
+
             #CORE DATA        
             with tag('dcc:coreData'): 
                 with tag('dcc:countryCodeISO3166_1'): text(dcc.administrative_data.country_code)
@@ -348,99 +655,14 @@ def generate_xml(dcc, table_data):
                                         with tag("dcc:content", lang=lang): text(clean_text(obj.id_lain.root.get(lang, "")))
             
             #MUTLAK                    
-            with tag('dcc:calibrationLaboratory'): 
-                with tag('dcc:calibrationLaboratoryCode'): text('LK-070-IDN')
-                with tag('dcc:contact'): 
-                    with tag('dcc:name'): 
-                        with tag('dcc:content'): text('Laboratorium Standar Nasional Satuan Ukuran, Badan Standarisasi Nasional (SNSU-BSN)')
-                    with tag('dcc:eMail'): text('nmi@bsn.go.id')
-                    with tag('dcc:phone'): text('Telephone +62-21-7560534, +62-21-7560571, Mobile +62-857-8085-7833')
-                    with tag('dcc:link'): text('www.bsn.go.id')
-                    with tag('dcc:location'): 
-                        with tag('dcc:city'): text('Tangerang Selatan')
-                        with tag('dcc:countryCode'): text('ID')
-                        with tag('dcc:postCode'): text('15314')
-                        with tag('dcc:state'): text('Banten')
-                        with tag('dcc:street'): text('KST BJ Habibie Setu')
-                        with tag('dcc:streetNo'): text('Gedung 420')
-                # with tag('dcc:cryptElectronicSignature'): pass
-                # with tag('dcc:cryptElectronicTimeStamp'): pass
+            doc.splice(CALIBRATION_LABORATORY)
                 
             #RESP_PERSON 
-            # Iterasi untuk penyelia
-            with tag('dcc:respPersons'): 
-                for resp in dcc.responsible_persons.pelaksana:
-                    with tag('dcc:respPerson'): 
-                        with tag('dcc:person'): 
-                            with tag('dcc:name'): 
-                                with tag('dcc:content'): text(clean_text(resp.nama_resp))
-                        with tag('dcc:description'): 
-                            # with tag('dcc:name'): 
-                            with tag('dcc:content'): text(clean_text(resp.nip))
-                        with tag('dcc:role'): text(clean_text(resp.peran))
-                        with tag('dcc:mainSigner'): text(int(resp.main_signer))
-                        with tag('dcc:cryptElectronicSignature'): text(int(resp.signature))
-                        with tag('dcc:cryptElectronicTimeStamp'): text(int(resp.timestamp))
-
-                # Iterasi untuk penyelia
-                for resp in dcc.responsible_persons.penyelia:
-                    with tag('dcc:respPerson'): 
-                        with tag('dcc:person'): 
-                            with tag('dcc:name'): 
-                                with tag('dcc:content'): text(resp.nama_resp)
-                        with tag('dcc:description'): 
-                            # with tag('dcc:name'): 
-                            with tag('dcc:content'): text(resp.nip)
-                        with tag('dcc:role'): text(resp.peran)
-                        with tag('dcc:mainSigner'): text(int(resp.main_signer))
-                        with tag('dcc:cryptElectronicSignature'): text(int(resp.signature))
-                        with tag('dcc:cryptElectronicTimeStamp'): text(int(resp.timestamp))
-
-                # Iterasi untuk kepala laboratorium
-                with tag('dcc:respPerson'): 
-                    with tag('dcc:person'): 
-                        with tag('dcc:name'): 
-                            with tag('dcc:content'): text(dcc.responsible_persons.kepala.nama_resp)
-                    with tag('dcc:description'): 
-                        # with tag('dcc:name'): 
-                        with tag('dcc:content'): text(dcc.responsible_persons.kepala.nip)
-                    with tag('dcc:role'): text(dcc.responsible_persons.kepala.peran)
-                    with tag('dcc:mainSigner'): text(int(dcc.responsible_persons.kepala.main_signer))
-                    with tag('dcc:cryptElectronicSignature'): text(int(dcc.responsible_persons.kepala.signature))
-                    with tag('dcc:cryptElectronicTimeStamp'): text(int(dcc.responsible_persons.kepala.timestamp))
-
-                # Iterasi untuk direktur
-                with tag('dcc:respPerson'): 
-                    with tag('dcc:person'): 
-                        with tag('dcc:name'): 
-                            with tag('dcc:content'): text(dcc.responsible_persons.direktur.nama_resp)
-                    with tag('dcc:description'): 
-                        # with tag('dcc:name'): 
-                        with tag('dcc:content'): text(dcc.responsible_persons.direktur.nip)
-                    with tag('dcc:role'): text(dcc.responsible_persons.direktur.peran)
-                    with tag('dcc:mainSigner'): text(int(dcc.responsible_persons.direktur.main_signer))
-                    with tag('dcc:cryptElectronicSignature'): text(int(dcc.responsible_persons.direktur.signature))
-                    with tag('dcc:cryptElectronicTimeStamp'): text(int(dcc.responsible_persons.direktur.timestamp))
-        
+            _section(doc, _resp_persons, dcc.responsible_persons, dcc.administrative_data.used_languages, level=2)
+
             #owner
-            with tag('dcc:customer'):
-                with tag('dcc:name'):
-                    with tag('dcc:content'): 
-                        text(clean_text(dcc.owner.nama_cust))
-                with tag('dcc:location'):
-                    with tag('dcc:city'):
-                        text(clean_text(dcc.owner.kota_cust))
-                    with tag('dcc:countryCode'):
-                        text(clean_text(dcc.owner.negara_cust))
-                    with tag('dcc:postCode'):
-                        text(clean_text(dcc.owner.pos_cust))
-                    with tag('dcc:state'):
-                        text(clean_text(dcc.owner.state_cust))
-                    with tag('dcc:street'):
-                        text(clean_text(dcc.owner.jalan_cust))
-                    with tag('dcc:streetNo'):
-                        text(clean_text(dcc.owner.no_jalan_cust))                 
-                            
+            _section(doc, _customer, dcc.owner, dcc.administrative_data.used_languages, level=2)
+
             # Statements
             with tag('dcc:statements'):
                 for stmt in dcc.statements:
@@ -467,15 +689,10 @@ def generate_xml(dcc, table_data):
                                     if getattr(stmt.image, 'mimeType', None):
                                         with tag('dcc:mimeType'):
                                             text(stmt.image.mimeType)
-                                    if getattr(stmt.image, 'base64', None):
+                                    stmt_file = attachment_file(getattr(stmt.image, 'base64', None), stmt.image.gambar)
+                                    if getattr(stmt.image, 'base64', None) or stmt_file:
                                         with tag('dcc:dataBase64'):
-                                            base64_lines = stmt.image.base64.splitlines()
-                                            doc.asis('\n')
-                                            indent_spaces = 21
-                                            indent_stm = ' ' * indent_spaces
-                                            for line in base64_lines:
-                                                doc.asis(f"{indent_stm}{line}\n")
-                                            doc.asis(' ' * (indent_spaces - 3))
+                                            write_base64(doc, stmt.image.base64, stmt_file, 21, 18)
 
         # MEASUREMENT RESULT 
         with tag('dcc:measurementResults'):
@@ -484,120 +701,19 @@ def generate_xml(dcc, table_data):
                     with tag('dcc:content'):text('Hasil Kalibrasi / Calibration Results')
                     
                 # Metode
-                with tag('dcc:usedMethods'):
-                    for method in dcc.methods:                        
-                        with tag('dcc:usedMethod', **({"refType": method.refType} if method.refType != "other" else {})):
-                            with tag('dcc:name'):
-                                for lang in dcc.administrative_data.used_languages:
-                                    with tag('dcc:content', lang=lang): text(clean_text(method.method_name.root.get(lang, ""))) #Multilang
-                            with tag('dcc:description'):
-                                for lang in dcc.administrative_data.used_languages:
-                                    with tag('dcc:content', lang=lang): text(clean_text(method.method_desc.root.get(lang, ""))) #Multilang
-                                if method.has_formula and method.formula:
-                                    with tag('dcc:formula'):
-                                        with tag('dcc:latex'): text(method.formula.latex or "")
-                                        # with tag('dcc:mathml'): text(method.formula.mathml or "")
-                                if method.has_image and method.image:
-                                    with tag('dcc:file'):
-                                        if getattr(method.image, 'fileName', None):
-                                            with tag('dcc:fileName'):
-                                                text(method.image.fileName)
-                                        if getattr(method.image, 'mimeType', None):
-                                            with tag('dcc:mimeType'):
-                                                text(method.image.mimeType)         
-                                        if getattr(method.image, 'base64', None):
-                                            with tag('dcc:dataBase64'):
-                                                base64_lines = method.image.base64.splitlines()
-                                                doc.asis('\n')
-                                                indent_spaces = 24
-                                                indent_mth = ' ' * indent_spaces
-                                                for line in base64_lines:
-                                                    doc.asis(f"{indent_mth}{line}\n")
-                                                doc.asis(' ' * (indent_spaces - 4)) 
-                                                
-                            with tag('dcc:norm'): text(clean_text(method.norm))
+                _section(doc, _used_methods, dcc.methods, dcc.administrative_data.used_languages, level=3)
 
                 # Measuring Equipment 
-                with tag('dcc:measuringEquipments'):
-                    for equip in dcc.equipments:
-                        with tag('dcc:measuringEquipment', **({"refType": equip.refType} if equip.refType != "other" else {})):
-                            with tag('dcc:name'):
-                                for lang in dcc.administrative_data.used_languages:
-                                    with tag('dcc:content', lang=lang): text(clean_text(equip.nama_alat.root.get(lang, ""))) #Multilang
-                            with tag('dcc:manufacturer'):
-                                with tag('dcc:name'):
-                                    for lang in dcc.administrative_data.used_languages:
-                                        with tag('dcc:content', lang=lang): text(clean_text(equip.model.root.get(lang, ""))) #Multilang
-                            with tag('dcc:identifications'):
-                                with tag('dcc:identification', refType='basic_serialNumber'):
-                                    with tag('dcc:issuer'): text('manufacturer')
-                                    with tag('dcc:value'): text(clean_text(equip.seri_measuring))
-                                    with tag('dcc:name'):
-                                         for lang in dcc.administrative_data.used_languages:
-                                            with tag('dcc:content', lang=lang): text(clean_text(equip.manuf_model.root.get(lang, ""))) #Multilang
+                _section(doc, _measuring_equipments, dcc.equipments, dcc.administrative_data.used_languages, level=3)
 
                 # Adding Room Conditions 
-                with tag('dcc:influenceConditions'):
-                    for condition in dcc.conditions:
-                        if condition.jenis_kondisi == 'suhu':
-                            reftype_value = 'basic_temperature'
-                        elif condition.jenis_kondisi == 'lembap':
-                            reftype_value = 'basic_humidityRelative'
-                        else:
-                            reftype_value = None
+                _section(doc, _influence_conditions, dcc.conditions, dcc.administrative_data.used_languages, level=3)
 
-                        with tag('dcc:influenceCondition', **({'refType': reftype_value} if reftype_value else {})):
-                            with tag('dcc:name'):
-                                with tag('dcc:content'): text(clean_text(condition.jenis_kondisi))
-                            with tag('dcc:description'):
-                                for lang in dcc.administrative_data.used_languages:
-                                    with tag('dcc:content', lang=lang): text(clean_text(condition.desc.root.get(lang, "") or "")) #Multilang
-                                
-                            with tag('dcc:data'):
-                                # Tengah / nilai minimum
-                                with tag('dcc:quantity', refType='math_minimum'):
-                                    with tag('dcc:name'):
-                                        with tag('dcc:content'): text('nilai minimum') 
-                                    with tag('si:real'):
-                                        tengah_val = float(condition.tengah) if condition.tengah not in (None, "") else 0.0
-                                        rentang_val = float(condition.rentang) if condition.rentang not in (None, "") else 0.0
-                                        min_value = tengah_val - rentang_val
-
-                                        with tag('si:value'): text(f"{min_value}") 
-                                        unit_str = ""
-                                        if condition.tengah_unit.prefix:
-                                            unit_str += condition.tengah_unit.prefix + " "
-                                        if condition.tengah_unit.unit:
-                                            unit_str += condition.tengah_unit.unit
-                                        if condition.tengah_unit.eksponen:
-                                            unit_str += f"\\tothe{{{condition.tengah_unit.eksponen}}}"
-                                        with tag('si:unit'): text(d_si(unit_str.strip()))
-
-                                # Rentang / nilai maksimum        
-                                with tag('dcc:quantity', refType='math_maximum'):
-                                    with tag('dcc:name'):
-                                        with tag('dcc:content'): text('nilai maksimum') 
-                                    with tag('si:real'):
-                                        tengah_val = float(condition.tengah) if condition.tengah not in (None, "") else 0.0
-                                        rentang_val = float(condition.rentang) if condition.rentang not in (None, "") else 0.0
-                                        max_value = tengah_val + rentang_val
-                                        
-                                        with tag('si:value'): text(f"{max_value}")  
-                                        unit_str = ""
-                                        if condition.rentang_unit.prefix:
-                                            unit_str += condition.rentang_unit.prefix + " "
-                                        if condition.rentang_unit.unit:
-                                            unit_str += condition.rentang_unit.unit
-                                        if condition.rentang_unit.eksponen:
-                                            unit_str += f"\\tothe{{{condition.rentang_unit.eksponen}}}"
-                                        with tag('si:unit'): text(d_si(unit_str.strip()))
-
-                                        
                 # RESULT
                 with tag("dcc:results"):
-                    for table_name, table_info in table_data.items():
-                        flat_columns = table_info["data"]
-                        config = table_info["config"]
+                    for table_name, table in table_data.items():
+                        flat_columns = table.columns
+                        config = table.config
                         
                         with tag('dcc:result'):
                             # Nama result (multilingual)
@@ -636,25 +752,26 @@ def generate_xml(dcc, table_data):
                                             for _ in range(real_list_count):
                                                 if flat_index >= len(flat_columns):
                                                     break
-                                                numbers, units = flat_columns[flat_index]
+                                                column = flat_columns[flat_index]
                                                 flat_index += 1
 
+                                                # Balik tanda sekaligus untuk seluruh kolom koreksi
                                                 if is_correction:
-                                                    numbers = [invert_number_str(n) for n in numbers]
+                                                    column = column.negated()
                                                 
                                                 with tag('si:realListXMLList'):
-                                                    with tag('si:valueXMLList'): text(" ".join(numbers).strip())
-                                                    with tag('si:unitXMLList'): text(" ".join(units).strip())
+                                                    with tag('si:valueXMLList'): doc.asis_stream(map(html_escape, column.value_chunks()))
+                                                    with tag('si:unitXMLList'): doc.asis_stream(map(html_escape, column.unit_chunks(compact=dcc.compact_units)))
                                                     
                                                     # Tambahkan uncertainty di dalam blok yang sama
                                                     if ref_type == "basic_measurementError" and flat_index < len(flat_columns):
-                                                        uncertainty_numbers, _ = flat_columns[flat_index]
+                                                        uncertainty_column = flat_columns[flat_index]
                                                         flat_index += 1
                                                         
                                                         with tag('si:measurementUncertaintyUnivariateXMLList'):
                                                             with tag('si:expandedMUXMLList'):
                                                                 with tag('si:valueExpandedMUXMLList'):
-                                                                    text(" ".join(uncertainty_numbers).strip())
+                                                                    doc.asis_stream(map(html_escape, uncertainty_column.value_chunks()))
                                                                 with tag('si:coverageFactorXMLList'):
                                                                     text(str(config.uncertainty.factor) if config.uncertainty and config.uncertainty.factor else "")
                                                                 with tag('si:coverageProbabilityXMLList'):
@@ -678,21 +795,16 @@ def generate_xml(dcc, table_data):
                                 with tag('dcc:fileName'): text(file.fileName)  
                             if getattr(file, 'mimeType', None):
                                 with tag('dcc:mimeType'): text(file.mimeType) 
-                            if getattr(file, 'base64', None):
+                            comment_file = attachment_file(getattr(file, 'base64', None), file.fileName)
+                            if getattr(file, 'base64', None) or comment_file:
                                 with tag('dcc:dataBase64'):
-                                    base64_lines = file.base64.splitlines()
-                                    doc.asis('\n')
-                                    indent_spaces = 12
-                                    indent_stm = ' ' * indent_spaces
-                                    for line in base64_lines:
-                                        doc.asis(f"{indent_stm}{line}\n")
-                                    doc.asis(' ' * (indent_spaces - 3))  
+                                    write_base64(doc, file.base64, comment_file, 12, 9)
                                     
             
         doc.asis('</dcc:digitalCalibrationCertificate>')
-
-        result = indent(doc.getvalue(), indentation='   ')
-        return result
+        doc.close()
+        if write is None:
+            return "".join(chunks)
 
 def extract_captions_from_dcc(dcc: schemas.DCCFormCreate):
     """Extract image captions that aren't stored in XML"""
@@ -734,13 +846,14 @@ def extract_corrections_from_dcc(dcc: schemas.DCCFormCreate):
     return corrections
 
 #db n excel 
-def create_dcc(db: Session, dcc: schemas.DCCFormCreate, progress_callback=None, language='en'):
+def create_dcc(db: Session, dcc: schemas.DCCFormCreate, progress_callback=None, language='en', table_data=None,
+               commit=True):
     logging.info("Starting DCC creation process")
     
-    # Inisialisasi variabel Office
-    excel = None
-    word = None
-    wb = None
+    # Tabel dari pemanggil (batch) ditutup oleh pemanggil
+    owns_tables = table_data is None
+    # File XML/PDF yang sudah mulai ditulis; dihapus jika pembuatan gagal di tengah jalan
+    outputs = []
     
     try:
         if progress_callback:
@@ -870,6 +983,12 @@ def create_dcc(db: Session, dcc: schemas.DCCFormCreate, progress_callback=None,
                 "image": stmt.image.dict() if stmt.has_image and stmt.image else None
             })
 
+        # Baca dan validasi data workbook dulu supaya kesalahan ketahuan sebelum DB/XML/PDF
+        if table_data is None:
+            excel_file_path = get_project_paths(dcc)['excel']
+            table_data = read_dcc_tables(dcc, str(excel_file_path))
+        validate_tables(table_data, dcc.results)
+
         if progress_callback:
             progress_callback(40, get_progress_message("saving", language))
 
@@ -889,13 +1008,20 @@ def create_dcc(db: Session, dcc: schemas.DCCFormCreate, progress_callback=None,
             statement=json.dumps(statements_data),
             comment=comment_data,
             results=json.dumps(results_data),
+            extraction_template=dcc.extraction_template,
+            compact_units=dcc.compact_units,
+            normalize_units=dcc.normalize_units,
         )
 
         logging.info(f"Saving DCC: {dcc.administrative_data.sertifikat} to the database")
         
         db.add(db_dcc)
-        db.commit()
-        db.refresh(db_dcc)
+        if commit:
+            db.commit()
+            db.refresh(db_dcc)
+        else:
+            # Batch: id dibutuhkan untuk nama file, commit dilakukan pemanggil setelah semua selesai
+            db.flush()
         logging.info(f"DCC {dcc.administrative_data.sertifikat} saved successfully with ID {db_dcc.id}")
 
         if progress_callback:
@@ -908,6 +1034,7 @@ def create_dcc(db: Session, dcc: schemas.DCCFormCreate, progress_callback=None,
         paths = get_project_paths(dcc, db_dcc.id)
         new_pdf_path = str(paths['pdf_output'])
         xml_path = str(paths['word_output'].with_suffix('.xml'))
+        outputs = [xml_path, new_pdf_path]
         
         # Dapatkan path file Excel
         excel_file_path = paths['excel']
@@ -918,16 +1045,12 @@ def create_dcc(db: Session, dcc: schemas.DCCFormCreate, progress_callback=None,
         # Buat folder output (jika belum ada)
         os.makedirs(paths['word_output'].parent, exist_ok=True)
         
-        # Gunakan excel_file_path yang sudah didapatkan
-        table_data = read_excel_tables(str(excel_file_path), dcc.sheet_name, dcc.results)
-        
         # Generate XML
         if progress_callback:
             progress_callback(70, get_progress_message("generating_xml", language))
 
-        xml_content = generate_xml(dcc, table_data)
         with open(xml_path, "w", encoding="utf-8") as f:
-            f.write(xml_content)
+            generate_xml(dcc, table_data, f.write)
         logging.info(f"XML file generated at {xml_path}")
         
         # Generate PDF
@@ -961,16 +1084,15 @@ def create_dcc(db: Session, dcc: schemas.DCCFormCreate, progress_callback=None,
             "certificate_name": filename_with_id,
             "database_id": db_dcc.id
         }
-        
+
+    except Exception:
+        for path in outputs:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
     finally:
-        if wb:
-            wb.Close(False)
-        if excel:
-            excel.Quit()
-        if word:
-            for doc in word.Documents:
-                doc.Close(SaveChanges=False)
-            word.Quit()
+        if owns_tables and table_data:
+            close_tables(table_data)
 
 def get_all_dccs(db: Session):
     """
@@ -1073,6 +1195,7 @@ def generate_preview_files(dcc: schemas.DCCFormCreate):
     Returns URLs to temporary files
     """
     logging.info("Starting preview generation")
+    table_data = {}
     
     try:
         # Generate unique identifier for this preview
@@ -1103,7 +1226,8 @@ def generate_preview_files(dcc: schemas.DCCFormCreate):
         table_data = {}
         if excel_path and excel_path.exists():
             logging.info(f"Reading Excel file: {excel_path}")
-            table_data = read_excel_tables(str(excel_path), dcc.sheet_name, dcc.results)
+            table_data = read_dcc_tables(dcc, str(excel_path))
+            validate_tables(table_data, dcc.results)
         else:
             # Create mock table data for preview when Excel is not available
             logging.info("Creating mock data for preview (Excel not available)")
@@ -1116,25 +1240,20 @@ def generate_preview_files(dcc: schemas.DCCFormCreate):
                     for k in range(real_list_count):
                         numbers = ["0", "0", "0"]  # Mock values
                         units = ["V", "V", "V"]  # Mock units
-                        mock_data.append((numbers, units))
+                        mock_data.append(ResultColumn.from_texts(numbers, units))
                 
-                table_data[table_name] = {
-                    "data": mock_data,
-                    "config": result
-                }
+                table_data[table_name] = ResultTable(table_name, mock_data, result)
 
         captions = extract_captions_from_dcc(dcc)
         corrections = extract_corrections_from_dcc(dcc)
         
         # Generate XML
         logging.info("Generating preview XML...")
-        xml_content = generate_xml(dcc, table_data)
-        
         # Ensure parent directory exists
         paths['xml_output'].parent.mkdir(parents=True, exist_ok=True)
         
         with open(paths['xml_output'], "w", encoding="utf-8") as f:
-            f.write(xml_content)
+            generate_xml(dcc, table_data, f.write)
         logging.info(f"Preview XML generated: {paths['xml_output']}")
         logging.info(f"XML file exists after creation: {paths['xml_output'].exists()}")
         logging.info(f"XML file size: {paths['xml_output'].stat().st_size if paths['xml_output'].exists() else 'N/A'} bytes")
@@ -1184,6 +1303,8 @@ def generate_preview_files(dcc: schemas.DCCFormCreate):
         logging.error(f"Preview generation error: {str(e)}")
         logging.error(f"Stack trace:", exc_info=True)
         raise
+    finally:
+        close_tables(table_data)
 
 def cleanup_preview_files(preview_id: str):
     """Clean up temporary preview files"""
@@ -1219,4 +1340,58 @@ def cleanup_old_preview_files(max_age_hours: int = 24):
                     logging.info(f"Cleaned up old preview file: {file_path}")
                     
     except Exception as e:
-        logging.warning(f"Error cleaning up old preview files: {e}")
\ No newline at end of file
+        logging.warning(f"Error cleaning up old preview files: {e}")
+
+def create_dcc_batch(db: Session, dccs: list, language='en'):
+    """Buat banyak DCC dalam satu transaksi; setiap workbook dibaca sekali untuk semua sheet yang dipakai"""
+    # Kelompokkan per workbook; satu sheet dibaca sekali untuk results yang sama
+    workbooks = {}
+    for dcc in dccs:
+        # Template lab sudah membaca blok tetap, tidak perlu ikut ekstraksi sekali jalan
+        if dcc.extraction_template:
+            continue
+        excel_path = str(get_project_paths(dcc)['excel'])
+        sheets = workbooks.setdefault(excel_path, {})
+        sheets.setdefault(dcc.sheet_name, dcc.results)
+
+    workbook_tables = {}
+    dcc_tables = []
+    try:
+        for excel_path, sheet_results in workbooks.items():
+            workbook_tables[excel_path] = read_workbook_tables(excel_path, sheet_results)
+
+        # Semua sertifikat divalidasi dulu, jadi tidak ada yang tersimpan jika satu saja bermasalah
+        for dcc in dccs:
+            excel_path = str(get_project_paths(dcc)['excel'])
+            if not dcc.extraction_template and workbooks[excel_path][dcc.sheet_name] == dcc.results:
+                table_data = workbook_tables[excel_path][dcc.sheet_name]
+                if dcc.normalize_units:
+                    table_data = normalize_units(table_data)
+            else:
+                # Template lab, atau sheet yang sama dengan konfigurasi results berbeda
+                table_data = read_dcc_tables(dcc, excel_path)
+            validate_tables(table_data, dcc.results)
+            dcc_tables.append(table_data)
+
+        # Satu transaksi untuk seluruh batch: jika satu sertifikat gagal, tidak ada yang tersimpan
+        results = []
+        try:
+            for dcc, table_data in zip(dccs, dcc_tables):
+                results.append(create_dcc(db, dcc, language=language, table_data=table_data, commit=False))
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Record-nya di-rollback, jadi PDF/XML sertifikat yang sudah dibuat ikut dihapus
+            for result in results:
+                for path in (result["pdf_path"], os.path.splitext(result["pdf_path"])[0] + ".xml"):
+                    if os.path.exists(path):
+                        os.remove(path)
+            raise
+        return results
+    finally:
+        # Tabel dipakai bersama beberapa sertifikat, jadi baru ditutup setelah semuanya selesai
+        for sheets in workbook_tables.values():
+            for table_data in sheets.values():
+                close_tables(table_data)
+        for table_data in dcc_tables:
+            close_tables(table_data)
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -38,6 +38,28 @@ engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def add_missing_columns(bind=None):
+    """Migrasi ringan: kolom model yang belum ada di tabel lama ditambahkan dengan ALTER TABLE
+
+    create_all hanya membuat tabel baru, jadi database yang dibuat versi sebelumnya perlu ini
+    sebelum model dengan kolom baru dipakai. Baris lama berisi NULL di kolom baru.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    quote = bind.dialect.identifier_preparer.quote
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                    )
+
 # Membuat tabel di database jika belum ada
 Base.metadata.create_all(bind=engine)
 print("Tabel DCC telah dibuat.")
\ No newline at end of file
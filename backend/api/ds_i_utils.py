@@ -1,4 +1,7 @@
+import math
 import re
+from functools import lru_cache
+import numpy as np
 
 # Dictionary
 prefixes = {
@@ -81,7 +84,6 @@ base_units = {
     "Gy": "\\gray",
     "kat": "\\katal",
     "bit": "\\bit",
-    "B": "\\byte",
     "ppm": "\\ppm",
     "%": "\\percent",
     "ha": "\\hectare",
@@ -111,150 +113,432 @@ base_units = {
     "Oe": "\\oersted"
 }
 
-def parse_token(token, power_sign=1):
-    """ Mengubah token unit dengan prefix dan exponent ke format DS-I. """
-    match = re.fullmatch(r"([^\d\*\./]+)(-?\d*(?:\.\d+)?)", token)
-    if not match:
+# Satuan yang hanya dipakai setelah binary prefix (KiB, Mibit); "B" tanpa prefix tetap \bel
+binary_units = {
+    "bit": "\\bit",
+    "B": "\\byte",
+}
+
+# Faktor prefix (DS-I) terhadap satuan tanpa prefix
+prefix_factors = {
+    "\\deca": 1e1, "\\hecto": 1e2, "\\kilo": 1e3, "\\mega": 1e6, "\\giga": 1e9,
+    "\\tera": 1e12, "\\peta": 1e15, "\\exa": 1e18, "\\zetta": 1e21, "\\yotta": 1e24,
+    "\\ronna": 1e27, "\\quetta": 1e30,
+    "\\deci": 1e-1, "\\centi": 1e-2, "\\milli": 1e-3, "\\micro": 1e-6, "\\nano": 1e-9,
+    "\\pico": 1e-12, "\\femto": 1e-15, "\\atto": 1e-18, "\\zepto": 1e-21, "\\yocto": 1e-24,
+    "\\ronto": 1e-27, "\\quecto": 1e-30,
+    "\\kibi": 2.0 ** 10, "\\mebi": 2.0 ** 20, "\\gibi": 2.0 ** 30, "\\tebi": 2.0 ** 40,
+    "\\pebi": 2.0 ** 50, "\\exbi": 2.0 ** 60, "\\zebi": 2.0 ** 70, "\\yobi": 2.0 ** 80,
+}
+
+# Urutan eksponen vektor dimensi; bit dipisah supaya data tidak setara dengan besaran tanpa dimensi
+DIMENSIONS = ("m", "kg", "s", "A", "K", "mol", "cd", "bit")
+
+# Satuan DS-I -> (faktor ke SI, eksponen dimensi). Satuan logaritmik (\neper, \bel, \decibel)
+# sengaja tidak ada karena tidak bisa diskalakan linear.
+unit_dimensions = {
+    "\\metre": (1.0, {"m": 1}),
+    "\\kilogram": (1.0, {"kg": 1}),
+    "\\gram": (1e-3, {"kg": 1}),
+    "\\tonne": (1e3, {"kg": 1}),
+    "\\dalton": (1.66053906660e-27, {"kg": 1}),
+    "\\second": (1.0, {"s": 1}),
+    "\\minute": (60.0, {"s": 1}),
+    "\\hour": (3600.0, {"s": 1}),
+    "\\day": (86400.0, {"s": 1}),
+    "\\ampere": (1.0, {"A": 1}),
+    "\\kelvin": (1.0, {"K": 1}),
+    "\\degreecelsius": (1.0, {"K": 1}),
+    "\\mole": (1.0, {"mol": 1}),
+    "\\candela": (1.0, {"cd": 1}),
+    "\\bit": (1.0, {"bit": 1}),
+    "\\byte": (8.0, {"bit": 1}),
+    "\\one": (1.0, {}),
+    "\\percent": (1e-2, {}),
+    "\\ppm": (1e-6, {}),
+    "\\radian": (1.0, {}),
+    "\\steradian": (1.0, {}),
+    "\\degree": (math.pi / 180, {}),
+    "\\arcminute": (math.pi / 10800, {}),
+    "\\arcsecond": (math.pi / 648000, {}),
+    "\\hertz": (1.0, {"s": -1}),
+    "\\becquerel": (1.0, {"s": -1}),
+    "\\newton": (1.0, {"kg": 1, "m": 1, "s": -2}),
+    "\\dyne": (1e-5, {"kg": 1, "m": 1, "s": -2}),
+    "\\pascal": (1.0, {"kg": 1, "m": -1, "s": -2}),
+    "\\bar": (1e5, {"kg": 1, "m": -1, "s": -2}),
+    "\\mmHg": (133.322387415, {"kg": 1, "m": -1, "s": -2}),
+    "\\joule": (1.0, {"kg": 1, "m": 2, "s": -2}),
+    "\\erg": (1e-7, {"kg": 1, "m": 2, "s": -2}),
+    "\\electronvolt": (1.602176634e-19, {"kg": 1, "m": 2, "s": -2}),
+    "\\watt": (1.0, {"kg": 1, "m": 2, "s": -3}),
+    "\\coulomb": (1.0, {"A": 1, "s": 1}),
+    "\\volt": (1.0, {"kg": 1, "m": 2, "s": -3, "A": -1}),
+    "\\farad": (1.0, {"kg": -1, "m": -2, "s": 4, "A": 2}),
+    "\\ohm": (1.0, {"kg": 1, "m": 2, "s": -3, "A": -2}),
+    "\\siemens": (1.0, {"kg": -1, "m": -2, "s": 3, "A": 2}),
+    "\\weber": (1.0, {"kg": 1, "m": 2, "s": -2, "A": -1}),
+    "\\maxwell": (1e-8, {"kg": 1, "m": 2, "s": -2, "A": -1}),
+    "\\tesla": (1.0, {"kg": 1, "s": -2, "A": -1}),
+    "\\gauss": (1e-4, {"kg": 1, "s": -2, "A": -1}),
+    "\\oersted": (1e3 / (4 * math.pi), {"A": 1, "m": -1}),
+    "\\henry": (1.0, {"kg": 1, "m": 2, "s": -2, "A": -2}),
+    "\\lumen": (1.0, {"cd": 1}),
+    "\\lux": (1.0, {"cd": 1, "m": -2}),
+    "\\phot": (1e4, {"cd": 1, "m": -2}),
+    "\\stilb": (1e4, {"cd": 1, "m": -2}),
+    "\\gray": (1.0, {"m": 2, "s": -2}),
+    "\\sievert": (1.0, {"m": 2, "s": -2}),
+    "\\katal": (1.0, {"mol": 1, "s": -1}),
+    "\\hectare": (1e4, {"m": 2}),
+    "\\litre": (1e-3, {"m": 3}),
+    "\\barn": (1e-28, {"m": 2}),
+    "\\angstrom": (1e-10, {"m": 1}),
+    "\\astronomicalunit": (149597870700.0, {"m": 1}),
+    "\\nauticalmile": (1852.0, {"m": 1}),
+    "\\knot": (1852.0 / 3600, {"m": 1, "s": -1}),
+    "\\gal": (1e-2, {"m": 1, "s": -2}),
+    "\\poise": (0.1, {"kg": 1, "m": -1, "s": -1}),
+    "\\stokes": (1e-4, {"m": 2, "s": -1}),
+}
+
+# Titik nol skala selain SI; hanya dipakai jika satuan berdiri sendiri (bukan selisih/turunan)
+unit_offsets = {
+    "\\degreecelsius": 273.15,
+}
+
+# Ukuran memo per arah konversi; satuan berbeda dalam satu workbook biasanya hanya puluhan
+D_SI_CACHE_SIZE = 4096
+
+_TOKEN = re.compile(r"([^\d\*\./]+)(-?\d*(?:\.\d+)?)")
+_LATEX_TOKEN = re.compile(r"\\[a-zA-Z]+|\{[^}]+\}")
+_END = ""
+
+def _build_trie(table: dict) -> dict:
+    """Trie karakter dari key table; node akhir menyimpan nilai DS-I di key _END"""
+    trie = {}
+    for key, latex in table.items():
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[_END] = latex
+    return trie
+
+def _prefix_matches(trie: dict, text: str) -> list:
+    """(panjang, nilai) setiap key trie yang menjadi awalan text, terpanjang dulu"""
+    matches = []
+    node = trie
+    for idx, ch in enumerate(text):
+        node = node.get(ch)
+        if node is None:
+            break
+        if _END in node:
+            matches.append((idx + 1, node[_END]))
+    matches.reverse()
+    return matches
+
+def _reverse(*tables) -> dict:
+    """Map DS-I -> simbol; simbol pertama menang (μ sebelum µ, ‘ sebelum ')"""
+    reverse = {}
+    for table in tables:
+        for symbol, latex in table.items():
+            reverse.setdefault(latex, symbol)
+    return reverse
+
+def _format_exponent(exp):
+    # format exponent: integer tanpa titik, desimal tetap
+    if isinstance(exp, float) and exp.is_integer():
+        return int(exp)
+    return exp
+
+class UnitError(ValueError):
+    """Satuan tidak dikenal atau dimensinya tidak cocok untuk dikonversi"""
+
+class CanonicalUnit:
+    """Satuan dalam bentuk kanonik: nilai SI = nilai * scale + offset, dimensi = vektor eksponen DIMENSIONS"""
+
+    __slots__ = ("scale", "dimensions", "offset")
+
+    def __init__(self, scale: float, dimensions: tuple, offset: float = 0.0):
+        self.scale = scale
+        self.dimensions = dimensions
+        self.offset = offset
+
+    def __repr__(self):
+        return f"CanonicalUnit({self.scale!r}, {self.dimensions!r}, {self.offset!r})"
+
+
+class UnitRegistry:
+    """Tabel prefix/satuan dua arah (simbol <-> DS-I), dikompilasi sekali saat import
+
+    Prefix dan satuan disimpan terpisah, jadi simbol yang sama (M, G, T, P sebagai prefix
+    maupun satuan) tidak tertukar; posisinya yang menentukan.
+    """
+
+    def __init__(self, prefixes: dict, binary_prefixes: dict, base_units: dict, binary_units: dict,
+                 prefix_factors: dict, unit_dimensions: dict, unit_offsets: dict):
+        self.prefixes = prefixes
+        self.binary_prefixes = binary_prefixes
+        self.base_units = base_units
+        self.binary_units = binary_units
+        self.prefix_factors = prefix_factors
+        self.unit_offsets = unit_offsets
+        self.unit_dimensions = {
+            latex: (scale, tuple(float(exps.get(dim, 0)) for dim in DIMENSIONS))
+            for latex, (scale, exps) in unit_dimensions.items()
+        }
+
+        self.prefix_trie = _build_trie(prefixes)
+        self.binary_prefix_trie = _build_trie(binary_prefixes)
+
+        self.prefix_symbols = _reverse(prefixes, binary_prefixes)
+        self.unit_symbols = _reverse(base_units, binary_units)
+        # Satuan dulu lalu prefix, masing-masing terpanjang dulu (\barn sebelum \bar)
+        names = sorted(self.unit_symbols, key=len, reverse=True) + sorted(self.prefix_symbols, key=len, reverse=True)
+        self.symbols = {**self.prefix_symbols, **self.unit_symbols}
+        self.symbol_pattern = re.compile("|".join(re.escape(name) for name in names))
+
+        self.to_ds_i = lru_cache(maxsize=D_SI_CACHE_SIZE)(self._to_ds_i)
+        self.to_text = lru_cache(maxsize=D_SI_CACHE_SIZE)(self._to_text)
+        self.to_html = lru_cache(maxsize=D_SI_CACHE_SIZE)(self._to_html)
+        self.canonical = lru_cache(maxsize=D_SI_CACHE_SIZE)(self._canonical)
+
+    def parse_token(self, token: str, power_sign=1) -> str:
+        """Satu token simbol (prefix + satuan + exponent) ke DS-I; token tak dikenal dikembalikan apa adanya"""
+        match = _TOKEN.fullmatch(token)
+        if not match:
+            return token
+
+        unit_part, exp_str = match.groups()
+        exp = float(exp_str) if exp_str else 1
+        exp *= power_sign
+
+        # Cek binary prefix (exponent ditulis apa adanya, contoh {2.0})
+        binary_matches = _prefix_matches(self.binary_prefix_trie, unit_part)
+        if binary_matches:
+            length, prefix = binary_matches[0]
+            base = unit_part[length:]
+            if base in self.binary_units:
+                return prefix + self.binary_units[base] + (f"\\tothe{{{exp}}}" if exp != 1 else "")
+            return token
+
+        # Cek prefix SI, prefix terpanjang dulu (contoh "da" sebelum "d")
+        for length, prefix in _prefix_matches(self.prefix_trie, unit_part):
+            base = unit_part[length:]
+            if base in self.base_units:
+                unit_str = prefix + self.base_units[base]
+                return unit_str + (f"\\tothe{{{_format_exponent(exp)}}}" if exp != 1 else "")
+
+        # Base unit saja
+        if unit_part in self.base_units:
+            unit_str = self.base_units[unit_part]
+            return unit_str + (f"\\tothe{{{_format_exponent(exp)}}}" if exp != 1 else "")
+
         return token
 
-    unit_part, exp_str = match.groups()
-    exp = float(exp_str) if exp_str else 1
-    exp *= power_sign
-
-    # Cek binary prefix
-    for p in sorted(binary_prefixes, key=len, reverse=True):
-        if unit_part.startswith(p):
-            base = unit_part[len(p):]
-            if base == "bit":
-                unit_str = f"{binary_prefixes[p]}\\bit"
-                return unit_str + (f"\\tothe{{{exp}}}" if exp != 1 else "")
-            elif base == "B":
-                unit_str = f"{binary_prefixes[p]}\\byte"
-                return unit_str + (f"\\tothe{{{exp}}}" if exp != 1 else "")
-            return token 
-
-    # Cek prefix SI
-    for p in sorted(prefixes, key=len, reverse=True):
-        if unit_part.startswith(p):
-            base = unit_part[len(p):]
-            if base in base_units:
-                unit_str = prefixes[p] + base_units[base]
-                # format exponent: integer tanpa titik, desimal tetap
-                if isinstance(exp, float) and exp.is_integer():
-                    exp_formatted = int(exp)
-                else:
-                    exp_formatted = exp
-                return unit_str + (f"\\tothe{{{exp_formatted}}}" if exp != 1 else "")
-
-    # Base unit saja
-    if unit_part in base_units:
-        unit_str = base_units[unit_part]
-        if isinstance(exp, float) and exp.is_integer():
-            exp_formatted = int(exp)
+    def _to_ds_i(self, expr: str) -> str:
+        expr = expr.replace(" ", "").replace(".", "*")
+        if "/" in expr:
+            num, denom = expr.split("/", 1)
+            numerator_tokens = num.split("*")
+            denominator_tokens = denom.split("*")
         else:
-            exp_formatted = exp
-        return unit_str + (f"\\tothe{{{exp_formatted}}}" if exp != 1 else "")
+            numerator_tokens = expr.split("*")
+            denominator_tokens = []
 
-    return token
+        latex_parts = []
+        for token in numerator_tokens:
+            if token:
+                latex_parts.append(self.parse_token(token, 1))
+        for token in denominator_tokens:
+            if token:
+                latex_parts.append(self.parse_token(token, -1))
 
-def d_si(expr: str) -> str:
-    """ Fungsi utama konversi string unit ke format DS-I. Mendukung operator perkalian '.', '*', dan pembagian '/'."""
-    expr = expr.replace(" ", "").replace(".", "*")
-    if "/" in expr:
-        num, denom = expr.split("/", 1)
-        numerator_tokens = re.split(r"\*", num)
-        denominator_tokens = re.split(r"\*", denom)
-    else:
-        numerator_tokens = re.split(r"\*", expr)
-        denominator_tokens = []
-
-    latex_parts = []
-    for token in numerator_tokens:
-        if token:
-            latex_parts.append(parse_token(token, 1))
-    for token in denominator_tokens:
-        if token:
-            latex_parts.append(parse_token(token, -1))
-
-    return "".join(latex_parts)
+        return "".join(latex_parts)
 
-def convert_unit(unit):
-    """Convert LaTeX or DS-I unit format to human-readable format."""
-    
-    all_units = list(base_units.items()) + list(prefixes.items()) + list(binary_prefixes.items())
-    
-    # Ganti unit dasar sesuai dengan yang ada di dictionary (urutkan agar yang lebih spesifik terlebih dahulu)
-    for base_unit, latex_unit in sorted(base_units.items(), key=lambda item: len(item[1]), reverse=True):
-        if latex_unit in unit:
-            unit = unit.replace(latex_unit, base_unit)  # Ganti unit dasar dengan unit standar
-    
-    # Ganti prefix sesuai dengan yang ada di dictionary
-    for prefix, latex_prefix in prefixes.items():
-        if latex_prefix in unit:
-            unit = unit.replace(latex_prefix, prefix)
-    
-    # Mengganti binary prefix
-    for binary_prefix, latex_binary_prefix in binary_prefixes.items():
-        if latex_binary_prefix in unit:
-            unit = unit.replace(latex_binary_prefix, binary_prefix)  
-
-    # Menangani \tothe dan simbol lainnya
-    if "\\tothe" in unit:
-        unit = unit.replace("\\tothe", "^")
-        unit = unit.replace("}", "")  
-        unit = unit.replace("{", "") 
-    
-    return unit
+    def _to_text(self, unit: str) -> str:
+        # Semua nama DS-I diganti simbolnya dalam satu pass; teks lain dibiarkan
+        unit = self.symbol_pattern.sub(lambda match: self.symbols[match.group(0)], unit)
 
-def convert_latex_unit(latex_unit):
-    import re
-
-    # Tokenize LaTeX string: separate prefixes, units, exponents, etc.
-    tokens = re.findall(r'\\[a-zA-Z]+|\{[^}]+\}', latex_unit)
-
-    units = []
-    i = 0
-    while i < len(tokens):
-        token = tokens[i]
-
-        # Handle exponent: \tothe + {exponent}
-        if token == '\\tothe' and i + 1 < len(tokens):
-            exponent = tokens[i + 1].strip("{}")
-            if exponent == '-1':
-                if units:
-                    units[-1] = f"/{units[-1]}"  # Divide for -1 exponent
-            else:
-                if units:
-                    units[-1] = f"{units[-1]}<sup>{exponent}</sup>"  # Apply exponent
-            i += 2
-            continue
-
-        # Handle prefix + base unit
-        if i + 1 < len(tokens):
-            prefix_token = tokens[i]
-            unit_token = tokens[i + 1]
-            prefix = next((k for k, v in prefixes.items() if v == prefix_token), None)
-            base = next((k for k, v in base_units.items() if v == unit_token), None)
-            if prefix and base:
-                units.append(prefix + base)  # Combine prefix + unit
+        # Menangani \tothe dan simbol lainnya
+        if "\\tothe" in unit:
+            unit = unit.replace("\\tothe", "^")
+            unit = unit.replace("}", "")
+            unit = unit.replace("{", "")
+        return unit
+
+    def _to_html(self, latex_unit: str) -> str:
+        tokens = _LATEX_TOKEN.findall(latex_unit)
+
+        units = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+
+            # Handle exponent: \tothe + {exponent}
+            if token == '\\tothe' and i + 1 < len(tokens):
+                exponent = tokens[i + 1].strip("{}")
+                if exponent == '-1':
+                    if units:
+                        units[-1] = f"/{units[-1]}"  # Divide for -1 exponent
+                else:
+                    if units:
+                        units[-1] = f"{units[-1]}<sup>{exponent}</sup>"  # Apply exponent
                 i += 2
                 continue
 
-        # Handle base unit without prefix
-        base = next((k for k, v in base_units.items() if v == token), None)
-        if base:
-            units.append(base)
+            # Handle prefix + base unit
+            if i + 1 < len(tokens):
+                prefix = self.prefix_symbols.get(token)
+                base = self.unit_symbols.get(tokens[i + 1])
+                if prefix and base:
+                    units.append(prefix + base)
+                    i += 2
+                    continue
+
+            # Handle base unit without prefix; token tak dikenal tetap ditulis
+            units.append(self.unit_symbols.get(token, token))
             i += 1
-        else:
-            # If unmatched, just append the token (e.g., keep unknown)
-            units.append(token)
+
+        result = ''.join(units)
+
+        # Clean up extra parts like backslashes or curly braces
+        result = result.replace("\\", "")
+        result = result.replace("{", "").replace("}", "")
+        return result
+
+    def _canonical(self, unit: str):
+        """CanonicalUnit dari string DS-I (contoh \\milli\\metre\\tothe{2}); None jika ada bagian yang tidak dikenal"""
+        tokens = _LATEX_TOKEN.findall(unit)
+        if not tokens or "".join(tokens) != unit:
+            return None
+
+        scale = 1.0
+        dimensions = [0.0] * len(DIMENSIONS)
+        offset = 0.0
+        i = 0
+        while i < len(tokens):
+            factor = 1.0
+            if tokens[i] in self.prefix_factors and i + 1 < len(tokens):
+                factor = self.prefix_factors[tokens[i]]
+                i += 1
+            if tokens[i] not in self.unit_dimensions:
+                return None
+            name = tokens[i]
+            unit_scale, unit_dimensions = self.unit_dimensions[name]
             i += 1
 
-    # Now handle the final output
-    result = ''.join(units)
+            exp = 1.0
+            if i + 1 < len(tokens) and tokens[i] == "\\tothe":
+                try:
+                    exp = float(tokens[i + 1].strip("{}"))
+                except ValueError:
+                    return None
+                i += 2
+
+            scale *= (factor * unit_scale) ** exp
+            for idx, value in enumerate(unit_dimensions):
+                dimensions[idx] += value * exp
+            # Titik nol hanya berlaku untuk satuan tunggal tanpa prefix/exponent (contoh \\degreecelsius)
+            if name in self.unit_offsets and len(tokens) == 1:
+                offset = self.unit_offsets[name]
+
+        return CanonicalUnit(scale, tuple(dimensions), offset)
+
+    def conversion(self, from_unit: str, to_unit: str, difference=False):
+        """(faktor, geser) sehingga nilai to_unit = nilai from_unit * faktor + geser
+
+        difference=True untuk selisih/uncertainty: titik nol (°C vs K) diabaikan.
+        """
+        if from_unit == to_unit:
+            return 1.0, 0.0
+        source, target = self.canonical(from_unit), self.canonical(to_unit)
+        if source is None or target is None:
+            raise UnitError(f"Unknown unit: {from_unit if source is None else to_unit}")
+        if source.dimensions != target.dimensions:
+            raise UnitError(f"Incompatible units: {from_unit} and {to_unit}")
+        factor = source.scale / target.scale
+        if difference:
+            return factor, 0.0
+        return factor, (source.offset - target.offset) / target.scale
+
+unit_registry = UnitRegistry(
+    prefixes, binary_prefixes, base_units, binary_units,
+    prefix_factors, unit_dimensions, unit_offsets,
+)
+
+def parse_token(token, power_sign=1):
+    """ Mengubah token unit dengan prefix dan exponent ke format DS-I. """
+    return unit_registry.parse_token(token, power_sign)
+
+def d_si(expr: str) -> str:
+    """ Fungsi utama konversi string unit ke format DS-I. Mendukung operator perkalian '.', '*', dan pembagian '/'.
+
+    Hasil di-memo per string mentah, jadi satu tabel hanya mem-parse setiap satuan unik sekali.
+    """
+    return unit_registry.to_ds_i(expr)
+
+def convert_unit(unit):
+    """Convert LaTeX or DS-I unit format to human-readable format."""
+    return unit_registry.to_text(unit)
+
+def convert_latex_unit(latex_unit):
+    """DS-I ke HTML untuk PDF: exponent -1 jadi '/x', lainnya <sup>"""
+    return unit_registry.to_html(latex_unit)
+
+def map_units(convert, units) -> list:
+    """Terapkan convert ke banyak satuan sekaligus: string si:unitXMLList (dipisah spasi) atau list/array kolom
+
+    Setiap satuan unik hanya dikonversi sekali lalu hasilnya disebar kembali ke semua posisi.
+    """
+    if isinstance(units, str):
+        units = units.split()
+    converted = {}
+    result = []
+    for unit in units:
+        if unit not in converted:
+            converted[unit] = convert(unit)
+        result.append(converted[unit])
+    return result
+
+def d_si_list(units) -> list:
+    return map_units(unit_registry.to_ds_i, units)
+
+def convert_unit_list(units) -> list:
+    return map_units(unit_registry.to_text, units)
+
+def convert_latex_unit_list(units) -> list:
+    return map_units(unit_registry.to_html, units)
+
+def canonical_unit(unit: str):
+    """Bentuk kanonik (CanonicalUnit) string DS-I, di-cache per string; None jika tidak dikenal"""
+    return unit_registry.canonical(unit)
+
+def is_compatible(from_unit: str, to_unit: str) -> bool:
+    """True jika kedua satuan DS-I berdimensi sama (contoh \\milli\\volt dan \\volt)"""
+    if from_unit == to_unit:
+        return True
+    source, target = unit_registry.canonical(from_unit), unit_registry.canonical(to_unit)
+    return source is not None and target is not None and source.dimensions == target.dimensions
+
+def rescale(values, from_unit: str, to_unit: str, difference=False) -> np.ndarray:
+    """Ubah array nilai dari from_unit ke to_unit dalam satu operasi; UnitError jika tidak kompatibel"""
+    factor, shift = unit_registry.conversion(from_unit, to_unit, difference)
+    values = np.asarray(values, dtype=np.float64)
+    if factor == 1.0 and shift == 0.0:
+        return values.copy()
+    return values * factor + shift
 
-    # Clean up extra parts like backslashes or curly braces
-    result = result.replace("\\", "")  # Remove LaTeX backslashes
-    result = result.replace("{", "").replace("}", "")  # Remove curly braces
+def rescale_mixed(values, units, to_unit: str, difference=False) -> np.ndarray:
+    """Normalisasi kolom dengan satuan per baris (prefix campuran) ke to_unit
 
-    return result
\ No newline at end of file
+    Faktor dihitung sekali per satuan unik lalu diterapkan ke seluruh kolom sekaligus.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    unit_names, unit_codes = np.unique(np.asarray(list(units), dtype=object), return_inverse=True)
+    if len(unit_codes) != len(values):
+        raise ValueError(f"Got {len(values)} value(s) but {len(unit_codes)} unit(s)")
+    conversions = [unit_registry.conversion(str(unit), to_unit, difference) for unit in unit_names]
+    factors = np.array([factor for factor, _ in conversions], dtype=np.float64)
+    shifts = np.array([shift for _, shift in conversions], dtype=np.float64)
+    return values * factors[unit_codes] + shifts[unit_codes]
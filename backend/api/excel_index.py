@@ -0,0 +1,115 @@
+"""Indeks sidecar workbook (<upload>.index.json): ukuran sheet dan peta tabel hasil deteksi"""
+import json
+import logging
+import os
+from api import excel_reader, table_cache, tabular_reader, workbook_meta
+
+INDEX_SUFFIX = ".index.json"
+
+def index_path(excel_path: str) -> str:
+    return f"{excel_path}{INDEX_SUFFIX}"
+
+def _describe_sheet(grid) -> dict:
+    tables = []
+    for first_row, last_row, first_col, last_col in excel_reader.detect_tables(grid):
+        numeric_cols = excel_reader.numeric_columns(grid, first_row, last_row, first_col, last_col)
+        tables.append({
+            "first_row": first_row,
+            "last_row": last_row,
+            "first_col": first_col,
+            "last_col": last_col,
+            "numeric_columns": numeric_cols,
+            # Satuan selalu diambil dari kolom di sebelah kanan kolom numerik
+            "unit_columns": [col + 1 for col in numeric_cols],
+        })
+
+    rows, columns = grid.shape
+    return {"rows": rows, "columns": columns, "tables": tables}
+
+def _read_index_file(excel_path: str):
+    try:
+        with open(index_path(excel_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def build_index(excel_path: str, previous: dict = None) -> dict:
+    """Catat tabel setiap sheet; sheet yang digest-nya sama dengan indeks sebelumnya tidak dibaca ulang"""
+    digests = table_cache.sheet_digests(excel_path)
+    reusable = {}
+    if previous and previous.get("version") == excel_reader.PARSER_VERSION:
+        for name, sheet in previous["sheets"].items():
+            if sheet.get("digest") and sheet.get("digest") == digests.get(name.lower()):
+                reusable[name.lower()] = sheet
+
+    names = workbook_meta.sheet_names(excel_path)
+    changed = [name for name in names if name.lower() not in reusable]
+    parsed = {}
+    if changed:
+        logging.info(f"Indexing {len(changed)} of {len(names)} sheet(s) of {os.path.basename(excel_path)}")
+        for name, grid in excel_reader.load_workbook_grids(excel_path, changed):
+            parsed[name.lower()] = dict(_describe_sheet(grid), digest=digests.get(name.lower()))
+
+    index = {
+        "version": excel_reader.PARSER_VERSION,
+        "sha256": table_cache.file_digest(excel_path),
+        "sheets": {name: parsed.get(name.lower()) or reusable[name.lower()] for name in names},
+    }
+    if tabular_reader.file_kind(excel_path) == "xlsx":
+        # Hash per part (sheet, sharedStrings, styles) untuk dibandingkan saat upload ulang
+        index["parts"], _ = workbook_meta.workbook_digests(excel_path)
+    return index
+
+def write_index(excel_path: str):
+    """Dijalankan sebagai background task setelah upload; indeks lama dipakai ulang per sheet"""
+    try:
+        index = build_index(excel_path, previous=_read_index_file(excel_path))
+        tmp_path = index_path(excel_path) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path(excel_path))
+        logging.info(f"Workbook index written for {os.path.basename(excel_path)}")
+    except Exception as e:
+        logging.error(f"Failed to index workbook {excel_path}: {str(e)}")
+
+def refresh_index(excel_path: str):
+    """Background task setelah upload: buang cache sheet yang berubah, lalu perbarui indeks
+
+    Digest sheet isi lama diambil dari indeks sebelumnya, jadi request upload tidak perlu
+    meng-hash file lama. Tanpa indeks lama tidak ada yang dibuang: entri cache lama tidak
+    akan cocok lagi dengan digest isi baru dan akhirnya keluar lewat eviction.
+    """
+    previous = _read_index_file(excel_path)
+    if previous:
+        digests = {name.lower(): sheet.get("digest") for name, sheet in previous.get("sheets", {}).items()
+                   if sheet and sheet.get("digest")}
+        try:
+            table_cache.invalidate_changed(excel_path, digests)
+        except Exception as e:
+            logging.warning(f"Failed to invalidate table cache for {excel_path}: {str(e)}")
+    write_index(excel_path)
+
+def load_index(excel_path: str):
+    """Indeks yang masih sesuai dengan isi file, atau None"""
+    index = _read_index_file(excel_path)
+    if index is None:
+        return None
+
+    # Indeks dari versi parser lama dibangun ulang
+    if index.get("version") != excel_reader.PARSER_VERSION:
+        return None
+    if not os.path.exists(excel_path) or index.get("sha256") != table_cache.file_digest(excel_path):
+        return None
+    return index
+
+def current_sheet_tables(excel_path: str, sheet_name: str):
+    """Tabel sheet dari indeks selama isi sheet itu belum berubah, walaupun sheet lain sudah diedit"""
+    index = _read_index_file(excel_path)
+    if index is None or index.get("version") != excel_reader.PARSER_VERSION:
+        return None
+    for name, sheet in index["sheets"].items():
+        if name.lower() == sheet_name.lower():
+            if sheet.get("digest") != table_cache.sheet_digest(excel_path, sheet_name):
+                return None
+            return sheet["tables"]
+    return None
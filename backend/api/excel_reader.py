@@ -0,0 +1,638 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import openpyxl
+from api.ds_i_utils import d_si, map_units
+from api.number_format import format_values
+from api import formula_eval, tabular_reader, workbook_meta
+from api.result_table import ResultColumn, StreamedColumn
+
+# Dinaikkan setiap kali hasil deteksi/ekstraksi berubah (dipakai cache dan indeks)
+PARSER_VERSION = 4
+# Celah kolom kosong maksimum yang masih dianggap satu tabel
+TABLE_GAP_COLUMNS = 2
+# Sheet dengan baris lebih dari ini dibaca secara streaming
+STREAMING_ROW_THRESHOLD = 20000
+STREAMING_PART_BYTES = 4 * 1024 * 1024
+# Jumlah nilai per kolom yang disimpan di memori sebelum dipindah ke file sementara
+COLUMN_BUFFER_SIZE = 4096
+# Jumlah baris per blok mask saat scan streaming
+_MASK_BLOCK_ROWS = 4096
+# Workbook lebih besar dari ini diekstrak per sheet di proses terpisah (batch multi-sheet)
+PARALLEL_WORKBOOK_BYTES = 8 * 1024 * 1024
+PARALLEL_MAX_WORKERS = 4
+
+_pool = None  # ProcessPoolExecutor bersama, lihat _process_pool()
+_pool_lock = threading.Lock()
+
+class SheetGrid:
+    """Snapshot used range sebuah sheet: teks tampilan, mask sel terisi, dan mask sel numerik"""
+
+    def __init__(self, texts):
+        self.texts = texts  # np.ndarray object (baris x kolom)
+        self.mask = texts != ""
+        self.normalized, self.numeric = _parse_numbers(texts, self.mask)
+
+    @property
+    def shape(self):
+        return self.texts.shape
+
+def _normalize_number(display_value):
+    normalized_value = (
+        display_value
+        .replace("\u00A0", "")  # remove non-breaking spaces
+        .replace(" ", "")       # remove normal spaces
+        .replace(",", ".")      # decimal separator
+    )
+    try:
+        float(normalized_value)
+    except ValueError:
+        return None
+    return normalized_value
+
+def _parse_numbers(texts, mask):
+    """Normalisasi angka untuk semua sel terisi; setiap teks unik hanya di-parse sekali"""
+    normalized = np.full(texts.shape, "", dtype=object)
+    numeric = np.zeros(texts.shape, dtype=bool)
+    if not mask.any():
+        return normalized, numeric
+
+    unique_texts, inverse = np.unique(texts[mask], return_inverse=True)
+    parsed = [_normalize_number(text) for text in unique_texts]
+    is_number = np.array([value is not None for value in parsed], dtype=bool)
+    values = np.array([value or "" for value in parsed], dtype=object)
+
+    normalized[mask] = values[inverse]
+    numeric[mask] = is_number[inverse]
+    return normalized, numeric
+
+def _find_sheet(wb, sheet_name: str):
+    """Cari sheet yang sesuai (case insensitive)"""
+    for name in wb.sheetnames:
+        if name.lower() == sheet_name.lower():
+            return wb[name]
+    raise FileNotFoundError(f"Sheet '{sheet_name}' tidak ditemukan")
+
+def _grid_from_rows(rows) -> SheetGrid:
+    """Susun list baris teks (panjang berbeda-beda) menjadi SheetGrid selebar used range"""
+    width = 0
+    for texts in rows:
+        # Buang sel kosong di ujung kanan supaya lebar grid = used range
+        while texts and texts[-1] == "":
+            texts.pop()
+        width = max(width, len(texts))
+
+    # Buang baris kosong di bawah used range
+    while rows and not rows[-1]:
+        rows.pop()
+
+    texts = np.full((len(rows), width), "", dtype=object)
+    for idx, row in enumerate(rows):
+        texts[idx, :len(row)] = row
+
+    return SheetGrid(texts)
+
+def _split_rows(cell_texts, row_lengths):
+    rows = []
+    start = 0
+    for length in row_lengths:
+        rows.append(cell_texts[start:start + length])
+        start += length
+    return rows
+
+def _fill_formula_texts(cell_texts, number_formats, row_lengths, formulas, sheet, whole_sheet, origin=(1, 1)):
+    """Isi teks sel formula tanpa cached value dengan hasil evaluasi lokal
+
+    Sel formula diberi placeholder (teks formula) dulu supaya ikut terdeteksi sebagai sel terisi;
+    hanya sel di dalam tabel terdeteksi yang dievaluasi, sisanya tetap placeholder.
+    origin: (baris, kolom) sheet, 1-based, dari sel pertama grid.
+    """
+    row_starts = np.concatenate(([0], np.cumsum(row_lengths)))
+    pending = {}
+    for (row, col), formula in formulas.formula_cells(sheet).items():
+        grid_row, grid_col = row - origin[0] + 1, col - origin[1] + 1
+        if not (1 <= grid_row <= len(row_lengths) and 1 <= grid_col <= row_lengths[grid_row - 1]):
+            continue
+        idx = int(row_starts[grid_row - 1]) + grid_col - 1
+        if cell_texts[idx] == "":
+            cell_texts[idx] = formula
+            pending[(row, col)] = idx
+    if not pending:
+        return
+
+    if whole_sheet:
+        # Kolom satuan di kanan tabel ikut dievaluasi
+        bounds = detect_tables(_grid_from_rows(_split_rows(cell_texts, row_lengths)))
+        positions = [
+            (row, col) for row, col in pending
+            if any(r0 <= row - 1 <= r1 and c0 <= col - 1 <= c1 + 1 for r0, r1, c0, c1 in bounds)
+        ]
+    else:
+        # Sheet sudah dipotong sampai tabel yang diketahui dari indeks
+        positions = list(pending)
+
+    results = formulas.evaluate(sheet, positions)
+    positions = [position for position in positions if results[position] is not None]
+    texts = format_values(
+        [str(results[position]) if isinstance(results[position], formula_eval.ExcelError) else results[position]
+         for position in positions],
+        [number_formats[pending[position]] for position in positions],
+    )
+    for position, text in zip(positions, texts):
+        cell_texts[pending[position]] = text.strip()
+
+def _read_grid(ws, max_row=None, max_col=None, formulas=None, min_row=1, min_col=1) -> SheetGrid:
+    """Baca used range (atau hanya rentang min_row..max_row, min_col..max_col) menjadi SheetGrid
+
+    Sel pertama grid adalah (min_row, min_col) sheet.
+    """
+    values, number_formats, row_lengths = [], [], []
+    for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+        for cell in row:
+            values.append(cell.value)
+            number_formats.append(cell.number_format)
+        row_lengths.append(len(row))
+
+    # Format seluruh sheet sekaligus, dikelompokkan per number_format
+    cell_texts = [text.strip() for text in format_values(values, number_formats)]
+
+    # Workbook yang disimpan tanpa cached value: formula dihitung lokal, bukan lewat Excel
+    if formulas is not None and formulas.needs_evaluation(ws.title):
+        _fill_formula_texts(
+            cell_texts, number_formats, row_lengths, formulas, ws.title,
+            whole_sheet=max_row is None and max_col is None and min_row == 1 and min_col == 1,
+            origin=(min_row, min_col),
+        )
+
+    return _grid_from_rows(_split_rows(cell_texts, row_lengths))
+
+def _crop_rows(rows, max_row=None, max_col=None, min_row=1, min_col=1):
+    return [row[min_col - 1:max_col] for row in rows[min_row - 1:max_row]]
+
+def _trim_texts(texts):
+    """Potong baris/kolom kosong di bawah dan kanan used range (versi array)"""
+    filled = texts != ""
+    rows = np.flatnonzero(filled.any(axis=1))
+    cols = np.flatnonzero(filled.any(axis=0))
+    return texts[:rows[-1] + 1 if len(rows) else 0, :cols[-1] + 1 if len(cols) else 0]
+
+def _load_csv_grid(path: str, sheet_name: str, max_row=None, max_col=None, min_row=1, min_col=1) -> SheetGrid:
+    if sheet_name.lower() != tabular_reader.csv_sheet_name(path).lower():
+        raise FileNotFoundError(f"Sheet '{sheet_name}' tidak ditemukan")
+    texts = tabular_reader.load_csv_texts(path)[min_row - 1:max_row, min_col - 1:max_col]
+    return SheetGrid(_trim_texts(texts))
+
+def _load_ods_grid(path: str, sheet_name: str, max_row=None, max_col=None, min_row=1, min_col=1) -> SheetGrid:
+    for _, rows in tabular_reader.iter_ods_tables(path, wanted=sheet_name):
+        return _grid_from_rows(_crop_rows(rows, max_row, max_col, min_row, min_col))
+    raise FileNotFoundError(f"Sheet '{sheet_name}' tidak ditemukan")
+
+def load_sheet_grid(excel_path: str, sheet_name: str, max_row=None, max_col=None, min_row=1, min_col=1) -> SheetGrid:
+    """Membaca used range sheet sekali jalan menjadi SheetGrid (.xlsx, .ods, .csv/.tsv)
+
+    min_row/min_col (1-based) memotong baris/kolom di atas dan kiri; grid[0, 0] = sel (min_row, min_col).
+    """
+    kind = tabular_reader.file_kind(excel_path)
+    if kind == "csv":
+        return _load_csv_grid(excel_path, sheet_name, max_row, max_col, min_row, min_col)
+    if kind == "ods":
+        return _load_ods_grid(excel_path, sheet_name, max_row, max_col, min_row, min_col)
+
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    formulas = formula_eval.workbook_evaluator(excel_path)
+    try:
+        return _read_grid(_find_sheet(wb, sheet_name), max_row, max_col, formulas, min_row, min_col)
+    finally:
+        wb.close()
+        if formulas is not None:
+            formulas.close()
+
+def load_workbook_grids(excel_path: str, sheet_names=None):
+    """Generator (nama sheet, SheetGrid) untuk semua sheet (atau hanya sheet_names) dengan satu kali buka workbook"""
+    wanted = {name.lower() for name in sheet_names} if sheet_names is not None else None
+
+    def is_wanted(name):
+        return wanted is None or name.lower() in wanted
+
+    kind = tabular_reader.file_kind(excel_path)
+    if kind == "csv":
+        name = tabular_reader.csv_sheet_name(excel_path)
+        if is_wanted(name):
+            yield name, SheetGrid(_trim_texts(tabular_reader.load_csv_texts(excel_path)))
+        return
+    if kind == "ods":
+        for name, rows in tabular_reader.iter_ods_tables(excel_path):
+            if is_wanted(name):
+                yield name, _grid_from_rows(rows)
+        return
+
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    formulas = formula_eval.workbook_evaluator(excel_path)
+    try:
+        for name in wb.sheetnames:
+            if is_wanted(name):
+                yield name, _read_grid(wb[name], formulas=formulas)
+    finally:
+        wb.close()
+        if formulas is not None:
+            formulas.close()
+
+def _bridge_gaps(mask, max_gap: int):
+    """Isi celah horizontal <= max_gap kolom kosong di antara dua sel terisi pada baris yang sama"""
+    if max_gap <= 0 or not mask.size:
+        return mask
+    n_cols = mask.shape[1]
+    cols = np.arange(n_cols)
+
+    # Indeks sel terisi terakhir di kiri dan berikutnya di kanan untuk setiap sel
+    prev_filled = np.maximum.accumulate(np.where(mask, cols, -1), axis=1)
+    next_filled = np.minimum.accumulate(np.where(mask, cols, n_cols)[:, ::-1], axis=1)[:, ::-1]
+
+    gap = next_filled - prev_filled - 1
+    return mask | ((prev_filled >= 0) & (next_filled < n_cols) & (gap <= max_gap))
+
+def _label_components(mask):
+    """Label komponen terhubung (4-neighbour) dengan union-find di atas run horizontal"""
+    labels = np.zeros(mask.shape, dtype=np.int32)
+    if not mask.any():
+        return labels, 0
+
+    # Run horizontal per baris: tepi naik/turun dari mask yang dipad
+    padded = np.pad(mask.astype(np.int8), ((0, 0), (1, 1)))
+    edges = np.diff(padded, axis=1)
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)  # urutan row-major sama dengan start
+    n_runs = len(start_rows)
+
+    parent = list(range(n_runs))
+
+    def find(run):
+        while parent[run] != run:
+            parent[run] = parent[parent[run]]
+            run = parent[run]
+        return run
+
+    # Hubungkan run yang bertumpuk kolomnya pada baris berurutan
+    row_starts = np.searchsorted(start_rows, np.arange(mask.shape[0] + 1))
+    for row in range(mask.shape[0] - 1):
+        upper = range(row_starts[row], row_starts[row + 1])
+        lower = range(row_starts[row + 1], row_starts[row + 2])
+        if not len(upper) or not len(lower):
+            continue
+        i, j = upper.start, lower.start
+        while i < upper.stop and j < lower.stop:
+            if start_cols[i] < end_cols[j] and start_cols[j] < end_cols[i]:
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parent[root_j] = root_i
+            if end_cols[i] < end_cols[j]:
+                i += 1
+            else:
+                j += 1
+
+    roots = np.array([find(run) for run in range(n_runs)])
+    _, run_labels = np.unique(roots, return_inverse=True)
+    run_labels = run_labels + 1
+    for run in range(n_runs):
+        labels[start_rows[run], start_cols[run]:end_cols[run]] = run_labels[run]
+    return labels, int(run_labels.max())
+
+def detect_tables(grid: SheetGrid, max_gap: int = TABLE_GAP_COLUMNS) -> list:
+    """Deteksi tabel dengan labelling komponen terhubung pada mask sel terisi
+
+    Setiap komponen dipecah menjadi rentang baris berurutan dengan >2 sel terisi;
+    hasilnya (first_row, last_row, first_col, last_col) urut dari atas lalu dari kiri.
+    """
+    labels, n_components = _label_components(_bridge_gaps(grid.mask, max_gap))
+
+    tables = []
+    for component in range(1, n_components + 1):
+        rows, cols = np.nonzero(labels == component)
+        top, bottom = rows.min(), rows.max() + 1
+        left, right = cols.min(), cols.max() + 1
+
+        # Hanya sel asli (bukan celah yang dijembatani) milik komponen ini
+        cells = (labels[top:bottom, left:right] == component) & grid.mask[top:bottom, left:right]
+        table_rows = cells.sum(axis=1) > 2
+
+        # Tepi naik/turun dari mask baris menandai awal dan akhir setiap tabel
+        edges = np.diff(np.concatenate(([0], table_rows.astype(np.int8), [0])))
+        for first, last in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1):
+            band_cols = np.flatnonzero(cells[first:last + 1].any(axis=0))
+            tables.append((
+                int(top + first), int(top + last),
+                int(left + band_cols[0]), int(left + band_cols[-1]),
+            ))
+
+    tables.sort(key=lambda table: (table[0], table[2]))
+    return tables
+
+def _convert_units(unit_texts):
+    """Konversi teks satuan ke DS-I; setiap satuan unik hanya dikonversi sekali"""
+    return map_units(lambda unit: d_si(unit.replace(".", "")), unit_texts)
+
+def numeric_columns(grid: SheetGrid, first_row: int, last_row: int, first_col: int, last_col: int) -> list:
+    """Kolom dalam bounding box tabel yang memiliki data numerik"""
+    band = grid.numeric[first_row:last_row + 1, first_col:last_col + 1]
+    return (np.flatnonzero(band.any(axis=0)) + first_col).tolist()
+
+def extract_table(grid: SheetGrid, first_row: int, last_row: int, first_col: int, last_col: int,
+                  numeric_cols: list = None, unit_cols: list = None) -> list:
+    """Ekstrak kolom numerik (beserta satuan di kolom sebelahnya) dari satu tabel sebagai ResultColumn
+
+    numeric_cols/unit_cols dari template lab menggantikan pencarian kolom numerik di dalam blok.
+    """
+    width = grid.shape[1]
+    numeric = grid.numeric[first_row:last_row + 1]
+    if numeric_cols is None:
+        numeric_cols = numeric_columns(grid, first_row, last_row, first_col, last_col)
+    if unit_cols is None:
+        unit_cols = [col + 1 for col in numeric_cols]
+
+    extracted_data = []
+
+    # Hanya kolom yang memiliki data numerik
+    for col, unit_col in zip(numeric_cols, unit_cols):
+        if col < width:
+            rows = np.flatnonzero(numeric[:, col]) + first_row
+            numbers = grid.normalized[rows, col].tolist()
+        else:
+            rows, numbers = np.array([], dtype=np.intp), []
+
+        # Ambil satuan dari kolom sebelah
+        if unit_col < width:
+            units = _convert_units(grid.texts[rows, unit_col])
+        else:
+            units = _convert_units(np.full(len(rows), "", dtype=object))
+
+        extracted_data.append(ResultColumn.from_texts(numbers, units))
+
+    return extracted_data
+
+def extract_blocks(excel_path: str, sheet_name: str, blocks: list) -> list:
+    """Ekstrak tabel dari blok tetap template lab, tanpa deteksi tabel
+
+    blocks: (first_row, last_row, first_col, last_col, kolom angka|None, kolom satuan|None), 0-based.
+    Sheet hanya dibaca pada rentang baris dan kolom yang dipakai blok.
+    """
+    if not blocks:
+        return []
+    first_cols, last_cols = [], []
+    for _, _, block_first_col, block_last_col, numeric_cols, unit_cols in blocks:
+        cols = list(numeric_cols or []) + list(unit_cols or [])
+        first_cols.append(min([block_first_col] + cols))
+        last_cols.append(max([block_last_col + 1] + cols))
+    first_row, first_col, last_col = min(block[0] for block in blocks), min(first_cols), max(last_cols)
+    # Grid dipotong di sel terisi terakhir; bagian blok di luar grid berarti kosong
+    grid = load_sheet_grid(
+        excel_path, sheet_name,
+        max_row=max(block[1] for block in blocks) + 1,
+        max_col=last_col + 1,
+        min_row=first_row + 1,
+        min_col=first_col + 1,
+    )
+    return [extract_table(grid, *_shift_block(block, first_row, first_col)) for block in blocks]
+
+def _shift_block(block, row_offset: int, col_offset: int):
+    """Koordinat blok relatif terhadap grid yang dimulai di (row_offset, col_offset)"""
+    first_row, last_row, first_col, last_col, numeric_cols, unit_cols = block
+    return (
+        first_row - row_offset, last_row - row_offset, first_col - col_offset, last_col - col_offset,
+        None if numeric_cols is None else [col - col_offset for col in numeric_cols],
+        None if unit_cols is None else [col - col_offset for col in unit_cols],
+    )
+
+def _extract_grid_tables(grid: SheetGrid, n_tables: int) -> list:
+    return [extract_table(grid, *bounds) for bounds in detect_tables(grid)[:n_tables]]
+
+def extract_sheet_tables(excel_path: str, sheet_name: str, n_tables: int) -> list:
+    """Deteksi dan ekstrak n_tables tabel pertama satu sheet (worker untuk ProcessPoolExecutor)"""
+    return _extract_grid_tables(load_sheet_grid(excel_path, sheet_name), n_tables)
+
+def _process_pool() -> ProcessPoolExecutor:
+    """Pool proses bersama untuk ekstraksi paralel, dibuat sekali lalu dipakai ulang
+
+    Memakai spawn: fork dari thread worker FastAPI bisa mewarisi lock yang sedang dipegang thread lain.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=min(PARALLEL_MAX_WORKERS, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def extract_workbook_tables(excel_path: str, table_counts: dict) -> dict:
+    """Ekstrak tabel banyak sheet sekaligus: {nama sheet: jumlah tabel} -> {nama sheet: list tabel}"""
+    sheet_names = list(table_counts)
+    if len(sheet_names) > 1 and os.path.getsize(excel_path) > PARALLEL_WORKBOOK_BYTES:
+        # Parsing XML sheet terikat CPU, jadi workbook besar dibagi per sheet ke beberapa proses
+        pool = _process_pool()
+        try:
+            futures = {
+                name: pool.submit(extract_sheet_tables, excel_path, name, table_counts[name])
+                for name in sheet_names
+            }
+            return {name: future.result() for name, future in futures.items()}
+        except BrokenProcessPool:
+            # Proses worker mati (mis. kehabisan memori): pool dibuang, sheet dibaca di proses ini
+            _discard_pool(pool)
+
+    # Satu kali buka workbook; grid tiap sheet dilepas setelah tabelnya diekstrak
+    counts = {name.lower(): count for name, count in table_counts.items()}
+    extracted = {}
+    for name, grid in load_workbook_grids(excel_path, sheet_names):
+        extracted.setdefault(name.lower(), _extract_grid_tables(grid, counts[name.lower()]))
+
+    missing = [name for name in sheet_names if name.lower() not in extracted]
+    if missing:
+        raise FileNotFoundError(f"Sheet '{missing[0]}' tidak ditemukan")
+    return {name: extracted[name.lower()] for name in sheet_names}
+
+# ---------------------------------------------------------------------------
+# Mode streaming untuk sheet sangat besar
+# ---------------------------------------------------------------------------
+
+class ColumnBuffer:
+    """Buffer nilai satu kolom; lewat COLUMN_BUFFER_SIZE nilai dipindah ke file sementara
+
+    Iterasi mengembalikan generator, jadi isi kolom tidak pernah dimuat utuh ke memori.
+    """
+
+    def __init__(self, max_in_memory: int = None):
+        self.max_in_memory = max_in_memory or COLUMN_BUFFER_SIZE
+        self._values = []
+        self._spill = None
+        self._length = 0
+
+    def append(self, value: str):
+        self._values.append(value)
+        self._length += 1
+        if len(self._values) >= self.max_in_memory:
+            self._flush()
+
+    def _flush(self):
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+        # Nilai berupa angka/satuan DS-I, tidak pernah mengandung newline
+        self._spill.write("\n".join(self._values) + "\n")
+        self._values = []
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        if self._spill is not None:
+            self._spill.seek(0)
+            for line in self._spill:
+                yield line[:-1]
+            self._spill.seek(0, 2)
+        yield from self._values
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+class SheetMasks:
+    """Mask sel terisi dan numerik tanpa teks sel (hasil scan streaming)"""
+
+    def __init__(self, mask, numeric):
+        self.mask = mask
+        self.numeric = numeric
+
+    @property
+    def shape(self):
+        return self.mask.shape
+
+def _exceeds_streaming_size(sheet) -> bool:
+    size = workbook_meta.dimension_size(sheet["dimension"])
+    if size:
+        return size[0] > STREAMING_ROW_THRESHOLD
+    # Tanpa <dimension> (misal file hasil writer streaming), pakai ukuran XML sheet
+    return (sheet["size"] or 0) > STREAMING_PART_BYTES
+
+def is_large_sheet(excel_path: str, sheet_name: str) -> bool:
+    """Cek dari metadata zip (tanpa membaca sel) apakah sheet perlu dibaca secara streaming
+
+    Sheet dengan formula tanpa cached value tetap lewat jalur grid: mode streaming membaca
+    data_only=True, jadi sel formulanya akan terbaca kosong tanpa evaluator.
+    """
+    # Mode streaming hanya untuk .xlsx; CSV/ODS selalu dibaca utuh
+    if tabular_reader.file_kind(excel_path) != "xlsx":
+        return False
+    try:
+        sheets = workbook_meta.read_workbook_metadata(excel_path)
+    except ValueError:
+        return False
+
+    for sheet in sheets:
+        if sheet["name"].lower() != sheet_name.lower():
+            continue
+        if not _exceeds_streaming_size(sheet):
+            return False
+        # Import di sini: table_cache mengimpor modul ini
+        from api.table_cache import file_digest
+        return sheet_name.lower() not in formula_eval.sheets_without_cached_values(excel_path, file_digest(excel_path))
+    return False
+
+def _iter_row_texts(ws, max_row=None):
+    """Teks tampilan per baris, satu baris setiap kali"""
+    for row in ws.iter_rows(max_row=max_row):
+        texts = format_values([cell.value for cell in row], [cell.number_format for cell in row])
+        yield [text.strip() for text in texts]
+
+def _rows_to_array(rows):
+    array = np.zeros((len(rows), max((len(row) for row in rows), default=0)), dtype=bool)
+    for idx, row in enumerate(rows):
+        array[idx, :len(row)] = row
+    return array
+
+def _stack_blocks(blocks, width):
+    """Gabungkan blok mask (lebar berbeda-beda) menjadi satu array"""
+    if not blocks:
+        return np.zeros((0, width), dtype=bool)
+    return np.vstack([np.pad(block, ((0, 0), (0, width - block.shape[1]))) for block in blocks])
+
+def scan_sheet(excel_path: str, sheet_name: str) -> SheetMasks:
+    """Pass pertama streaming: hanya mask sel terisi/numerik yang disimpan"""
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        ws = _find_sheet(wb, sheet_name)
+        mask_blocks, numeric_blocks = [], []
+        block_mask, block_numeric = [], []
+        width = 0
+        last_filled_row = -1
+
+        for row_idx, texts in enumerate(_iter_row_texts(ws)):
+            filled = [text != "" for text in texts]
+            if any(filled):
+                last_filled_row = row_idx
+                width = max(width, max(i for i, flag in enumerate(filled) if flag) + 1)
+            block_mask.append(filled)
+            block_numeric.append([flag and _normalize_number(text) is not None
+                                  for flag, text in zip(filled, texts)])
+
+            if len(block_mask) == _MASK_BLOCK_ROWS:
+                mask_blocks.append(_rows_to_array(block_mask))
+                numeric_blocks.append(_rows_to_array(block_numeric))
+                block_mask, block_numeric = [], []
+
+        if block_mask:
+            mask_blocks.append(_rows_to_array(block_mask))
+            numeric_blocks.append(_rows_to_array(block_numeric))
+    finally:
+        wb.close()
+
+    # Potong ke used range seperti pada load_sheet_grid
+    n_rows = last_filled_row + 1
+    mask = _stack_blocks(mask_blocks, max([block.shape[1] for block in mask_blocks] + [width]))
+    numeric = _stack_blocks(numeric_blocks, mask.shape[1])
+    return SheetMasks(mask[:n_rows, :width], numeric[:n_rows, :width])
+
+def stream_tables(excel_path: str, sheet_name: str, tables: list, numeric_cols: list) -> list:
+    """Pass kedua streaming: isi ColumnBuffer untuk setiap kolom numerik setiap tabel
+
+    `tables` berisi (first_row, last_row, first_col, last_col) dan `numeric_cols` daftar kolom
+    numerik per tabel. Hasilnya list StreamedColumn per tabel (urutan sama dengan extract_table).
+    """
+    buffers = [[(ColumnBuffer(), ColumnBuffer()) for _ in cols] for cols in numeric_cols]
+    extracted = [[StreamedColumn(numbers, units) for numbers, units in table] for table in buffers]
+    if not tables:
+        return extracted
+
+    units_cache = {}
+    max_row = max(table[1] for table in tables) + 1
+
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        ws = _find_sheet(wb, sheet_name)
+        for row_idx, texts in enumerate(_iter_row_texts(ws, max_row=max_row)):
+            for table_idx, (first_row, last_row, _, _) in enumerate(tables):
+                if not first_row <= row_idx <= last_row:
+                    continue
+                for (numbers, units), col in zip(buffers[table_idx], numeric_cols[table_idx]):
+                    value = _normalize_number(texts[col]) if col < len(texts) and texts[col] else None
+                    if value is None:
+                        continue
+                    unit = texts[col + 1] if col + 1 < len(texts) else ""
+                    if unit not in units_cache:
+                        units_cache[unit] = d_si(unit.replace(".", ""))
+                    numbers.append(value)
+                    units.append(units_cache[unit])
+    finally:
+        wb.close()
+
+    return extracted
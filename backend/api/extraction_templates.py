@@ -0,0 +1,96 @@
+"""Template ekstraksi per lab: named range / blok sel tetap untuk setiap tabel hasil"""
+import json
+import os
+import re
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from api import schemas, workbook_meta
+
+# Satu file JSON per template
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'extraction_templates')
+
+class TemplateError(ValueError):
+    """Template tidak bisa dipakai untuk workbook ini (named range tidak ada, range tidak valid)"""
+
+def _template_path(template_id: str) -> str:
+    # Id dipakai sebagai nama file, jadi hanya karakter aman yang diterima
+    if not re.fullmatch(schemas.TEMPLATE_ID_PATTERN, template_id or ""):
+        raise FileNotFoundError(f"Template '{template_id}' tidak ditemukan")
+    return os.path.join(TEMPLATE_DIR, f"{template_id}.json")
+
+def list_templates(lab: str = None) -> list:
+    if not os.path.isdir(TEMPLATE_DIR):
+        return []
+    templates = []
+    for name in sorted(os.listdir(TEMPLATE_DIR)):
+        if name.endswith(".json"):
+            template = get_template(name[:-len(".json")])
+            if lab is None or template.lab == lab:
+                templates.append(template)
+    return templates
+
+def get_template(template_id: str) -> schemas.ExtractionTemplate:
+    path = _template_path(template_id)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Template '{template_id}' tidak ditemukan")
+    with open(path, encoding="utf-8") as f:
+        return schemas.ExtractionTemplate.model_validate(json.load(f))
+
+def save_template(template: schemas.ExtractionTemplate):
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    path = _template_path(template.id)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(template.model_dump(), f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def delete_template(template_id: str):
+    path = _template_path(template_id)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Template '{template_id}' tidak ditemukan")
+    os.remove(path)
+
+def _named_range(names: list, name: str, sheet_name: str) -> str:
+    """Ref defined name; nama lokal sheet didahulukan dari nama global"""
+    candidates = [entry for entry in names if entry["name"].lower() == name.lower()]
+    candidates.sort(key=lambda entry: entry["sheet"] is None)
+    for entry in candidates:
+        if entry["sheet"] is not None and entry["sheet"].lower() != sheet_name.lower():
+            continue
+        sheet, ref = workbook_meta.split_ref(entry["ref"])
+        if sheet and sheet.lower() != sheet_name.lower():
+            raise TemplateError(f"Named range '{name}' points to sheet '{sheet}', not '{sheet_name}'")
+        return ref
+    raise TemplateError(f"Named range '{name}' tidak ditemukan")
+
+def _column_indexes(letters):
+    if letters is None:
+        return None
+    try:
+        return [column_index_from_string(letter.strip().upper()) - 1 for letter in letters]
+    except ValueError as e:
+        raise TemplateError(str(e))
+
+def resolve_blocks(template: schemas.ExtractionTemplate, excel_path: str, sheet_name: str) -> list:
+    """Blok setiap tabel (0-based): (first_row, last_row, first_col, last_col, kolom angka, kolom satuan)"""
+    names = None
+    blocks = []
+    for table in template.tables:
+        if table.cells:
+            ref = table.cells
+        else:
+            if names is None:
+                names = workbook_meta.defined_names(excel_path)
+            ref = _named_range(names, table.named_range, sheet_name)
+
+        try:
+            min_col, min_row, max_col, max_row = range_boundaries(ref.replace("$", ""))
+        except (ValueError, TypeError):
+            raise TemplateError(f"Invalid cell range '{ref}'")
+        if None in (min_col, min_row, max_col, max_row):
+            raise TemplateError(f"Cell range '{ref}' must be a bounded block such as A16:N27")
+
+        blocks.append((
+            min_row - 1, max_row - 1, min_col - 1, max_col - 1,
+            _column_indexes(table.value_columns), _column_indexes(table.unit_columns),
+        ))
+    return blocks
@@ -0,0 +1,602 @@
+"""Evaluasi formula lokal untuk workbook yang disimpan tanpa cached value (tanpa Excel/COM)"""
+import logging
+import math
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+import openpyxl
+from openpyxl.formula.tokenizer import Tokenizer, Token
+from openpyxl.utils.cell import range_boundaries
+from api import tabular_reader, workbook_meta
+
+# Jumlah workbook (per hash isi) yang hasil evaluasinya disimpan di memori
+MEMO_MAX_WORKBOOKS = 8
+
+# <f>...</f> atau <f .../> yang langsung ditutup </c> (atau diikuti <v> kosong), artinya sel formula tanpa cached value
+_FORMULA_WITHOUT_VALUE = re.compile(
+    rb'<(?:\w+:)?f\b(?:[^>]*/>|[^>]*>[^<]*</(?:\w+:)?f>)\s*'
+    rb'(?:<(?:\w+:)?v\s*/>|<(?:\w+:)?v>\s*</(?:\w+:)?v>)?\s*</(?:\w+:)?c>'
+)
+_CHUNK_SIZE = 64 * 1024
+_CHUNK_OVERLAP = 8 * 1024
+
+_lock = threading.Lock()
+_memo = OrderedDict()  # sha256 workbook -> {"values": {(sheet, row, col): nilai}, "formulas": {sheet: {...}}}
+_missing_values = {}  # sha256 workbook -> set nama sheet (lowercase) tanpa cached value
+
+class FormulaError(Exception):
+    """Formula memakai sintaks/fungsi yang tidak didukung evaluator lokal"""
+
+class ExcelError(str):
+    """Nilai error Excel (#DIV/0!, #VALUE!, ...) yang ikut merambat seperti di Excel"""
+
+class Formula(str):
+    """Teks formula sel (dibedakan dari konstanta teks biasa)"""
+
+DIV0 = ExcelError("#DIV/0!")
+VALUE = ExcelError("#VALUE!")
+REF = ExcelError("#REF!")
+NUM = ExcelError("#NUM!")
+
+# ---------------------------------------------------------------------------
+# Parser: token openpyxl -> AST (tuple)
+# ---------------------------------------------------------------------------
+
+_COMPARISON = ("=", "<>", "<", ">", "<=", ">=")
+
+class _Parser:
+    """Recursive descent dengan prioritas operator Excel (unary minus lebih kuat dari ^)"""
+
+    def __init__(self, formula: str):
+        self.tokens = [token for token in Tokenizer(formula).items if token.type != Token.WSPACE]
+        self.pos = 0
+
+    def parse(self):
+        node = self._comparison()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"Unexpected token {self.tokens[self.pos].value!r}")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _infix(self, operators):
+        token = self._peek()
+        if token is not None and token.type == Token.OP_IN and token.value in operators:
+            self.pos += 1
+            return token.value
+        return None
+
+    def _binary(self, operand, operators):
+        node = operand()
+        while True:
+            op = self._infix(operators)
+            if op is None:
+                return node
+            node = ("op", op, node, operand())
+
+    def _comparison(self):
+        return self._binary(self._concat, _COMPARISON)
+
+    def _concat(self):
+        return self._binary(self._additive, ("&",))
+
+    def _additive(self):
+        return self._binary(self._term, ("+", "-"))
+
+    def _term(self):
+        return self._binary(self._power, ("*", "/"))
+
+    def _power(self):
+        return self._binary(self._unary, ("^",))
+
+    def _unary(self):
+        token = self._peek()
+        if token is not None and token.type == Token.OP_PRE:
+            self.pos += 1
+            operand = self._unary()
+            return ("neg", operand) if token.value == "-" else ("pos", operand)
+        return self._postfix()
+
+    def _postfix(self):
+        node = self._primary()
+        while (token := self._peek()) is not None and token.type == Token.OP_POST and token.value == "%":
+            self.pos += 1
+            node = ("pct", node)
+        return node
+
+    def _primary(self):
+        token = self._peek()
+        if token is None:
+            raise FormulaError("Unexpected end of formula")
+        self.pos += 1
+
+        if token.type == Token.OPERAND:
+            if token.subtype == Token.NUMBER:
+                return ("const", float(token.value))
+            if token.subtype == Token.TEXT:
+                return ("const", token.value[1:-1].replace('""', '"'))
+            if token.subtype == Token.LOGICAL:
+                return ("const", token.value.upper() == "TRUE")
+            if token.subtype == Token.ERROR:
+                return ("const", ExcelError(token.value))
+            return _parse_reference(token.value)
+
+        if token.type == Token.PAREN and token.subtype == Token.OPEN:
+            node = self._comparison()
+            self._expect(Token.PAREN)
+            return node
+
+        if token.type == Token.FUNC and token.subtype == Token.OPEN:
+            name = token.value[:-1].upper()
+            if name.startswith("_XLFN."):
+                name = name[len("_XLFN."):]
+            args = []
+            closing = self._peek()
+            if closing is not None and closing.type == Token.FUNC and closing.subtype == Token.CLOSE:
+                self.pos += 1
+                return ("func", name, args)
+            while True:
+                args.append(self._comparison())
+                token = self._peek()
+                if token is not None and token.type == Token.SEP and token.subtype == Token.ARG:
+                    self.pos += 1
+                    continue
+                self._expect(Token.FUNC)
+                return ("func", name, args)
+
+        raise FormulaError(f"Unsupported token {token.value!r}")
+
+    def _expect(self, token_type):
+        token = self._peek()
+        if token is None or token.type != token_type or token.subtype != Token.CLOSE:
+            raise FormulaError("Unbalanced parentheses")
+        self.pos += 1
+
+def _parse_reference(ref: str):
+    """'A1', '$A$1:B3', 'Sheet!A1', "'My Sheet'!A:A" -> ("ref", sheet|None, area)"""
+    sheet = None
+    if "!" in ref:
+        sheet, _, ref = ref.rpartition("!")
+        if sheet.startswith("'") and sheet.endswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(ref.replace("$", ""))
+    except (ValueError, TypeError):
+        # Nama range (defined name) belum didukung
+        raise FormulaError(f"Unsupported reference {ref!r}")
+    return ("ref", sheet, (min_row, min_col, max_row, max_col))
+
+@lru_cache(maxsize=4096)
+def parse_formula(formula: str):
+    """AST formula (dicache per teks formula)"""
+    return _Parser(formula).parse()
+
+def _references(node, refs):
+    """Kumpulkan semua node referensi di AST"""
+    kind = node[0]
+    if kind == "ref":
+        refs.append(node)
+    elif kind == "op":
+        _references(node[2], refs)
+        _references(node[3], refs)
+    elif kind in ("neg", "pos", "pct"):
+        _references(node[1], refs)
+    elif kind == "func":
+        for arg in node[2]:
+            _references(arg, refs)
+    return refs
+
+# ---------------------------------------------------------------------------
+# Nilai dan fungsi
+# ---------------------------------------------------------------------------
+
+def _to_number(value):
+    """Koersi skalar seperti operator aritmetika Excel"""
+    if isinstance(value, ExcelError):
+        return value
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return VALUE
+
+def _to_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _arithmetic(op, left, right):
+    left, right = _to_number(left), _to_number(right)
+    for operand in (left, right):
+        if isinstance(operand, ExcelError):
+            return operand
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if op == "/":
+        return DIV0 if right == 0 else left / right
+    try:
+        result = left ** right
+    except (OverflowError, ZeroDivisionError):
+        return NUM
+    return NUM if isinstance(result, complex) else float(result)
+
+def _compare(op, left, right):
+    for operand in (left, right):
+        if isinstance(operand, ExcelError):
+            return operand
+    # Sel kosong dibandingkan sebagai 0 atau "" sesuai tipe lawannya
+    if left is None:
+        left = "" if isinstance(right, str) else 0.0
+    if right is None:
+        right = "" if isinstance(left, str) else 0.0
+    # Urutan tipe Excel: angka < teks < logika
+    rank = lambda value: 2 if isinstance(value, bool) else 1 if isinstance(value, str) else 0
+    if rank(left) != rank(right):
+        left, right = rank(left), rank(right)
+    elif isinstance(left, str):
+        left, right = left.lower(), right.lower()
+    return {
+        "=": left == right, "<>": left != right,
+        "<": left < right, ">": left > right,
+        "<=": left <= right, ">=": left >= right,
+    }[op]
+
+def _numbers(args):
+    """Angka dari argumen fungsi statistik: range hanya angka, skalar dikoersi"""
+    numbers = []
+    for is_range, value in args:
+        if is_range:
+            for item in value:
+                if isinstance(item, ExcelError):
+                    return item
+                if isinstance(item, (int, float)) and not isinstance(item, bool):
+                    numbers.append(float(item))
+        else:
+            number = _to_number(value)
+            if isinstance(number, ExcelError):
+                return number
+            numbers.append(number)
+    return numbers
+
+def _scalar_args(args, count):
+    if len(args) != count:
+        raise FormulaError(f"Expected {count} argument(s)")
+    values = []
+    for is_range, value in args:
+        if is_range:
+            if len(value) != 1:
+                return None, VALUE
+            value = value[0]
+        values.append(_to_number(value))
+    for value in values:
+        if isinstance(value, ExcelError):
+            return None, value
+    return values, None
+
+def _round(x, digits):
+    """ROUND Excel: setengah dibulatkan menjauhi nol"""
+    exponent = Decimal(1).scaleb(-int(digits))
+    return float(Decimal(repr(x)).quantize(exponent, rounding=ROUND_HALF_UP))
+
+def _stdev(numbers, population=False):
+    n = len(numbers)
+    if n < (1 if population else 2):
+        return DIV0
+    mean = math.fsum(numbers) / n
+    variance = math.fsum((x - mean) ** 2 for x in numbers) / (n if population else n - 1)
+    return math.sqrt(variance)
+
+def _call(name, args):
+    if name in ("SUM", "AVERAGE", "MIN", "MAX", "COUNT", "STDEV", "STDEV.S", "STDEVP", "STDEV.P"):
+        numbers = _numbers(args)
+        if isinstance(numbers, ExcelError):
+            return numbers
+        if name == "SUM":
+            return math.fsum(numbers)
+        if name == "COUNT":
+            return float(len(numbers))
+        if name == "AVERAGE":
+            return math.fsum(numbers) / len(numbers) if numbers else DIV0
+        if name in ("MIN", "MAX"):
+            return (min if name == "MIN" else max)(numbers) if numbers else 0.0
+        return _stdev(numbers, population=name in ("STDEVP", "STDEV.P"))
+
+    if name in ("SQRT", "ABS"):
+        values, error = _scalar_args(args, 1)
+        if error:
+            return error
+        if name == "ABS":
+            return abs(values[0])
+        return NUM if values[0] < 0 else math.sqrt(values[0])
+
+    if name in ("ROUND", "POWER"):
+        values, error = _scalar_args(args, 2)
+        if error:
+            return error
+        if name == "POWER":
+            return _arithmetic("^", *values)
+        return _round(*values)
+
+    if name == "PI" and not args:
+        return math.pi
+
+    raise FormulaError(f"Unsupported function {name}")
+
+# ---------------------------------------------------------------------------
+# Evaluasi workbook
+# ---------------------------------------------------------------------------
+
+class WorkbookEvaluator:
+    """Evaluasi sel formula satu workbook; sel dibaca per sheet saat pertama dibutuhkan"""
+
+    def __init__(self, excel_path: str, memo: dict, missing_sheets: set):
+        self.excel_path = excel_path
+        # Memo bersama per hash workbook, jadi pembacaan berikutnya tidak perlu membuka ulang formula
+        self.values = memo["values"]  # (sheet, row, col) -> nilai
+        self._formulas = memo["formulas"]  # sheet -> {(row, col): formula}
+        self.missing_sheets = missing_sheets
+        self._wb = None
+        self._sheet_titles = None
+        self._cells = {}  # sheet -> {(row, col): konstanta atau teks formula}
+
+    def needs_evaluation(self, sheet: str) -> bool:
+        return sheet.lower() in self.missing_sheets
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.close()
+            self._wb = None
+
+    def _workbook(self):
+        if self._wb is None:
+            self._wb = openpyxl.load_workbook(self.excel_path, read_only=True, data_only=False)
+            self._sheet_titles = {name.lower(): name for name in self._wb.sheetnames}
+        return self._wb
+
+    def sheet_title(self, name: str):
+        self._workbook()
+        return self._sheet_titles.get(name.lower())
+
+    def sheet_cells(self, sheet: str) -> dict:
+        """Isi sel (konstanta atau formula) sebuah sheet, dibaca sekali"""
+        if sheet not in self._cells:
+            cells = {}
+            for row in self._workbook()[sheet].iter_rows():
+                for cell in row:
+                    value = cell.value
+                    if value is None:
+                        continue
+                    if cell.data_type == "f":
+                        # ArrayFormula menyimpan teks formula di .text
+                        value = Formula(getattr(value, "text", value))
+                    cells[(cell.row, cell.column)] = value
+            self._cells[sheet] = cells
+        return self._cells[sheet]
+
+    def formula_cells(self, sheet: str) -> dict:
+        if sheet not in self._formulas:
+            self._formulas[sheet] = {
+                position: value for position, value in self.sheet_cells(sheet).items()
+                if isinstance(value, Formula)
+            }
+        return self._formulas[sheet]
+
+    def _area_cells(self, sheet, area):
+        """Posisi sel terisi di dalam area (tanpa menjelajah seluruh kolom A:A)"""
+        min_row, min_col, max_row, max_col = area
+        cells = self.sheet_cells(sheet)
+        if min_row and max_row and (max_row - min_row + 1) * (max_col - min_col + 1) <= len(cells):
+            return [
+                (row, col)
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if (row, col) in cells
+            ]
+        return sorted(
+            (row, col) for row, col in cells
+            if (not min_row or min_row <= row <= max_row) and (not min_col or min_col <= col <= max_col)
+        )
+
+    def _resolve_sheet(self, sheet, ref_sheet):
+        if ref_sheet is None:
+            return sheet
+        return self.sheet_title(ref_sheet)
+
+    def _dependencies(self, key):
+        sheet, row, col = key
+        value = self.sheet_cells(sheet).get((row, col))
+        if not isinstance(value, Formula):
+            return []
+        try:
+            refs = _references(parse_formula(value), [])
+        except FormulaError:
+            return []
+
+        dependencies = []
+        for _, ref_sheet, area in refs:
+            target = self._resolve_sheet(sheet, ref_sheet)
+            if target is None:
+                continue
+            cells = self.sheet_cells(target)
+            dependencies.extend(
+                (target, r, c) for r, c in self._area_cells(target, area)
+                if isinstance(cells[(r, c)], Formula)
+            )
+        return dependencies
+
+    def evaluate(self, sheet: str, positions) -> dict:
+        """Nilai sel formula pada positions (row, col); dependensi dievaluasi lebih dulu (urutan topologis)"""
+        targets = [(sheet, row, col) for row, col in positions]
+        visiting = set()
+        stack = [(key, False) for key in reversed(targets)]
+
+        # DFS iteratif supaya rantai formula panjang (A2=A1+1, ...) tidak kena batas rekursi
+        while stack:
+            key, expanded = stack.pop()
+            if key in self.values:
+                continue
+            if expanded:
+                visiting.discard(key)
+                self.values[key] = self._compute(key)
+                continue
+            if key in visiting:
+                # Referensi melingkar
+                self.values[key] = REF
+                continue
+            visiting.add(key)
+            stack.append((key, True))
+            stack.extend((dependency, False) for dependency in self._dependencies(key))
+
+        return {(row, col): self.values[(sheet, row, col)] for _, row, col in targets}
+
+    def _compute(self, key):
+        sheet, row, col = key
+        value = self.sheet_cells(sheet).get((row, col))
+        if not isinstance(value, Formula):
+            return value
+        try:
+            result = self._eval(parse_formula(value), sheet)
+        except FormulaError as e:
+            logging.warning(f"Formula {sheet}!{openpyxl.utils.get_column_letter(col)}{row} not evaluated: {e}")
+            return None
+        if isinstance(result, list):
+            # Referensi area sebagai hasil sel: hanya satu sel yang valid
+            result = result[0] if len(result) == 1 else VALUE
+        if isinstance(result, float) and not math.isfinite(result):
+            return NUM
+        return result
+
+    def _cell_value(self, sheet, position):
+        value = self.sheet_cells(sheet).get(position)
+        if isinstance(value, Formula):
+            return self.values.get((sheet,) + position)
+        return value
+
+    def _range_values(self, node, sheet):
+        _, ref_sheet, area = node
+        target = self._resolve_sheet(sheet, ref_sheet)
+        if target is None:
+            return None
+        return [self._cell_value(target, position) for position in self._area_cells(target, area)]
+
+    def _eval(self, node, sheet):
+        kind = node[0]
+        if kind == "const":
+            return node[1]
+        if kind == "ref":
+            _, ref_sheet, (min_row, min_col, max_row, max_col) = node
+            target = self._resolve_sheet(sheet, ref_sheet)
+            if target is None:
+                return REF
+            if min_row == max_row and min_col == max_col and min_row:
+                return self._cell_value(target, (min_row, min_col))
+            return VALUE
+        if kind == "neg":
+            value = _to_number(self._eval(node[1], sheet))
+            return value if isinstance(value, ExcelError) else -value
+        if kind == "pos":
+            return self._eval(node[1], sheet)
+        if kind == "pct":
+            value = _to_number(self._eval(node[1], sheet))
+            return value if isinstance(value, ExcelError) else value / 100
+        if kind == "op":
+            op, left, right = node[1], self._eval(node[2], sheet), self._eval(node[3], sheet)
+            if op == "&":
+                for operand in (left, right):
+                    if isinstance(operand, ExcelError):
+                        return operand
+                return _to_text(left) + _to_text(right)
+            if op in _COMPARISON:
+                return _compare(op, left, right)
+            return _arithmetic(op, left, right)
+
+        # Fungsi: referensi diperlakukan sebagai range (sel kosong/teks diabaikan)
+        args = []
+        for arg in node[2]:
+            if arg[0] == "ref":
+                values = self._range_values(arg, sheet)
+                if values is None:
+                    return REF
+                args.append((True, values))
+            else:
+                args.append((False, self._eval(arg, sheet)))
+        return _call(node[1], args)
+
+def _sheet_parts(excel_path: str) -> dict:
+    return {
+        sheet["name"].lower(): sheet["part"]
+        for sheet in workbook_meta.read_workbook_metadata(excel_path)
+        if sheet["part"]
+    }
+
+def _part_missing_values(zf, part: str) -> bool:
+    """True jika part sheet punya sel formula tanpa <v> (cached value)"""
+    try:
+        f = zf.open(part)
+    except KeyError:
+        return False
+    tail = b""
+    with f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                return False
+            # Ekor chunk sebelumnya disertakan supaya elemen yang terpotong tetap cocok
+            data = tail + chunk
+            if _FORMULA_WITHOUT_VALUE.search(data):
+                return True
+            tail = data[-_CHUNK_OVERLAP:]
+
+def sheets_without_cached_values(excel_path: str, digest: str) -> set:
+    """Nama sheet (lowercase) yang berisi formula tanpa cached value; dicache per hash workbook"""
+    with _lock:
+        if digest in _missing_values:
+            return _missing_values[digest]
+
+    missing = set()
+    if tabular_reader.file_kind(excel_path) == "xlsx":
+        parts = _sheet_parts(excel_path)
+        with zipfile.ZipFile(excel_path) as zf:
+            missing = {name for name, part in parts.items() if _part_missing_values(zf, part)}
+
+    with _lock:
+        _missing_values[digest] = missing
+        while len(_missing_values) > MEMO_MAX_WORKBOOKS * 4:
+            _missing_values.pop(next(iter(_missing_values)))
+    return missing
+
+def _workbook_memo(digest: str) -> dict:
+    with _lock:
+        memo = _memo.setdefault(digest, {"values": {}, "formulas": {}})
+        _memo.move_to_end(digest)
+        while len(_memo) > MEMO_MAX_WORKBOOKS:
+            _memo.popitem(last=False)
+    return memo
+
+def workbook_evaluator(excel_path: str):
+    """WorkbookEvaluator jika ada sheet dengan formula tanpa cached value, selain itu None"""
+    # Import di sini: table_cache mengimpor excel_reader, yang mengimpor modul ini
+    from api.table_cache import file_digest
+
+    digest = file_digest(excel_path)
+    missing = sheets_without_cached_values(excel_path, digest)
+    if not missing:
+        return None
+    return WorkbookEvaluator(excel_path, _workbook_memo(digest), missing)
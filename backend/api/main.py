@@ -1,7 +1,8 @@
 import logging
-from fastapi import FastAPI, Depends, HTTPException, File, Header, UploadFile, Body, status, Request, Response
+from fastapi import FastAPI, Depends, HTTPException, File, Header, UploadFile, Body, status, Request, Response, BackgroundTasks
 from sqlalchemy.orm import Session
 from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
@@ -13,13 +14,18 @@ import os
 import shutil
 import logging
 import shutil
-import pandas as pd
 import base64
 import mimetypes
 import jwt
 from sqlalchemy import inspect
 from api.database import engine
 from .converter import convert_xml_to_excel
+from . import excel_index, table_cache, tabular_reader, workbook_meta
+from .table_validation import TableValidationError
+from .result_table import close_tables
+from .xml_writer import stream_xml
+from .extraction_templates import TemplateError
+from . import extraction_templates
 from .models import DCC, DCCStatusEnum
 from starlette.background import BackgroundTask
 from pikepdf import Pdf, Name, String
@@ -195,6 +201,8 @@ inspector = inspect(engine)
 tables = inspector.get_table_names()
 if 'dcc' in tables:
     print("Tabel 'dcc' ditemukan.")
+    # Database lama belum punya kolom yang ditambahkan ke model
+    database.add_missing_columns(engine)
 else:
     print("Tabel 'dcc' tidak ditemukan.")
 
@@ -370,6 +378,44 @@ async def health_check():
 
 # The rest of your endpoints remain the same...
 # CREATE DCC
+def _attach_uploaded_image(image, label: str):
+    file_path = crud.uploaded_file_path(image.gambar)
+    logging.info(f"Check {label} image file {image.gambar}, in upload folder: {file_path is not None}")
+
+    if file_path:
+        image.base64 = None
+        image.gambar_url = str(file_path)
+        image.fileName = image.gambar
+    elif image.base64:
+        logging.info(f"{label.capitalize()} image {image.gambar} is not in the upload folder, keeping its base64")
+    else:
+        raise crud.AttachmentNotFoundError(f"{label.capitalize()} image {image.gambar} not found")
+
+def attach_uploaded_files(dcc: schemas.DCCFormCreate):
+    """Tentukan sumber gambar metode/pernyataan dan lampiran komentar
+
+    File di folder upload disimpan sebagai referensi nama (base64 dikosongkan) dan di-encode
+    per potongan oleh generate_xml. File di luar folder upload memakai base64 dari form, yang
+    ikut tersimpan di DB. AttachmentNotFoundError jika keduanya tidak ada.
+    """
+    for method in dcc.methods:
+        if method.has_image and method.image and method.image.gambar:
+            _attach_uploaded_image(method.image, "method")
+
+    for statement in dcc.statements:
+        if statement.has_image and statement.image and statement.image.gambar:
+            _attach_uploaded_image(statement.image, "statement")
+
+    if dcc.comment and dcc.comment.files:
+        for file in dcc.comment.files:
+            if not file.fileName:
+                continue
+            if crud.uploaded_file_path(file.fileName):
+                file.base64 = None
+                file.mimeType = mimetypes.guess_type(file.fileName)[0] or "application/octet-stream"
+            elif not file.base64:
+                raise crud.AttachmentNotFoundError(f"Comment file {file.fileName} not found")
+
 @app.post("/create-dcc/")
 async def create_dcc(
     dcc: schemas.DCCFormCreate = Body(...),
@@ -378,56 +424,7 @@ async def create_dcc(
     try:
         logging.info("Received DCC JSON data")
 
-        for method in dcc.methods:
-            if method.has_image and method.image and method.image.gambar:
-                filename = method.image.gambar
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                logging.info(f"Check method image file at: {file_path}, exists: {os.path.exists(file_path)}")
-
-                if os.path.exists(file_path):
-                    mime_type = method.image.mimeType if hasattr(method.image, 'mimeType') else ""
-                    with open(file_path, "rb") as img_file:
-                        image_data = img_file.read()
-                        base64_str = base64.b64encode(image_data).decode('utf-8')
-
-                        method.image.base64 = base64_str
-                        method.image.gambar_url = file_path
-                        method.image.fileName = filename
-                        method.image.mimeType = mime_type
-                else:
-                    logging.warning(f"Method image file {filename} not found")
-
-        for statement in dcc.statements:
-            if statement.has_image and statement.image and statement.image.gambar:
-                filename = statement.image.gambar
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                logging.info(f"Check statement image file at: {file_path}, exists: {os.path.exists(file_path)}")
-
-                if os.path.exists(file_path):
-                    mime_type = statement.image.mimeType if hasattr(statement.image, 'mimeType') else ""
-                    with open(file_path, "rb") as img_file:
-                        image_data = img_file.read()
-                        base64_str = base64.b64encode(image_data).decode('utf-8')
-
-                        statement.image.fileName = filename
-                        statement.image.mimeType = mime_type
-                        statement.image.base64 = base64_str
-                        statement.image.gambar_url = file_path
-                else:
-                    logging.warning(f"Statement image file {filename} not found")
-                             
-        if dcc.comment and dcc.comment.files:
-            for file in dcc.comment.files:
-                if file.fileName:
-                    file_path = os.path.join(UPLOAD_DIR, file.fileName)
-                    if os.path.exists(file_path):
-                        with open(file_path, "rb") as f:
-                            base64_str = base64.b64encode(f.read()).decode('utf-8')
-                        file.base64 = base64_str
-                        file.mimeType = mimetypes.guess_type(file.fileName)[0] or "application/octet-stream"
-                        file.fileName = file.fileName
-                    else:
-                        logging.warning(f"Comment file {file.fileName} not found")
+        attach_uploaded_files(dcc)
 
         result = crud.create_dcc(db=db, dcc=dcc)
         logging.info(f"DCC Created Successfully: {result}")
@@ -445,10 +442,84 @@ async def create_dcc(
         else:
             raise HTTPException(status_code=500, detail="PDF generation failed")
             
+    except (TableValidationError, TemplateError) as e:
+        logging.warning(f"DCC rejected, workbook data does not match results: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except FileNotFoundError as e:
+        logging.error(f"Error occurred while creating DCC: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logging.error(f"Error occurred while creating DCC: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@app.post("/create-dcc-batch/")
+async def create_dcc_batch(
+    request: Request,
+    dccs: list[schemas.DCCFormCreate] = Body(...),
+    db: Session = Depends(get_db),
+):
+    """Banyak sertifikat sekaligus (misalnya satu sheet per sertifikat dari workbook yang sama)"""
+    language = get_language_from_request(request)
+    try:
+        logging.info(f"Received DCC batch with {len(dccs)} certificate(s)")
+        for dcc in dccs:
+            attach_uploaded_files(dcc)
+
+        loop = asyncio.get_event_loop()
+        results = await loop.run_in_executor(None, crud.create_dcc_batch, db, dccs, language)
+
+        return {
+            "certificates": [
+                {
+                    "certificate_name": result["certificate_name"],
+                    "database_id": result["database_id"],
+                    "download_url": f"/download-dcc-pdf/{result['database_id']}",
+                }
+                for result in results
+            ]
+        }
+
+    except (TableValidationError, TemplateError) as e:
+        logging.warning(f"DCC batch rejected, workbook data does not match results: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except FileNotFoundError as e:
+        logging.error(f"Error occurred while creating DCC batch: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error occurred while creating DCC batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@app.post("/generate-dcc-xml/")
+async def generate_dcc_xml(dcc: schemas.DCCFormCreate = Body(...)):
+    """XML DCC dari form tanpa menyimpan sertifikat; dikirim ke client per potongan selama dibuat"""
+    try:
+        attach_uploaded_files(dcc)
+        loop = asyncio.get_running_loop()
+        table_data = await loop.run_in_executor(None, crud.read_validated_tables, dcc)
+    except (TableValidationError, TemplateError) as e:
+        logging.warning(f"DCC XML rejected, workbook data does not match results: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except FileNotFoundError as e:
+        logging.error(f"Error occurred while generating DCC XML: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error occurred while generating DCC XML: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    def produce(write):
+        # Dijalankan di thread executor; berhenti lewat StreamClosed jika client putus
+        try:
+            crud.generate_xml(dcc, table_data, write)
+        finally:
+            close_tables(table_data)
+
+    filename = f"{dcc.administrative_data.sertifikat}.xml"
+    return StreamingResponse(
+        stream_xml(produce),
+        media_type="application/xml",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
 #IMPORTER
 def cleanup_file(path: str):
     """Hapus file setelah dikirim"""
@@ -570,8 +641,13 @@ async def upload_xml(xml_file: UploadFile = File(...)):
 
 # EXCEL FILE 
 @app.post("/upload-excel/")
-async def upload_excel(excel: UploadFile = File(...)):
+async def upload_excel(background_tasks: BackgroundTasks, excel: UploadFile = File(...)):
     try:
+        if not tabular_reader.is_supported(excel.filename):
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported file type for {excel.filename}; save it as .xlsx, .xlsm, .ods, .csv or .tsv",
+            )
         file_location = os.path.join(UPLOAD_DIR, excel.filename)
         if os.path.exists(file_location):
             logging.warning(f"File {excel.filename} already exists, it will be overwritten.")
@@ -581,16 +657,78 @@ async def upload_excel(excel: UploadFile = File(...)):
             shutil.copyfileobj(excel.file, buffer)
         
         logging.info(f"Excel file saved to {file_location}")
+        table_cache.forget(file_location)
         
-        # Process the uploaded Excel file to get sheet names
-        excel_file = pd.ExcelFile(file_location)
-        sheet_names = excel_file.sheet_names
-        return {"filename": excel.filename, "sheets": sheet_names}
+        # Nama sheet dan dimension dibaca dari workbook.xml + tag <dimension>, tanpa membaca sel
+        sheets = workbook_meta.read_workbook_metadata(file_location)
+        sheet_names = [sheet["name"] for sheet in sheets]
+
+        # Hash per sheet, invalidasi cache sheet yang berubah dan indeks tabel dikerjakan di background
+        background_tasks.add_task(excel_index.refresh_index, file_location)
+        # Tabel langsung tersedia jika isi file ini sudah pernah diindeks (cek sha256 di luar event loop)
+        index = await run_in_threadpool(excel_index.load_index, file_location)
+
+        return {
+            "filename": excel.filename,
+            "sheets": sheet_names,
+            "dimensions": {sheet["name"]: sheet["dimension"] for sheet in sheets},
+            "tables": {name: sheet["tables"] for name, sheet in index["sheets"].items()} if index else None,
+        }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"File upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
+@app.get("/excel-index/{filename}")
+async def get_excel_index(filename: str):
+    """Peta tabel hasil indeks upload; 404 selama indeks belum selesai dibangun"""
+    file_location = os.path.join(UPLOAD_DIR, os.path.basename(filename))
+    if not os.path.exists(file_location):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    index = excel_index.load_index(file_location)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Workbook index is not ready yet")
+    return {"filename": filename, "sheets": index["sheets"]}
+
+# TEMPLATE EKSTRAKSI PER LAB
+@app.get("/extraction-templates")
+async def list_extraction_templates(lab: str | None = None):
+    return {"templates": [template.model_dump() for template in extraction_templates.list_templates(lab)]}
+
+@app.get("/extraction-templates/{template_id}")
+async def get_extraction_template(template_id: str):
+    try:
+        return extraction_templates.get_template(template_id).model_dump()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.put("/extraction-templates/{template_id}")
+async def save_extraction_template(
+    template_id: str,
+    template: schemas.ExtractionTemplate = Body(...),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    if template.id != template_id:
+        raise HTTPException(status_code=400, detail="Template id does not match the URL")
+    extraction_templates.save_template(template)
+    logging.info(f"Extraction template {template_id} saved by {current_user.email}")
+    return template.model_dump()
+
+@app.delete("/extraction-templates/{template_id}")
+async def delete_extraction_template(
+    template_id: str,
+    current_user: schemas.User = Depends(get_current_user),
+):
+    try:
+        extraction_templates.delete_template(template_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    logging.info(f"Extraction template {template_id} deleted by {current_user.email}")
+    return {"message": f"Template {template_id} deleted"}
+
 # IMAGE FILE
 @app.post("/upload-image/")
 async def upload_image(image: UploadFile = File(...)):
@@ -976,46 +1114,7 @@ async def generate_preview(
         logging.info("Received preview request")
         
         # Process images for preview (same as in create_dcc but for preview)
-        for method in dcc.methods:
-            if method.has_image and method.image and method.image.gambar:
-                filename = method.image.gambar
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                
-                if os.path.exists(file_path):
-                    mime_type = method.image.mimeType if hasattr(method.image, 'mimeType') else ""
-                    with open(file_path, "rb") as img_file:
-                        image_data = img_file.read()
-                        base64_str = base64.b64encode(image_data).decode('utf-8')
-
-                        method.image.base64 = base64_str
-                        method.image.fileName = filename
-                        method.image.mimeType = mime_type
-
-        for statement in dcc.statements:
-            if statement.has_image and statement.image and statement.image.gambar:
-                filename = statement.image.gambar
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                
-                if os.path.exists(file_path):
-                    mime_type = statement.image.mimeType if hasattr(statement.image, 'mimeType') else ""
-                    with open(file_path, "rb") as img_file:
-                        image_data = img_file.read()
-                        base64_str = base64.b64encode(image_data).decode('utf-8')
-
-                        statement.image.fileName = filename
-                        statement.image.mimeType = mime_type
-                        statement.image.base64 = base64_str
-
-        # Process comment files
-        if dcc.comment and dcc.comment.files:
-            for file in dcc.comment.files:
-                if file.fileName:
-                    file_path = os.path.join(UPLOAD_DIR, file.fileName)
-                    if os.path.exists(file_path):
-                        with open(file_path, "rb") as f:
-                            base64_str = base64.b64encode(f.read()).decode('utf-8')
-                        file.base64 = base64_str
-                        file.mimeType = mimetypes.guess_type(file.fileName)[0] or "application/octet-stream"
+        attach_uploaded_files(dcc)
 
         # Generate preview files
         result = crud.generate_preview_files(dcc=dcc)
@@ -1029,6 +1128,12 @@ async def generate_preview(
             "preview_id": result["preview_id"]
         }
         
+    except (TableValidationError, TemplateError) as e:
+        logging.warning(f"Preview rejected, workbook data does not match results: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except FileNotFoundError as e:
+        logging.error(f"Preview generation error: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logging.error(f"Preview generation error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Preview generation failed: {str(e)}")
@@ -1176,49 +1281,7 @@ async def create_dcc_streaming(
             await asyncio.sleep(0.1)
             
             # Process method and statement images (same as original code)
-            for method in dcc.methods:
-                if method.has_image and method.image and method.image.gambar:
-                    filename = method.image.gambar
-                    file_path = os.path.join(UPLOAD_DIR, filename)
-                    logging.info(f"Check method image file at: {file_path}, exists: {os.path.exists(file_path)}")
-
-                    if os.path.exists(file_path):
-                        mime_type = method.image.mimeType if hasattr(method.image, 'mimeType') else ""
-                        with open(file_path, "rb") as img_file:
-                            image_data = img_file.read()
-                            base64_str = base64.b64encode(image_data).decode('utf-8')
-
-                            method.image.base64 = base64_str
-                            method.image.gambar_url = file_path
-                            method.image.fileName = filename
-                            method.image.mimeType = mime_type
-            
-            for statement in dcc.statements:
-                if statement.has_image and statement.image and statement.image.gambar:
-                    filename = statement.image.gambar
-                    file_path = os.path.join(UPLOAD_DIR, filename)
-                    
-                    if os.path.exists(file_path):
-                        mime_type = statement.image.mimeType if hasattr(statement.image, 'mimeType') else ""
-                        with open(file_path, "rb") as img_file:
-                            image_data = img_file.read()
-                            base64_str = base64.b64encode(image_data).decode('utf-8')
-
-                            statement.image.fileName = filename
-                            statement.image.mimeType = mime_type
-                            statement.image.base64 = base64_str
-                            statement.image.gambar_url = file_path
-                             
-            if dcc.comment and dcc.comment.files:
-                for file in dcc.comment.files:
-                    if file.fileName:
-                        file_path = os.path.join(UPLOAD_DIR, file.fileName)
-                        if os.path.exists(file_path):
-                            with open(file_path, "rb") as f:
-                                base64_str = base64.b64encode(f.read()).decode('utf-8')
-                            file.base64 = base64_str
-                            file.mimeType = mimetypes.guess_type(file.fileName)[0] or "application/octet-stream"
-                            file.fileName = file.fileName
+            attach_uploaded_files(dcc)
             
             # Create progress callback function that puts updates in queue
             def progress_callback(progress, message_key):
@@ -33,6 +33,10 @@ class DCC(Base):
     excel = Column(String, nullable=False)  
     sheet_name = Column(String, nullable=False)
     results = Column(JSON)
+    # Opsi ekstraksi/XML yang dipakai saat sertifikat dibuat, supaya bisa dibuat ulang dengan hasil sama
+    extraction_template = Column(String, nullable=True)
+    compact_units = Column(Boolean, default=False)
+    normalize_units = Column(Boolean, default=False)
     
 class XML(Base):
     __tablename__ = "uploaded_files"
@@ -0,0 +1,347 @@
+"""Emulasi teks tampilan Excel (pengganti .Text dari COM) dari nilai mentah + number_format"""
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+# Kondisi section, contoh: [>=100] atau [<0]
+_CONDITION = re.compile(r"^(<=|>=|<>|<|>|=)\s*(-?\d+(?:\.\d+)?)$")
+# Token tanggal/waktu (di luar literal) -> tidak diemulasikan, pakai General
+_DATE_CHARS = set("yYmMdDhHsS")
+
+def format_general(value):
+    """Meniru tampilan format 'General' Excel untuk angka"""
+    if isinstance(value, int) or float(value).is_integer():
+        if abs(value) < 1e11:
+            return str(int(value))
+    text = f"{value:.10g}"
+    if "e" in text:
+        mantissa, exponent = f"{value:.5E}".split("E")
+        mantissa = mantissa.rstrip("0").rstrip(".")
+        return f"{mantissa}E{exponent[0]}{exponent[1:].zfill(2)}"
+    return text
+
+def _to_decimal(value):
+    """Excel hanya menyimpan 15 digit signifikan"""
+    return Decimal(format(value, ".15g"))
+
+def _split_sections(number_format):
+    """Pisahkan format per ';' (kecuali di dalam tanda kutip / escape)"""
+    sections, current = [], []
+    in_quote = escaped = False
+    for ch in number_format:
+        if escaped:
+            escaped = False
+        elif ch == "\\" and not in_quote:
+            escaped = True
+        elif ch == '"':
+            in_quote = not in_quote
+        elif ch == ";" and not in_quote:
+            sections.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    sections.append("".join(current))
+    return sections
+
+def _tokenize(section):
+    """Pecah satu section menjadi token (jenis, teks)"""
+    tokens = []
+    i = 0
+    while i < len(section):
+        ch = section[i]
+        if ch == '"':
+            end = section.find('"', i + 1)
+            end = len(section) if end == -1 else end
+            tokens.append(("lit", section[i + 1:end]))
+            i = end + 1
+            continue
+        if ch == "\\":
+            tokens.append(("lit", section[i + 1:i + 2]))
+            i += 2
+            continue
+        if ch == "_":
+            # Padding selebar karakter berikutnya -> satu spasi
+            tokens.append(("lit", " "))
+            i += 2
+            continue
+        if ch == "*":
+            # Karakter pengisi bergantung lebar kolom, tidak ada pada .Text tanpa Excel
+            i += 2
+            continue
+        if ch == "[":
+            end = section.find("]", i)
+            end = len(section) if end == -1 else end
+            tokens.append(("bracket", section[i + 1:end]))
+            i = end + 1
+            continue
+        if ch in "Ee" and section[i + 1:i + 2] in ("+", "-"):
+            tokens.append(("exp", section[i + 1]))
+            i += 2
+            continue
+
+        if ch in "0#?":
+            tokens.append(("digit", ch))
+        elif ch == ".":
+            tokens.append(("point", ch))
+        elif ch == ",":
+            tokens.append(("comma", ch))
+        elif ch == "%":
+            tokens.append(("percent", ch))
+        elif ch == "@":
+            tokens.append(("text", ch))
+        else:
+            tokens.append(("char", ch))
+        i += 1
+    return tokens
+
+def _group_thousands(digits):
+    head = len(digits) % 3 or 3
+    groups = [digits[:head]] + [digits[i:i + 3] for i in range(head, len(digits), 3)]
+    return ",".join(groups)
+
+class _Section:
+    """Satu section format yang sudah dikompilasi"""
+
+    def __init__(self, tokens):
+        self.condition = None
+        self.is_date = False
+        self.is_general = False
+        self.layout = []
+        self.int_ph = []
+        self.frac_ph = []
+        self.exp_ph = []
+        self.exp_sign = None
+        self.thousands = False
+        self.scale = 0
+        self.percent = 0
+        self._compile(tokens)
+
+    def _compile(self, tokens):
+        part = "int"
+        for pos, (kind, text) in enumerate(tokens):
+            if kind == "bracket":
+                match = _CONDITION.match(text)
+                if match:
+                    self.condition = (match.group(1), float(match.group(2)))
+                elif text.startswith("$"):
+                    # Simbol mata uang/locale, contoh [$€-407]
+                    self.layout.append(("lit", text[1:].split("-")[0]))
+                elif text and text[0].lower() in "hms":
+                    self.is_date = True
+                # Warna ([Red]) dan lainnya tidak memengaruhi teks
+            elif kind == "char":
+                if text in _DATE_CHARS or text == "/":
+                    self.is_date = True  # tanggal/waktu/pecahan
+                self.layout.append(("lit", text))
+            elif kind == "lit":
+                self.layout.append(("lit", text))
+            elif kind == "digit":
+                if part == "int":
+                    self.layout.append(("int", len(self.int_ph)))
+                    self.int_ph.append(text)
+                elif part == "frac":
+                    self.layout.append(("frac", len(self.frac_ph)))
+                    self.frac_ph.append(text)
+                else:
+                    self.layout.append(("exp", len(self.exp_ph)))
+                    self.exp_ph.append(text)
+            elif kind == "point":
+                if part == "int":
+                    part = "frac"
+                    self.layout.append(("point", "."))
+                else:
+                    # Titik kedua dan seterusnya ditampilkan apa adanya
+                    self.layout.append(("lit", "."))
+            elif kind == "exp":
+                part = "exp"
+                self.exp_sign = text
+                self.layout.append(("exp_sign", text))
+            elif kind == "percent":
+                self.percent += 1
+                self.layout.append(("lit", "%"))
+            elif kind == "comma":
+                self._compile_comma(tokens, pos, part)
+            elif kind == "text":
+                self.layout.append(("text", text))
+
+        stripped = "".join(text for kind, text in tokens if kind == "char")
+        if stripped.strip().lower() == "general":
+            self.is_general = True
+            self.is_date = False
+
+    def _compile_comma(self, tokens, pos, part):
+        prev_kinds = [kind for kind, _ in tokens[:pos] if kind != "comma"]
+        next_kinds = [kind for kind, _ in tokens[pos + 1:] if kind != "comma"]
+        after_digit = bool(prev_kinds) and prev_kinds[-1] == "digit"
+        if part == "int" and after_digit and next_kinds and next_kinds[0] == "digit":
+            self.thousands = True
+        elif after_digit and (not next_kinds or next_kinds[0] != "digit"):
+            # Koma di akhir placeholder: skala 1/1000
+            self.scale += 1
+        else:
+            self.layout.append(("lit", ","))
+
+    def matches(self, value):
+        op, limit = self.condition
+        return {
+            "<": value < limit, ">": value > limit, "=": value == limit,
+            "<=": value <= limit, ">=": value >= limit, "<>": value != limit,
+        }[op]
+
+    def _split_scientific(self, number):
+        """Pisahkan angka menjadi mantissa dan eksponen sesuai placeholder"""
+        n_int = max(len(self.int_ph), 1)
+        engineering = n_int > 1 and self.int_ph[0] != "0"
+        quantum = Decimal(1).scaleb(-len(self.frac_ph))
+
+        if number.is_zero():
+            return number.quantize(quantum, rounding=ROUND_HALF_UP), 0
+
+        exponent = number.adjusted()
+        exponent = exponent - exponent % n_int if engineering else exponent - (n_int - 1)
+        mantissa = number.scaleb(-exponent).quantize(quantum, rounding=ROUND_HALF_UP)
+        if mantissa.adjusted() >= n_int:
+            # Pembulatan menaikkan digit, contoh 9.999 -> 10.00
+            exponent += n_int if engineering else 1
+            mantissa = number.scaleb(-exponent).quantize(quantum, rounding=ROUND_HALF_UP)
+        return mantissa, exponent
+
+    @staticmethod
+    def _fill_slots(placeholders, digits):
+        """Isi placeholder dari kanan; sisa digit masuk placeholder pertama"""
+        slots = [""] * len(placeholders)
+        for i in range(len(placeholders) - 1, -1, -1):
+            if digits:
+                slots[i], digits = digits[-1], digits[:-1]
+            elif placeholders[i] == "0":
+                slots[i] = "0"
+            elif placeholders[i] == "?":
+                slots[i] = " "
+        if slots:
+            slots[0] = digits + slots[0]
+        return slots
+
+    def _fill_fraction(self, digits):
+        slots = list(digits.ljust(len(self.frac_ph), "0"))
+        for i in range(len(self.frac_ph) - 1, -1, -1):
+            if slots[i] != "0" or self.frac_ph[i] == "0":
+                break
+            slots[i] = "" if self.frac_ph[i] == "#" else " "
+        return slots
+
+    def render(self, value, sign=""):
+        number = _to_decimal(abs(value)).scaleb(2 * self.percent - 3 * self.scale)
+
+        exponent = 0
+        if self.exp_sign:
+            number, exponent = self._split_scientific(number)
+        else:
+            number = number.quantize(Decimal(1).scaleb(-len(self.frac_ph)), rounding=ROUND_HALF_UP)
+
+        int_digits, _, frac_digits = format(number, "f").partition(".")
+        int_digits = int_digits.lstrip("0")
+        int_slots = self._fill_slots(self.int_ph, int_digits)
+        if self.thousands and int_slots:
+            int_slots = [_group_thousands("".join(int_slots))] + [""] * (len(int_slots) - 1)
+        frac_slots = self._fill_fraction(frac_digits)
+        exp_slots = self._fill_slots(self.exp_ph, str(abs(exponent)))
+
+        parts = [sign]
+        for kind, item in self.layout:
+            if kind == "int":
+                parts.append(int_slots[item])
+            elif kind == "frac":
+                parts.append(frac_slots[item])
+            elif kind == "exp":
+                parts.append(exp_slots[item])
+            elif kind == "point":
+                if not self.int_ph:
+                    parts.append(int_digits)
+                parts.append(".")
+            elif kind == "exp_sign":
+                parts.append("E" + ("-" if exponent < 0 else "+" if item == "+" else ""))
+            elif kind == "lit":
+                parts.append(item)
+        return "".join(parts)
+
+    def render_text(self, value):
+        return "".join(value if kind == "text" else item
+                       for kind, item in self.layout if kind in ("lit", "text"))
+
+class NumberFormat:
+    """number_format Excel yang sudah dikompilasi; dipanggil dengan nilai sel"""
+
+    def __init__(self, number_format):
+        self.number_format = number_format
+        sections = [_Section(_tokenize(section)) for section in _split_sections(number_format)]
+
+        self.text_section = None
+        if len(sections) >= 4:
+            self.text_section = sections[3]
+        elif any(kind == "text" for kind, _ in sections[-1].layout):
+            # Format yang hanya punya section teks (contoh "@") menampilkan angka seperti General
+            self.text_section = sections.pop()
+        self.sections = sections[:3]
+        self.has_conditions = any(section.condition for section in self.sections)
+
+    def _pick_section(self, value):
+        """Pilih section beserta tanda minus yang perlu ditambahkan"""
+        sections = self.sections
+        if self.has_conditions:
+            # Section kedua (biasanya untuk negatif) menulis tandanya sendiri
+            chosen = next(
+                (section for section in sections
+                 if section.condition is None or section.matches(value)),
+                sections[-1],
+            )
+            own_sign = len(sections) > 1 and chosen is sections[1]
+            return chosen, "-" if value < 0 and not own_sign else ""
+
+        if len(sections) == 1 or value > 0 or (value == 0 and len(sections) == 2):
+            return sections[0], "-" if value < 0 else ""
+        if value < 0:
+            return sections[1], ""
+        return sections[2], ""
+
+    def __call__(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, str):
+            if self.text_section is not None:
+                return self.text_section.render_text(value)
+            return value
+        if not isinstance(value, (int, float)):
+            return str(value)
+        if not self.sections:
+            return format_general(value)
+
+        section, sign = self._pick_section(value)
+        if section.is_date:
+            return format_general(value)
+        if section.is_general:
+            return sign + format_general(abs(value)) if sign else format_general(value)
+        return section.render(value, sign)
+
+@lru_cache(maxsize=512)
+def compile_format(number_format):
+    """Kompilasi number_format sekali; hasilnya dipakai ulang untuk setiap sel"""
+    return NumberFormat(number_format or "General")
+
+def format_value(value, number_format=None):
+    """Teks yang terlihat di sel untuk satu nilai"""
+    return compile_format(number_format or "General")(value)
+
+def format_values(values, number_formats):
+    """Format banyak sel sekaligus; sel dikelompokkan per number_format"""
+    texts = [""] * len(values)
+    groups = {}
+    for idx, number_format in enumerate(number_formats):
+        groups.setdefault(number_format or "General", []).append(idx)
+
+    for number_format, indices in groups.items():
+        formatter = compile_format(number_format)
+        for idx in indices:
+            texts[idx] = formatter(values[idx])
+    return texts
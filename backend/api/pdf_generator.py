@@ -1,7 +1,6 @@
 import os
 import base64
 import tempfile
-import xml.etree.ElementTree as ET
 import matplotlib.pyplot as plt
 from jinja2 import Template, DebugUndefined
 from weasyprint import HTML
@@ -9,8 +8,10 @@ import logging
 from datetime import datetime
 import traceback
 from io import BytesIO
+from api import xml_backend
 from api.ds_i_utils import d_si
-from api.ds_i_utils import convert_latex_unit
+from api.ds_i_utils import convert_latex_unit, convert_latex_unit_list
+from api.result_table import invert_number_texts
 import subprocess
 import sys
 from pathlib import Path
@@ -203,27 +204,11 @@ class PDFGenerator:
                         # Flip the signs back in subcolumn data
                         for subcolumn in column.get('subcolumn', []):
                             if 'value' in subcolumn and subcolumn['value']:
-                                # Flip signs back by calling invert_number_str again
-                                subcolumn['value'] = [
-                                    self.invert_number_str(val) for val in subcolumn['value']
-                                ]
+                                # Flip signs back for the whole subcolumn at once
+                                subcolumn['value'] = invert_number_texts(subcolumn['value'])
         
         return results
 
-    def invert_number_str(self, n: str) -> str:
-        """Invert sign of a numeric string while preserving format."""
-        n = n.strip()
-        if not n:
-            return n
-        
-        # Handle explicit + sign
-        if n.startswith("+"):
-            return "-" + n[1:]
-        elif n.startswith("-"):
-            return n[1:]  # remove the minus → makes it positive
-        else:
-            return "-" + n  # add minus if positive
-
     def __del__(self):
         try:
             self.temp_dir.cleanup()
@@ -233,7 +218,7 @@ class PDFGenerator:
     def extract_data_from_xml(self, xml_content, tempat_pdf, captions=None, corrections=None):
         """Ekstrak data dari XML ke struktur Python"""
         try:
-            root = ET.fromstring(xml_content)
+            root = xml_backend.fromstring(xml_content)
 
             if captions is None:
                 captions = {'methods': {}, 'statements': {}}
@@ -527,8 +512,10 @@ class PDFGenerator:
                 subcolumn_data = []
                 for rl in quantity.findall('./si:realListXMLList', namespaces=XML_NS):
                     values = (rl.findtext('./si:valueXMLList', namespaces=XML_NS) or '').strip().split()
-                    raw_units = (rl.findtext('./si:unitXMLList', namespaces=XML_NS) or '').strip().split()
-                    units = [convert_latex_unit(u) for u in raw_units]
+                    units = convert_latex_unit_list(rl.findtext('./si:unitXMLList', namespaces=XML_NS) or '')
+                    # unitXMLList ringkas (satu satuan untuk seluruh kolom) disebar ke setiap nilai
+                    if len(units) == 1 and len(values) > 1:
+                        units = units * len(values)
     
                     subcolumn_data.append({
                         'value': values,
@@ -0,0 +1,290 @@
+"""Representasi kolom hasil pengukuran (pengganti list (numbers, units) per tabel)"""
+import logging
+import sys
+from itertools import islice
+import numpy as np
+from api.ds_i_utils import UnitError, rescale_mixed
+
+# refType kolom error/koreksi; tiap sub-kolomnya diikuti satu kolom uncertainty
+MEASUREMENT_ERROR_TYPES = ("basic_measurementError_error", "basic_measurementError_correction", "basic_measurementError")
+
+def _split_signs(texts):
+    """Pisahkan tanda depan ('-' / '+' / '') dari magnitudo teks angka"""
+    texts = np.char.strip(np.asarray(texts, dtype=str))
+    first = texts.astype("U1")
+    has_sign = (first == "-") | (first == "+")
+    signs = np.where(has_sign, first, "")
+    magnitudes = np.where(has_sign, np.char.lstrip(texts, "+-"), texts)
+    return signs, magnitudes
+
+def _flip_signs(signs, magnitudes):
+    """Sama seperti membalik tanda setiap teks: '-x' -> 'x', 'x' / '+x' -> '-x'"""
+    return np.where(magnitudes == "", "", np.where(signs == "-", "", "-"))
+
+def invert_number_texts(texts) -> list:
+    """Balik tanda banyak teks angka sekaligus dengan format tetap dipertahankan"""
+    texts = list(texts)
+    if not texts:
+        return []
+    signs, magnitudes = _split_signs(texts)
+    return np.char.add(_flip_signs(signs, magnitudes), magnitudes).tolist()
+
+def joined_chunks(items, chunk_size=4096):
+    """Potongan " ".join(items).strip() tanpa membentuk string utuh
+
+    Potongan pertama hanya kosong jika seluruh hasilnya kosong (sesuai asis_stream writer XML).
+    """
+    items = iter(items)
+    separator = ""
+    pending = ""
+    emitted = False
+    while True:
+        batch = list(islice(items, chunk_size))
+        if not batch:
+            break
+        piece = pending + separator + " ".join(batch)
+        separator = " "
+        if not emitted:
+            piece = piece.lstrip()
+        # Spasi di ujung ditahan; dibuang jika ternyata ujung seluruh teks
+        stripped = piece.rstrip()
+        pending = piece[len(stripped):]
+        if stripped:
+            emitted = True
+            yield stripped
+    if not emitted:
+        yield ""
+
+class ResultColumn:
+    """Satu sub-kolom: teks angka asli (tanda + magnitudo), nilai float64, dan satuan ter-intern"""
+
+    __slots__ = ("signs", "magnitudes", "values", "unit_names", "unit_codes")
+
+    def __init__(self, signs, magnitudes, values, unit_names, unit_codes):
+        self.signs = signs
+        self.magnitudes = magnitudes
+        self.values = values
+        self.unit_names = unit_names  # satuan unik kolom ini, masing-masing disimpan sekali
+        self.unit_codes = unit_codes  # indeks ke unit_names per baris
+
+    @classmethod
+    def from_texts(cls, numbers, units):
+        """Bangun kolom dari teks angka (sudah dinormalisasi) dan satuan per baris"""
+        numbers = list(numbers)
+        if not numbers:
+            empty = np.array([], dtype=str)
+            return cls(empty, empty, np.array([], dtype=np.float64), (), np.array([], dtype=np.uint32))
+
+        signs, magnitudes = _split_signs(numbers)
+        try:
+            values = magnitudes.astype(np.float64)
+        except ValueError:
+            # Bentuk yang hanya diterima float() Python, contoh '1_000'
+            values = np.array([float(magnitude) for magnitude in magnitudes.tolist()])
+        values[signs == "-"] *= -1
+
+        unit_names, unit_codes = np.unique(np.asarray(list(units), dtype=object), return_inverse=True)
+        return cls(
+            signs, magnitudes, values,
+            tuple(sys.intern(str(unit)) for unit in unit_names),
+            unit_codes.astype(np.uint32),
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def texts(self) -> list:
+        """Teks angka seperti tampil di Excel"""
+        return np.char.add(self.signs, self.magnitudes).tolist()
+
+    def units(self) -> list:
+        return [self.unit_names[code] for code in self.unit_codes.tolist()]
+
+    def joined_values(self) -> str:
+        return " ".join(self.texts()).strip()
+
+    def joined_units(self, compact=False) -> str:
+        """Satuan per nilai; compact=True menulis satu satuan saja jika seluruh kolom sama"""
+        if compact and len(self.unit_names) == 1:
+            return self.unit_names[0].strip()
+        return " ".join(self.units()).strip()
+
+    def value_chunks(self):
+        yield self.joined_values()
+
+    def unit_chunks(self, compact=False):
+        yield self.joined_units(compact)
+
+    def close(self):
+        pass
+
+    def negated(self):
+        """Kolom baru dengan tanda dibalik (untuk kolom koreksi)"""
+        return ResultColumn(
+            _flip_signs(self.signs, self.magnitudes), self.magnitudes, -self.values,
+            self.unit_names, self.unit_codes,
+        )
+
+    def normalized(self, difference=False):
+        """Kolom baru dengan prefix campuran diseragamkan ke satuan terbanyak (contoh mV dan V -> V)
+
+        Teks baris yang sudah bersatuan target tidak diubah; UnitError jika ada satuan yang tidak kompatibel.
+        """
+        if len(self.unit_names) < 2:
+            return self
+        target = self.unit_names[int(np.bincount(self.unit_codes).argmax())]
+        return self.rescaled(self.units(), target, difference)
+
+    def rescaled(self, row_units, target, difference=False):
+        """Kolom baru dengan nilai tiap baris dikonversi dari row_units ke target
+
+        Dipakai juga untuk kolom uncertainty, yang dibaca dalam satuan kolom nilai di depannya.
+        """
+        row_units = list(row_units)
+        values = rescale_mixed(self.values, row_units, target, difference)
+
+        converted = np.asarray(row_units, dtype=object) != target
+        signs, magnitudes = _split_signs([format(value, ".15g") for value in values.tolist()])
+        codes = np.zeros(len(values), dtype=np.uint32)
+        return ResultColumn(
+            np.where(converted, signs, self.signs), np.where(converted, magnitudes, self.magnitudes),
+            np.where(converted, values, self.values), (target,), codes,
+        )
+
+class StreamedColumn:
+    """Sub-kolom dari mode streaming; isi dibaca ulang dari ColumnBuffer saat ditulis"""
+
+    __slots__ = ("numbers", "unit_buffer", "negate")
+
+    # Jumlah teks yang dibalik tandanya per batch
+    _CHUNK = 4096
+
+    def __init__(self, numbers, unit_buffer, negate=False):
+        self.numbers = numbers
+        self.unit_buffer = unit_buffer
+        self.negate = negate
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def texts(self):
+        """Generator teks angka (tanda dibalik per batch jika negate)"""
+        if not self.negate:
+            yield from self.numbers
+            return
+        chunk = []
+        for number in self.numbers:
+            chunk.append(number)
+            if len(chunk) == self._CHUNK:
+                yield from invert_number_texts(chunk)
+                chunk = []
+        yield from invert_number_texts(chunk)
+
+    def units(self):
+        return iter(self.unit_buffer)
+
+    def value_chunks(self):
+        """Isi si:valueXMLList per potongan, dibaca ulang dari buffer"""
+        return joined_chunks(self.texts(), self._CHUNK)
+
+    def unit_chunks(self, compact=False):
+        """Isi si:unitXMLList per potongan; compact=True satu satuan jika seluruh kolom sama"""
+        if compact:
+            distinct = set()
+            for unit in self.units():
+                distinct.add(unit)
+                if len(distinct) > 1:
+                    break
+            if len(distinct) == 1:
+                return iter([distinct.pop().strip()])
+        return joined_chunks(self.units(), self._CHUNK)
+
+    def close(self):
+        """Tutup file sementara ColumnBuffer (dipakai bersama kolom hasil negated())"""
+        self.numbers.close()
+        self.unit_buffer.close()
+
+    def negated(self):
+        return StreamedColumn(self.numbers, self.unit_buffer, not self.negate)
+
+class ResultTable:
+    """Satu tabel hasil: kolom-kolom numerik berurutan beserta konfigurasi results-nya"""
+
+    __slots__ = ("name", "columns", "config")
+
+    def __init__(self, name, columns, config=None):
+        self.name = name
+        self.columns = columns
+        self.config = config
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __getitem__(self, idx):
+        return self.columns[idx]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def close(self):
+        for column in self.columns:
+            column.close()
+
+def _column_roles(config) -> list:
+    """Per sub-kolom: 'value', 'error' (error/koreksi) atau 'uncertainty', sama urutannya dengan generate_xml"""
+    roles = []
+    for col_config in config.columns if config is not None else []:
+        is_error = (col_config.refType or "") in MEASUREMENT_ERROR_TYPES
+        for _ in range(int(col_config.real_list)):
+            if is_error:
+                roles.extend(("error", "uncertainty"))
+            else:
+                roles.append("value")
+    return roles
+
+def _normalized_pair(column, uncertainty):
+    """Kolom error/koreksi dan uncertainty-nya dinormalisasi dengan faktor per baris yang sama
+
+    Uncertainty tidak punya satuan sendiri di XML (dibaca dalam satuan kolom nilai), jadi ikut
+    dikonversi dari satuan baris kolom nilai. Kolom streaming tidak bisa dikonversi.
+    """
+    normalized = column.normalized(difference=True)
+    if normalized is column:
+        return column, uncertainty
+    if not isinstance(uncertainty, ResultColumn):
+        raise UnitError("its uncertainty column cannot be rescaled")
+    return normalized, uncertainty.rescaled(column.units(), normalized.unit_names[0], difference=True)
+
+def normalize_units(table_data: dict) -> dict:
+    """Salinan table_data dengan satuan tiap kolom diseragamkan (opsi normalize_units DCC)
+
+    Kolom selisih dikonversi tanpa offset (1 °C -> 1 K), dan uncertainty ikut faktor kolom
+    nilainya. Tabel asli tidak diubah karena bisa dipakai bersama beberapa sertifikat dalam
+    satu batch; kolom streaming dibiarkan apa adanya.
+    """
+    normalized = {}
+    for table_name, table in table_data.items():
+        roles = _column_roles(table.config)
+        columns = list(table.columns)
+        idx = 0
+        while idx < len(columns):
+            role = roles[idx] if idx < len(roles) else "value"
+            paired = role == "error" and idx + 1 < len(columns)
+            column = columns[idx]
+            if isinstance(column, ResultColumn):
+                try:
+                    if paired:
+                        columns[idx], columns[idx + 1] = _normalized_pair(column, columns[idx + 1])
+                    else:
+                        columns[idx] = column.normalized(role != "value")
+                except (UnitError, ValueError) as e:
+                    # ValueError: jumlah baris uncertainty berbeda dari kolom nilainya
+                    logging.warning(f"{table_name}: column {idx + 1} keeps its units ({e})")
+            idx += 2 if paired else 1
+        normalized[table_name] = ResultTable(table.name, columns, table.config)
+    return normalized
+
+def close_tables(table_data: dict):
+    """Tutup semua ResultTable (buffer streaming) setelah XML selesai ditulis"""
+    for table in table_data.values():
+        table.close()
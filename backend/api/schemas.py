@@ -2,8 +2,10 @@ from pydantic import BaseModel, RootModel
 from typing import List, Optional, Any, Union, Dict
 from fastapi import UploadFile
 from datetime import date
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, field_validator, model_validator
 from enum import Enum
+import re
+from api.constants import kepala_lab_roles
 
 class DCCStatus(str, Enum):
     pending = "pending"
@@ -56,33 +58,33 @@ class Pelaksana(BaseModel):
     nama_resp: str
     nip: str
     peran: str = "Pelaksana"
-    main_signer: bool = 0
-    signature: bool = 0
-    timestamp: bool = 0
+    main_signer: bool = False
+    signature: bool = False
+    timestamp: bool = False
 
 class Penyelia(BaseModel):
     nama_resp: str
     nip: str
     peran: str = "Penyelia"
-    main_signer: bool = 0
-    signature: bool = 0
-    timestamp: bool = 0
+    main_signer: bool = False
+    signature: bool = False
+    timestamp: bool = False
 
 class KepalaLaboratorium(BaseModel):
     nama_resp: str
     nip: str
     peran: str  
-    main_signer: bool = 0
-    signature: bool = 0
-    timestamp: bool = 0
+    main_signer: bool = False
+    signature: bool = False
+    timestamp: bool = False
 
 class Direktur(BaseModel):
     nama_resp: str
     nip: str
     peran: str  
-    main_signer: bool = 1
-    signature: bool = 1
-    timestamp: bool = 1
+    main_signer: bool = True
+    signature: bool = True
+    timestamp: bool = True
 
 class ResponsiblePersons(BaseModel):
     pelaksana: List[Pelaksana]
@@ -225,6 +227,45 @@ class TokenData(BaseModel):
     username: str | None = None
     scopes: list[str] = []
 
+# TEMPLATE EKSTRAKSI (layout worksheet tetap per lab)
+TEMPLATE_ID_PATTERN = r"[A-Za-z0-9_-]{1,64}"
+
+class TemplateTable(BaseModel):
+    named_range: Optional[str] = None  # defined name di workbook, contoh "Hasil_1"
+    cells: Optional[str] = None  # blok sel tetap, contoh "A16:N27"
+    value_columns: Optional[List[str]] = None  # huruf kolom angka; default kolom numerik di blok
+    unit_columns: Optional[List[str]] = None  # default kolom di kanan setiap kolom angka
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if bool(self.named_range) == bool(self.cells):
+            raise ValueError("Set exactly one of named_range or cells")
+        if self.unit_columns is not None and (
+            self.value_columns is None or len(self.unit_columns) != len(self.value_columns)
+        ):
+            raise ValueError("unit_columns needs one entry per value_columns entry")
+        return self
+
+class ExtractionTemplate(BaseModel):
+    id: str
+    lab: str  # salah satu constants.kepala_lab_roles
+    description: Optional[str] = None
+    tables: List[TemplateTable]
+
+    @field_validator("id")
+    @classmethod
+    def check_id(cls, value):
+        if not re.fullmatch(TEMPLATE_ID_PATTERN, value):
+            raise ValueError("Template id may only contain letters, digits, '_' and '-'")
+        return value
+
+    @field_validator("lab")
+    @classmethod
+    def check_lab(cls, value):
+        if value not in kepala_lab_roles:
+            raise ValueError(f"Unknown lab: {value}")
+        return value
+
 class DCCFormCreate(BaseModel):
     status: DCCStatus = DCCStatus.pending
     software: str  # software
@@ -242,6 +283,9 @@ class DCCFormCreate(BaseModel):
     sheet_name: str
     statements: List[Statements]  # Catatan
     comment: Optional[Comment]
+    extraction_template: Optional[str] = None  # id template lab; tanpa template tabel dideteksi otomatis
+    compact_units: bool = False  # satu satuan di si:unitXMLList jika semua nilai kolom bersatuan sama
+    normalize_units: bool = False  # seragamkan prefix satuan campuran per kolom (contoh mV dan V -> V)
 
 class ExcelFileResponse(BaseModel):
     excel_file_path: str
\ No newline at end of file
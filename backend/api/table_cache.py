@@ -0,0 +1,195 @@
+"""Cache hasil parsing tabel workbook, dikunci dengan isi sheet (SHA-256 per part .xlsx)"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from api import formula_eval, tabular_reader, workbook_meta
+from api.excel_reader import PARSER_VERSION
+
+# Lokasi cache di disk dan batas ukurannya
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tables')
+MEMORY_MAX_ENTRIES = 32
+DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# _lock menjaga dict di bawah (dipakai bersama threadpool FastAPI, background task indeks dan batch);
+# _disk_lock membuat tulis, eviction dan invalidasi file cache di disk berjalan satu per satu
+_lock = threading.Lock()
+_disk_lock = threading.Lock()
+_memory = OrderedDict()  # key -> data tabel (LRU)
+_file_digests = {}  # path -> (mtime_ns, size, sha256)
+_sheet_digests = {}  # path -> (mtime_ns, size, {sheet (lowercase): digest})
+
+def file_digest(path: str) -> str:
+    """SHA-256 isi workbook; dihitung ulang hanya jika mtime/ukuran berubah"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _lock:
+        cached = _file_digests.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    digest = sha256.hexdigest()
+    with _lock:
+        _file_digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+def sheet_digests(path: str) -> dict:
+    """Digest isi per sheet (nama lowercase); dihitung ulang hanya jika mtime/ukuran berubah
+
+    .xlsx memakai digest part sheet sehingga sheet yang tidak diedit tetap cocok setelah upload ulang.
+    CSV/ODS dan sheet yang formulanya dihitung lokal (bisa merujuk sheet lain) memakai digest seluruh file.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _lock:
+        cached = _sheet_digests.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    whole_file = file_digest(path)
+    if tabular_reader.file_kind(path) == "xlsx":
+        _, sheets = workbook_meta.workbook_digests(path)
+        digests = {name.lower(): digest for name, digest in sheets.items()}
+        for name in formula_eval.sheets_without_cached_values(path, whole_file):
+            digests[name] = whole_file
+    else:
+        digests = {name.lower(): whole_file for name in workbook_meta.sheet_names(path)}
+
+    with _lock:
+        _sheet_digests[path] = (stat.st_mtime_ns, stat.st_size, digests)
+    return digests
+
+def sheet_digest(path: str, sheet_name: str) -> str:
+    return sheet_digests(path).get(sheet_name.lower()) or file_digest(path)
+
+def results_digest(results_data: list) -> str:
+    """Hash konfigurasi results (urutan dan isi)"""
+    payload = json.dumps(
+        [result.model_dump() for result in results_data],
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def make_key(excel_path: str, sheet_name: str, results_data: list, template=None) -> str:
+    """Key = digest sheet + hash (sheet, results, template); prefix digest dipakai untuk invalidasi"""
+    config = f"{PARSER_VERSION}|{sheet_name.lower()}|{results_digest(results_data)}"
+    if template is not None:
+        config += f"|{template.model_dump_json()}"
+    return f"{sheet_digest(excel_path, sheet_name)}-{hashlib.sha256(config.encode('utf-8')).hexdigest()}"
+
+def _disk_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.pkl")
+
+def _remember(key: str, data):
+    _memory[key] = data
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_MAX_ENTRIES:
+        _memory.popitem(last=False)
+
+def get(key: str):
+    """Ambil data dari memori, lalu dari disk; None jika belum ada"""
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+
+    path = _disk_path(key)
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"Table cache entry unreadable, ignoring: {e}")
+        return None
+    try:
+        os.utime(path)  # tandai baru dipakai untuk eviction
+    except FileNotFoundError:
+        pass  # baru saja di-evict thread lain; data yang sudah dibaca tetap dipakai
+
+    with _lock:
+        _remember(key, data)
+    return data
+
+def put(key: str, data):
+    """Simpan data ke memori dan disk"""
+    with _lock:
+        _remember(key, data)
+
+    try:
+        with _disk_lock:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = _disk_path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, _disk_path(key))
+            _evict_disk()
+    except Exception as e:
+        logging.warning(f"Failed to write table cache entry: {e}")
+
+def _evict_disk():
+    """Hapus entri paling lama dipakai sampai total ukuran di bawah batas; dipanggil dengan _disk_lock"""
+    entries = []
+    total = 0
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= DISK_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def forget(path: str):
+    """Lupakan digest file yang baru ditimpa; digest lama tidak boleh dipakai walaupun mtime/ukuran sama"""
+    path = os.path.abspath(path)
+    with _lock:
+        _file_digests.pop(path, None)
+        _sheet_digests.pop(path, None)
+
+def invalidate_changed(path: str, previous: dict):
+    """Dipanggil setelah workbook ditimpa: buang entri sheet yang isinya berubah
+
+    previous = sheet_digests() sebelum file ditimpa; entri sheet yang tidak berubah tetap dipakai.
+    """
+    path = os.path.abspath(path)
+    forget(path)
+    if not previous:
+        return
+
+    current = set(sheet_digests(path).values()) if os.path.exists(path) else set()
+    prefixes = tuple(f"{digest}-" for digest in set(previous.values()) - current)
+    if not prefixes:
+        return
+
+    with _lock:
+        for key in [key for key in _memory if key.startswith(prefixes)]:
+            del _memory[key]
+
+    with _disk_lock:
+        if not os.path.isdir(CACHE_DIR):
+            return
+        for name in os.listdir(CACHE_DIR):
+            if name.startswith(prefixes):
+                try:
+                    os.remove(os.path.join(CACHE_DIR, name))
+                except FileNotFoundError:
+                    pass
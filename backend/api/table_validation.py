@@ -0,0 +1,82 @@
+"""Validasi tabel hasil ekstraksi terhadap konfigurasi results sebelum DB/XML/PDF dikerjakan"""
+import numpy as np
+from api.result_table import MEASUREMENT_ERROR_TYPES, ResultColumn
+
+class TableValidationError(ValueError):
+    """Data workbook tidak cocok dengan konfigurasi results; problems berisi semua temuan"""
+
+    def __init__(self, problems: list):
+        self.problems = problems
+        super().__init__("; ".join(problems))
+
+def _has_uncertainty(ref_type: str) -> bool:
+    # Sama dengan generate_xml: kolom error/koreksi diikuti satu kolom uncertainty per sub-kolom
+    return ref_type in MEASUREMENT_ERROR_TYPES
+
+def column_layout(result_config) -> list:
+    """Urutan kolom yang dibaca generate_xml: (nama kolom, peran) untuk setiap sub-kolom"""
+    layout = []
+    for col_config in result_config.columns:
+        name = col_config.kolom.root.get("en") or next(iter(col_config.kolom.root.values()), "")
+        for _ in range(int(col_config.real_list)):
+            layout.append((name, "value"))
+            if _has_uncertainty(col_config.refType or ""):
+                layout.append((name, "uncertainty"))
+    return layout
+
+def _column_problems(table_name: str, column_name: str, column) -> list:
+    if not len(column):
+        return [f"{table_name}: column '{column_name}' has no numeric values"]
+    if not isinstance(column, ResultColumn):
+        # Kolom streaming hanya dicek jumlahnya, isinya belum dibaca
+        return []
+
+    problems = []
+    bad_rows = np.flatnonzero(~np.isfinite(column.values))
+    if bad_rows.size:
+        problems.append(
+            f"{table_name}: column '{column_name}' has {bad_rows.size} non-finite value(s), first at row {bad_rows[0] + 1}"
+        )
+
+    # Satuan harus ada di semua baris atau tidak sama sekali
+    if len(column.unit_names) > 1 and "" in column.unit_names:
+        empty_code = column.unit_names.index("")
+        missing = int(np.count_nonzero(column.unit_codes == empty_code))
+        problems.append(f"{table_name}: column '{column_name}' is missing units on {missing} of {len(column)} row(s)")
+    return problems
+
+def table_problems(table) -> list:
+    """Semua masalah pada satu ResultTable (jumlah kolom, pasangan uncertainty, nilai, satuan)"""
+    layout = column_layout(table.config)
+    columns = table.columns
+    problems = []
+
+    if len(columns) < len(layout):
+        missing = layout[len(columns):]
+        missing_uncertainty = sum(1 for _, role in missing if role == "uncertainty")
+        detail = f" ({missing_uncertainty} uncertainty)" if missing_uncertainty else ""
+        problems.append(
+            f"{table.name}: expected {len(layout)} numeric column(s) but found {len(columns)}, "
+            f"missing {len(missing)}{detail}"
+        )
+
+    lengths = np.array([len(column) for column in columns[:len(layout)]], dtype=np.int64)
+    for idx, (column_name, role) in enumerate(layout[:len(columns)]):
+        problems.extend(_column_problems(table.name, column_name, columns[idx]))
+        # Uncertainty berpasangan baris per baris dengan nilai di sebelah kirinya
+        if role == "uncertainty" and lengths[idx] != lengths[idx - 1]:
+            problems.append(
+                f"{table.name}: column '{column_name}' has {lengths[idx - 1]} value(s) "
+                f"but {lengths[idx]} uncertainty value(s)"
+            )
+    return problems
+
+def validate_tables(table_data: dict, results_data: list):
+    """Raise TableValidationError jika tabel tidak cukup atau tidak cocok dengan results"""
+    problems = []
+    if len(table_data) < len(results_data):
+        problems.append(f"expected {len(results_data)} result table(s) but found {len(table_data)} in the sheet")
+    for table in table_data.values():
+        problems.extend(table_problems(table))
+    if problems:
+        raise TableValidationError(problems)
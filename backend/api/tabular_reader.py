@@ -0,0 +1,174 @@
+"""Pembaca data hasil selain .xlsx: CSV/TSV (pandas) dan ODS (content.xml)"""
+import csv
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+import numpy as np
+import pandas as pd
+
+CSV_EXTENSIONS = (".csv", ".tsv", ".txt")
+ODS_EXTENSIONS = (".ods",)
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+# .xls (BIFF) dan .xlsb (biner) tidak bisa dibaca openpyxl
+SUPPORTED_EXTENSIONS = XLSX_EXTENSIONS + ODS_EXTENSIONS + CSV_EXTENSIONS
+
+_NS_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+_NS_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_NS_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+
+_SNIFF_BYTES = 64 * 1024
+
+def file_kind(path: str) -> str:
+    """'csv', 'ods' atau 'xlsx' berdasarkan ekstensi file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in CSV_EXTENSIONS:
+        return "csv"
+    if extension in ODS_EXTENSIONS:
+        return "ods"
+    return "xlsx"
+
+def is_supported(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in SUPPORTED_EXTENSIONS
+
+def csv_sheet_name(path: str) -> str:
+    """File CSV hanya punya satu 'sheet', dinamai sesuai nama file"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+def _detect_encoding(path: str) -> str:
+    with open(path, "rb") as f:
+        sample = f.read(_SNIFF_BYTES)
+    try:
+        sample.decode("utf-8-sig")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # Sampel bisa terpotong di tengah karakter multi-byte
+        if e.start >= len(sample) - 3:
+            return "utf-8-sig"
+        return "cp1252"
+
+def _detect_delimiter(path: str, encoding: str) -> str:
+    if path.lower().endswith(".tsv"):
+        return "\t"
+    with open(path, encoding=encoding, errors="replace", newline="") as f:
+        sample = f.read(_SNIFF_BYTES)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+def _max_fields(path: str, encoding: str, delimiter: str) -> int:
+    """Jumlah kolom maksimum (baris bisa tidak sama panjang); kelebihan kolom dipangkas nanti"""
+    with open(path, encoding=encoding, errors="replace", newline="") as f:
+        return max((line.count(delimiter) + 1 for line in f), default=1)
+
+def load_csv_texts(path: str) -> np.ndarray:
+    """Baca CSV/TSV sebagai teks (tanpa konversi tipe) ke array object baris x kolom"""
+    encoding = _detect_encoding(path)
+    delimiter = _detect_delimiter(path, encoding)
+    n_cols = _max_fields(path, encoding, delimiter)
+
+    frame = pd.read_csv(
+        path,
+        sep=delimiter,
+        header=None,
+        names=range(n_cols),
+        dtype=str,
+        keep_default_na=False,
+        skip_blank_lines=False,
+        encoding=encoding,
+        encoding_errors="replace",
+        engine="c",
+    )
+    if frame.empty:
+        return np.full((0, 0), "", dtype=object)
+    return np.char.strip(frame.to_numpy(dtype=str)).astype(object)
+
+def _paragraphs(elem):
+    """text:p di dalam elem; komentar sel (office:annotation) dilewati"""
+    for child in elem:
+        if child.tag == f"{_NS_TEXT}p":
+            yield child
+        elif child.tag != f"{_NS_OFFICE}annotation":
+            yield from _paragraphs(child)
+
+def _cell_text(cell) -> str:
+    """Teks tampilan sel ODS dari paragraf text:p (termasuk text:s untuk spasi berulang), tanpa komentar"""
+    paragraphs = []
+    for paragraph in _paragraphs(cell):
+        parts = []
+
+        def walk(elem):
+            if elem.text:
+                parts.append(elem.text)
+            for child in elem:
+                if child.tag == f"{_NS_TEXT}s":
+                    parts.append(" " * int(child.get(f"{_NS_TEXT}c", "1")))
+                elif child.tag == f"{_NS_TEXT}tab":
+                    parts.append("\t")
+                elif child.tag != f"{_NS_OFFICE}annotation":
+                    walk(child)
+                if child.tail:
+                    parts.append(child.tail)
+
+        walk(paragraph)
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs).strip()
+
+def iter_ods_tables(path: str, wanted: str = None):
+    """Generator (nama sheet, list baris teks) dari content.xml; baris/sel kosong berulang tidak diekspansi"""
+    with zipfile.ZipFile(path) as zf, zf.open("content.xml") as f:
+        name = None
+        rows, row = [], []
+        pending_rows = pending_cells = 0
+
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == f"{_NS_TABLE}table":
+                    name = elem.get(f"{_NS_TABLE}name")
+                    rows, pending_rows = [], 0
+                continue
+
+            if name is None or (wanted is not None and name.lower() != wanted.lower()):
+                if tag == f"{_NS_TABLE}table":
+                    name = None
+                if tag in (f"{_NS_TABLE}table-row", f"{_NS_TABLE}table"):
+                    elem.clear()
+                continue
+
+            if tag in (f"{_NS_TABLE}table-cell", f"{_NS_TABLE}covered-table-cell"):
+                repeat = int(elem.get(f"{_NS_TABLE}number-columns-repeated", "1"))
+                text = _cell_text(elem) if tag == f"{_NS_TABLE}table-cell" else ""
+                if text:
+                    row.extend([""] * pending_cells)
+                    row.extend([text] * repeat)
+                    pending_cells = 0
+                else:
+                    pending_cells += repeat
+                elem.clear()
+            elif tag == f"{_NS_TABLE}table-row":
+                repeat = int(elem.get(f"{_NS_TABLE}number-rows-repeated", "1"))
+                if row:
+                    rows.extend([[] for _ in range(pending_rows)])
+                    rows.extend(list(row) for _ in range(repeat))
+                    pending_rows = 0
+                else:
+                    pending_rows += repeat
+                row, pending_cells = [], 0
+                elem.clear()
+            elif tag == f"{_NS_TABLE}table":
+                yield name, rows
+                name = None
+                elem.clear()
+
+def ods_sheet_names(path: str) -> list:
+    """Nama sheet ODS tanpa membangun isi sel"""
+    names = []
+    with zipfile.ZipFile(path) as zf, zf.open("content.xml") as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{_NS_TABLE}table":
+                    names.append(elem.get(f"{_NS_TABLE}name"))
+            elif elem.tag == f"{_NS_TABLE}table-row":
+                elem.clear()
+    return names
@@ -0,0 +1,266 @@
+"""Metadata workbook (nama sheet, part, dimension) langsung dari zip tanpa membaca sel; CSV/ODS hanya nama sheet"""
+import hashlib
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from api import tabular_reader
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\b[^>]*\bref="([^"]+)"')
+_SHEET_DATA = re.compile(rb'<(?:\w+:)?sheetData\b')
+_CHUNK_SIZE = 16 * 1024
+_CELL_REF = re.compile(r"^\$?([A-Z]+)\$?(\d+)$")
+
+def _workbook_part(zf) -> str:
+    """Lokasi workbook.xml dari _rels/.rels (biasanya xl/workbook.xml)"""
+    try:
+        with zf.open("_rels/.rels") as f:
+            for rel in ET.parse(f).getroot().iter(f"{_NS_PKG_REL}Relationship"):
+                if rel.get("Type", "").endswith("/officeDocument"):
+                    return rel.get("Target").lstrip("/")
+    except KeyError:
+        pass
+    return "xl/workbook.xml"
+
+def _relationships(zf, part: str) -> dict:
+    """Map r:id -> nama part untuk relationship milik part"""
+    folder, name = posixpath.split(part)
+    rels_part = posixpath.join(folder, "_rels", f"{name}.rels")
+    try:
+        f = zf.open(rels_part)
+    except KeyError:
+        return {}
+
+    targets = {}
+    with f:
+        for rel in ET.parse(f).getroot().iter(f"{_NS_PKG_REL}Relationship"):
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            targets[rel.get("Id")] = target
+    return targets
+
+def _relationship_types(zf, part: str) -> dict:
+    """Map tipe relationship (akhiran URI, contoh 'styles') -> nama part"""
+    folder, name = posixpath.split(part)
+    try:
+        f = zf.open(posixpath.join(folder, "_rels", f"{name}.rels"))
+    except KeyError:
+        return {}
+
+    types = {}
+    with f:
+        for rel in ET.parse(f).getroot().iter(f"{_NS_PKG_REL}Relationship"):
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            types[rel.get("Type", "").rsplit("/", 1)[-1]] = target
+    return types
+
+def _sheet_entries(zf, workbook_part: str) -> list:
+    """Elemen <sheet> di workbook.xml; berhenti setelah </sheets>"""
+    entries = []
+    with zf.open(workbook_part) as f:
+        for event, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag == f"{_NS_MAIN}sheet":
+                entries.append({
+                    "name": elem.get("name"),
+                    "state": elem.get("state", "visible"),
+                    "rid": elem.get(f"{_NS_REL}id"),
+                })
+            elif elem.tag == f"{_NS_MAIN}sheets":
+                break
+    return entries
+
+def _date1904(zf, workbook_part: str) -> bool:
+    """Sistem tanggal 1904 mengubah tampilan semua sel tanggal"""
+    with zf.open(workbook_part) as f:
+        for event, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag == f"{_NS_MAIN}workbookPr":
+                return elem.get("date1904", "0") in ("1", "true")
+            if elem.tag == f"{_NS_MAIN}sheets":
+                break
+    return False
+
+def _defined_names(zf, workbook_part: str, sheet_list: list) -> list:
+    names = []
+    with zf.open(workbook_part) as f:
+        for event, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag != f"{_NS_MAIN}definedName":
+                continue
+            local_id = elem.get("localSheetId")
+            names.append({
+                "name": elem.get("name"),
+                "sheet": sheet_list[int(local_id)] if local_id is not None and int(local_id) < len(sheet_list) else None,
+                "ref": (elem.text or "").strip(),
+            })
+    return names
+
+def defined_names(excel_path: str) -> list:
+    """Defined name workbook: name, sheet (None jika global), ref (contoh "Lap!$A$16:$N$27")"""
+    if tabular_reader.file_kind(excel_path) != "xlsx":
+        return []
+    with zipfile.ZipFile(excel_path) as zf:
+        workbook_part = _workbook_part(zf)
+        sheet_list = [entry["name"] for entry in _sheet_entries(zf, workbook_part)]
+        return _defined_names(zf, workbook_part, sheet_list)
+
+def split_ref(ref: str):
+    """("Lap", "$A$16:$N$27") dari ref defined name; sheet "" jika ref tanpa nama sheet"""
+    sheet, _, cells = ref.rpartition("!")
+    if sheet.startswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    return sheet, cells
+
+def _sheet_names_text(names: list, sheet_name: str) -> str:
+    """Defined name yang bisa dipakai template untuk sheet ini (lokal sheet, atau global yang menunjuk sheet ini)"""
+    lines = []
+    for entry in names:
+        if entry["sheet"] is not None:
+            applies = entry["sheet"].lower() == sheet_name.lower()
+        else:
+            applies = split_ref(entry["ref"])[0].lower() in ("", sheet_name.lower())
+        if applies:
+            lines.append(_name_line(entry))
+    return "\n".join(sorted(lines))
+
+def _name_line(entry) -> str:
+    return f"{entry['name']}|{entry['sheet'] or ''}|{entry['ref']}"
+
+def _sheet_dimension(zf, part: str):
+    """Baca awal part sheet sampai <dimension> (selalu sebelum <sheetData>)"""
+    try:
+        f = zf.open(part)
+    except KeyError:
+        return None
+
+    head = b""
+    with f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                return None
+            # Simpan ekor chunk sebelumnya supaya tag yang terpotong tetap cocok
+            head = head[-512:] + chunk
+            match = _DIMENSION.search(head)
+            if match:
+                return match.group(1).decode("ascii")
+            if _SHEET_DATA.search(head):
+                return None
+
+def _part_size(zf, part):
+    try:
+        return zf.getinfo(part).file_size if part else None
+    except KeyError:
+        return None
+
+def read_workbook_metadata(excel_path: str) -> list:
+    """Daftar sheet berurutan: name, state, part, dimension (contoh 'A1:N40'), size"""
+    kind = tabular_reader.file_kind(excel_path)
+    if kind == "csv":
+        return [{
+            "name": tabular_reader.csv_sheet_name(excel_path), "state": "visible",
+            "part": None, "dimension": None, "size": os.path.getsize(excel_path),
+        }]
+    if kind == "ods":
+        return [
+            {"name": name, "state": "visible", "part": "content.xml", "dimension": None, "size": None}
+            for name in tabular_reader.ods_sheet_names(excel_path)
+        ]
+
+    if not zipfile.is_zipfile(excel_path):
+        raise ValueError("File is not an .xlsx workbook")
+
+    with zipfile.ZipFile(excel_path) as zf:
+        workbook_part = _workbook_part(zf)
+        targets = _relationships(zf, workbook_part)
+
+        sheets = []
+        for entry in _sheet_entries(zf, workbook_part):
+            part = targets.get(entry["rid"])
+            sheets.append({
+                "name": entry["name"],
+                "state": entry["state"],
+                "part": part,
+                "dimension": _sheet_dimension(zf, part) if part else None,
+                # Ukuran XML sheet (tanpa kompresi), perkiraan besar data jika dimension tidak ada
+                "size": _part_size(zf, part),
+            })
+    return sheets
+
+def sheet_names(excel_path: str) -> list:
+    return [sheet["name"] for sheet in read_workbook_metadata(excel_path)]
+
+def _cell_position(ref: str):
+    match = _CELL_REF.match(ref.upper())
+    if not match:
+        return None
+    col = 0
+    for ch in match.group(1):
+        col = col * 26 + ord(ch) - ord("A") + 1
+    return int(match.group(2)), col
+
+def dimension_size(dimension: str):
+    """(baris, kolom) dari ref dimension seperti 'A1:N40'; None jika tidak valid"""
+    if not dimension:
+        return None
+    start, _, end = dimension.partition(":")
+    first, last = _cell_position(start), _cell_position(end or start)
+    if not first or not last:
+        return None
+    return last[0] - first[0] + 1, last[1] - first[1] + 1
+
+def _part_digest(zf, part: str) -> str:
+    sha256 = hashlib.sha256()
+    with zf.open(part) as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def workbook_digests(excel_path: str):
+    """(SHA-256 per part, digest isi per sheet) sebuah .xlsx
+
+    Digest sheet = part XML sheet + sharedStrings + styles + sistem tanggal + defined name yang
+    berlaku untuk sheet itu, jadi sheet yang part-nya tidak berubah tetap punya digest yang sama
+    walaupun sheet lain (atau named range sheet lain) diedit. Digest workbook.xml di parts mencakup
+    sistem tanggal dan semua defined name.
+    """
+    with zipfile.ZipFile(excel_path) as zf:
+        workbook_part = _workbook_part(zf)
+        targets = _relationships(zf, workbook_part)
+        types = _relationship_types(zf, workbook_part)
+        entries = _sheet_entries(zf, workbook_part)
+
+        parts = {}
+        for part in [targets.get(entry["rid"]) for entry in entries] + [types.get("sharedStrings"), types.get("styles")]:
+            if part and part not in parts:
+                try:
+                    parts[part] = _part_digest(zf, part)
+                except KeyError:
+                    pass
+        date_system = "date1904" if _date1904(zf, workbook_part) else "date1900"
+        names = _defined_names(zf, workbook_part, [entry["name"] for entry in entries])
+
+    all_names = "\n".join(sorted(_name_line(entry) for entry in names))
+    parts[workbook_part] = hashlib.sha256(f"{date_system}\n{all_names}".encode("utf-8")).hexdigest()
+
+    shared = "|".join(
+        f"{part}={parts.get(part, '')}"
+        for part in (types.get("sharedStrings"), types.get("styles"))
+        if part
+    )
+    sheets = {}
+    for entry in entries:
+        part = targets.get(entry["rid"])
+        content = f"{shared}|{date_system}|{part}={parts.get(part, '')}|{_sheet_names_text(names, entry['name'])}"
+        sheets[entry["name"]] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return parts, sheets
@@ -0,0 +1,32 @@
+"""Backend lxml (opsional) untuk membaca XML DCC
+
+XML ditulis oleh IndentedXMLWriter (xml_writer.py); lxml hanya dipakai untuk parse.
+Jika lxml tidak terpasang HAVE_LXML False, parse()/fromstring() memakai xml.etree.ElementTree.
+"""
+import xml.etree.ElementTree as ET
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+HAVE_LXML = etree is not None
+
+def _parser():
+    # Parser lxml tidak boleh dipakai bersama antar thread; base64 lampiran bisa > 10 MB (huge_tree)
+    return etree.XMLParser(huge_tree=True, resolve_entities=False, no_network=True)
+
+def fromstring(content):
+    """Root element dari string/bytes XML, lxml jika ada"""
+    if etree is None:
+        return ET.fromstring(content)
+    if isinstance(content, str):
+        # lxml menolak str yang punya deklarasi encoding
+        content = content.encode("utf-8")
+    return etree.fromstring(content, _parser())
+
+def parse(path):
+    """Root element dari file XML, lxml jika ada"""
+    if etree is None:
+        return ET.parse(path).getroot()
+    return etree.parse(path, _parser()).getroot()
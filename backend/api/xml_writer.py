@@ -0,0 +1,367 @@
+"""Penulis XML bertahap dengan API seperti yattag Doc, hasilnya identik dengan yattag.indent()
+
+generate_xml dulu membangun seluruh dokumen di Doc lalu indent() mem-parse ulang string tersebut.
+Writer ini menerapkan aturan indent() langsung saat tag dibuka/ditutup dan menulis ke sink
+(file atau stream HTTP), jadi yang ditahan di memori hanya teks satu elemen.
+"""
+import asyncio
+import base64
+import concurrent.futures
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, suppress
+from functools import lru_cache
+from yattag import indentation
+from yattag.simpledoc import dict_to_attrs, html_escape
+
+# Output ditulis ke sink setiap sebesar ini
+FLUSH_SIZE = 64 * 1024
+
+# Lebar baris base64 (seperti MIME) dan jumlah baris yang di-encode per baca file
+BASE64_LINE_WIDTH = 76
+BASE64_CHUNK_LINES = 1024
+
+# Interval producer stream_xml mengecek apakah client sudah berhenti membaca
+STREAM_POLL_SECONDS = 0.5
+
+@lru_cache(maxsize=256)
+def _tokenize(markup: str) -> tuple:
+    # Markup asis yang sama (deklarasi, tag root) cukup di-tokenize sekali
+    return tuple(indentation.tokenize(markup))
+
+class IndentedXMLWriter:
+    """Pengganti Doc().tagtext() + indent(getvalue(), indentation=...) yang menulis ke write(str)
+
+    Sama seperti indent(): elemen yang langsung berisi teks ditulis satu baris beserta isinya,
+    teks kosong (hanya spasi) dibuang. Teks langsung setelah child tag (mixed content) tidak
+    didukung karena keputusan satu baris sudah ditulis; ValueError jika terjadi.
+    """
+
+    def __init__(self, write, indentation='   ', newline='\n', flush_size=FLUSH_SIZE):
+        self._write = write
+        self._indentation = indentation
+        self._newline = newline
+        self._flush_size = flush_size
+
+        self._out = []
+        self._out_size = 0
+
+        # State yang sama dengan yattag.indent
+        self._level = 0
+        self._sameline = 0
+        self._was_just_opened = False
+        self._tag_appeared = False
+
+        # Teks berurutan sejak markup terakhir (satu token Text di indent)
+        self._text = []
+        # Tag yang sudah dibuka tapi belum ditulis: baru bisa ditulis setelah tahu isinya teks atau bukan
+        self._pending_open = None
+        # Per elemen terbuka: [nama, berisi teks langsung (None = belum tahu)]
+        self._stack = []
+        # Token teks saat ini sudah mulai ditulis oleh asis_stream
+        self._text_started = False
+
+    # API seperti yattag.SimpleDoc
+    def tagtext(self):
+        return self, self.tag, self.text
+
+    @contextmanager
+    def tag(self, tag_name, *args, **kwargs):
+        attrs = dict(args)
+        attrs.update(('class' if key == 'klass' else key, value) for key, value in kwargs.items())
+        self._open(tag_name, "<%s %s>" % (tag_name, dict_to_attrs(attrs)) if attrs else "<%s>" % tag_name)
+        yield
+        self._close(tag_name, "</%s>" % tag_name)
+
+    def text(self, *strings):
+        for string in strings:
+            self._text.append(html_escape(string))
+
+    def asis(self, string):
+        """Markup mentah (deklarasi XML, tag root, baris base64) dipecah dengan tokenizer yattag"""
+        if "<" not in string and ">" not in string:
+            # Teks saja (contoh baris base64), tidak perlu tokenizer
+            self._text.append(string)
+            return
+        for token in _tokenize(string):
+            token_type = type(token)
+            if token_type is indentation.Text:
+                self._text.append(token.content)
+            elif token_type is indentation.OpenTag:
+                self._open(token.tag_name, token.content)
+            elif token_type is indentation.CloseTag:
+                self._close(token.tag_name, token.content)
+            else:
+                self._other(token.content)
+
+    def asis_stream(self, chunks):
+        """Teks mentah panjang (contoh base64) ditulis per potongan tanpa ditahan seluruhnya
+
+        Hasilnya sama dengan asis() untuk setiap potongan; teks di sekitarnya tetap satu token.
+        Potongan kosong/spasi di depan ditahan seperti teks biasa sampai ada potongan berisi.
+        """
+        chunks = iter(chunks)
+        for first in chunks:
+            if first.strip():
+                break
+            self._text.append(first)
+        else:
+            return
+
+        # Token teks ini tidak kosong, jadi keputusan indent() bisa diambil sekarang
+        if not self._text_started:
+            if self._pending_open is not None:
+                self._emit_open(self._pending_open, True)
+                self._pending_open = None
+                self._stack[-1][1] = True
+            elif self._stack:
+                self._mark_text(self._stack[-1])
+            if not self._sameline:
+                self._indent()
+            self._text_started = True
+            self._was_just_opened = False
+
+        self._append("".join(self._text))
+        self._text = []
+        self._append(first)
+        for chunk in chunks:
+            self._append(chunk)
+            self._flush()
+
+    def splice(self, fragment):
+        """Sisipkan StaticFragment yang sudah dirender untuk kedalaman saat ini"""
+        self._flush_text()
+        if self._sameline or self._level != fragment.level or not self._tag_appeared:
+            raise ValueError(f"Fragment rendered for level {fragment.level} cannot be used at level {self._level}")
+        if self._stack and self._stack[-1][1] is None:
+            self._stack[-1][1] = False
+        self._append(fragment.text)
+        self._was_just_opened = False
+        self._flush()
+
+    def close(self):
+        """Tulis sisa output; semua tag harus sudah ditutup"""
+        self._flush_text()
+        if self._stack:
+            raise ValueError(f"Unclosed XML tag: {self._stack[-1][0]}")
+        self._flush(force=True)
+
+    # Aturan yattag.indent
+    def _append(self, string):
+        self._out.append(string)
+        self._out_size += len(string)
+
+    def _indent(self):
+        if self._tag_appeared:
+            self._append(self._newline)
+        self._append(self._indentation * self._level)
+
+    def _emit_open(self, content, contains_text):
+        self._was_just_opened = True
+        if self._sameline:
+            self._sameline += 1
+        else:
+            self._indent()
+        if contains_text:
+            self._sameline = self._sameline or 1
+        self._append(content)
+        self._level += 1
+        self._tag_appeared = True
+
+    def _mark_text(self, entry):
+        if entry[1] is False and not self._sameline:
+            raise ValueError(f"Mixed text and child tags in <{entry[0]}> are not supported")
+        entry[1] = True
+
+    def _flush_text(self):
+        """Selesaikan token teks dan tag terbuka yang masih tertunda sebelum markup berikutnya"""
+        text = "".join(self._text)
+        self._text = []
+        if self._text_started:
+            # Sisa token yang sudah mulai ditulis asis_stream
+            self._append(text)
+            self._text_started = False
+            return
+        has_text = bool(text.strip())
+
+        if self._pending_open is not None:
+            self._emit_open(self._pending_open, has_text)
+            self._pending_open = None
+            self._stack[-1][1] = has_text
+        elif has_text and self._stack:
+            self._mark_text(self._stack[-1])
+
+        if has_text:
+            if not self._sameline:
+                self._indent()
+            self._append(text)
+            self._was_just_opened = False
+
+    def _open(self, tag_name, content):
+        self._flush_text()
+        if self._stack and self._stack[-1][1] is None:
+            self._stack[-1][1] = False
+        self._pending_open = content
+        self._stack.append([tag_name, None])
+
+    def _close(self, tag_name, content):
+        self._flush_text()
+        if not self._stack or self._stack[-1][0] != tag_name:
+            raise ValueError(f"Unexpected closing tag </{tag_name}>")
+        self._stack.pop()
+
+        self._level -= 1
+        self._tag_appeared = True
+        if self._sameline:
+            self._sameline -= 1
+        elif not self._was_just_opened:
+            self._indent()
+        self._append(content)
+        self._was_just_opened = False
+        self._flush()
+
+    def _other(self, content):
+        self._flush_text()
+        if self._stack and self._stack[-1][1] is None:
+            self._stack[-1][1] = False
+        if not self._sameline:
+            self._indent()
+        self._append(content)
+        self._was_just_opened = False
+        self._tag_appeared = True
+
+    def _flush(self, force=False):
+        if self._out and (force or self._out_size >= self._flush_size):
+            self._write("".join(self._out))
+            self._out = []
+            self._out_size = 0
+
+def iter_base64_file(path, prefix="", width=BASE64_LINE_WIDTH, chunk_lines=BASE64_CHUNK_LINES):
+    """Isi file sebagai baris base64 selebar width (diawali prefix, diakhiri newline), per potongan"""
+    line_bytes = width // 4 * 3
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(line_bytes * chunk_lines)
+            if not data:
+                break
+            encoded = base64.b64encode(data).decode("ascii")
+            yield "".join(
+                f"{prefix}{encoded[start:start + width]}\n" for start in range(0, len(encoded), width)
+            )
+
+class StaticFragment:
+    """Elemen yang isinya sama di setiap dokumen, dirender sekali untuk kedalaman level"""
+
+    __slots__ = ("text", "level")
+
+    def __init__(self, build, level: int, **kwargs):
+        out = []
+        writer = IndentedXMLWriter(out.append, **kwargs)
+        # Render seolah sudah ada tag sebelumnya di kedalaman level, sama seperti saat disisipkan
+        writer._level = level
+        writer._tag_appeared = True
+        build(*writer.tagtext())
+        writer.close()
+        self.text = "".join(out)
+        self.level = level
+
+class FragmentCache:
+    """LRU StaticFragment per key, dibatasi total ukuran teks yang dirender (byte UTF-8)
+
+    Fragment yang lebih besar dari max_entry_bytes (contoh gambar besar) tetap dikembalikan
+    tapi tidak disimpan.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8
+        self._entries = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def fragment(self, key, build, level: int) -> StaticFragment:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # Render di luar lock; request lain dengan key sama paling buruk ikut merender
+        fragment = StaticFragment(build, level)
+        size = len(fragment.text.encode("utf-8"))
+        if size <= self.max_entry_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (fragment, size)
+                    self._size += size
+                    while self._size > self.max_bytes:
+                        _, (_, evicted) = self._entries.popitem(last=False)
+                        self._size -= evicted
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._entries), "bytes": self._size}
+
+class StreamClosed(Exception):
+    """Consumer stream_xml sudah ditutup (client putus); dilempar dari write() untuk menghentikan produce"""
+
+async def stream_xml(produce, queue_size=8, poll_interval=STREAM_POLL_SECONDS):
+    """Async generator potongan XML untuk StreamingResponse dari produce(write), contoh
+    stream_xml(lambda write: generate_xml(dcc, table_data, write))
+
+    produce dijalankan di thread executor; antrian dibatasi, jadi penulis menunggu jika client lambat.
+    Jika generator ditutup sebelum selesai, write() berikutnya melempar StreamClosed sehingga thread
+    executor tidak tertahan menunggu antrian yang tidak lagi dibaca.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    done = object()
+    stopped = threading.Event()
+
+    def put(item):
+        if stopped.is_set():
+            raise StreamClosed("XML stream consumer closed")
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                return future.result(timeout=poll_interval)
+            except concurrent.futures.TimeoutError:
+                if stopped.is_set() or loop.is_closed():
+                    future.cancel()
+                    raise StreamClosed("XML stream consumer closed")
+
+    def run():
+        try:
+            produce(put)
+        except StreamClosed:
+            pass
+        finally:
+            with suppress(StreamClosed):
+                put(done)
+
+    task = loop.run_in_executor(None, run)
+    finished = False
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is done:
+                finished = True
+                break
+            yield chunk
+    finally:
+        if not finished:
+            stopped.set()
+            # Error produce setelah client putus tidak punya penerima lagi
+            task.add_done_callback(lambda future: future.cancelled() or future.exception())
+    # Lempar ulang error dari produce
+    await task
@@ -1,6 +1,7 @@
-from api.database import engine, Base
+from api.database import engine, Base, add_missing_columns
 from api import models
 
 print("Membuat tabel di database...")
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
 print("Tabel berhasil dibuat.")
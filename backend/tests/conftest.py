@@ -0,0 +1,95 @@
+import base64
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+UPLOAD_DIR = os.path.join(BACKEND_DIR, "api", "uploads")
+SAMPLE_WORKBOOK = os.path.join(UPLOAD_DIR, "8. Thermometer Readout Chub E4_sample.xlsx")
+SAMPLE_IMAGE = "strawberry.png"
+DCC_FILES_DIR = os.path.join(BACKEND_DIR, "dcc_files")
+
+@pytest.fixture(autouse=True)
+def isolated_table_cache(tmp_path, monkeypatch):
+    """Cache tabel di disk ditulis ke folder sementara per test"""
+    from api import table_cache
+    monkeypatch.setattr(table_cache, "CACHE_DIR", str(tmp_path / "tables"))
+    monkeypatch.setattr(table_cache, "_memory", OrderedDict())
+
+def _ml(id_text, en_text):
+    return {"id": id_text, "en": en_text}
+
+def make_dcc(with_images=True, n_results=3, image_from_upload=False, **overrides):
+    """Payload DCCFormCreate seperti yang dikirim frontend, memakai workbook contoh di api/uploads"""
+    import api.schemas as schemas
+
+    with open(os.path.join(UPLOAD_DIR, SAMPLE_IMAGE), "rb") as f:
+        image_base64 = base64.b64encode(f.read()).decode()
+    image = None
+    if with_images:
+        image = {
+            "caption": "Gambar", "gambar": SAMPLE_IMAGE, "fileName": SAMPLE_IMAGE, "mimeType": "image/png",
+            # Seperti attach_uploaded_files: base64 diisi dari file saat XML ditulis
+            "base64": None if image_from_upload else image_base64,
+        }
+    columns = [
+        {"kolom": _ml("Rentang", "Range"), "refType": "basic_nominalValue", "real_list": 1},
+        {"kolom": _ml("Titik Ukur", "Measurement Point"), "refType": "basic_nominalValue", "real_list": 1},
+        {"kolom": _ml("Pembacaan", "Reading"), "refType": "basic_measuredValue", "real_list": 1},
+        {"kolom": _ml("Koreksi", "Correction"), "refType": "basic_measurementError_correction", "real_list": 1},
+    ]
+    data = {
+        "software": "DCC <Gen> & co", "version": "1",
+        "Measurement_TimeLine": {"tgl_mulai": "2024-07-25", "tgl_akhir": "2024-07-26", "tgl_pengesahan": "2024-07-30"},
+        "administrative_data": {
+            "country_code": "ID", "used_languages": ["id", "en"], "mandatory_languages": ["id"],
+            "order": "ORD-1", "core_issuer": "calibrationLaboratory", "sertifikat": "CERT-1",
+            "tempat": "Lab", "tempat_pdf": "Lab SNSU",
+        },
+        "objects": [{
+            "jenis": _ml("Termometer", "Thermometer"), "merek": "Fluke", "tipe": "1529",
+            "item_issuer": "manufacturer", "seri_item": "B123", "id_lain": _ml("lain", "other"),
+        }],
+        "responsible_persons": {
+            "pelaksana": [{"nama_resp": "A", "nip": "1"}], "penyelia": [{"nama_resp": "B", "nip": "2"}],
+            "kepala": {"nama_resp": "C", "nip": "3", "peran": "Kepala Laboratorium SNSU Suhu"},
+            "direktur": {"nama_resp": "D", "nip": "4", "peran": "Direktur SNSU Termoelektrik dan Kimia"},
+        },
+        "owner": {
+            "nama_cust": "PT X", "jalan_cust": "Jl", "no_jalan_cust": "1", "kota_cust": "Kota",
+            "state_cust": "Prov", "pos_cust": "123", "negara_cust": "ID",
+        },
+        "methods": [{
+            "method_name": _ml("Metode", "Method"), "method_desc": _ml("desk", "desc"), "norm": "ISO",
+            "has_formula": True, "formula": {"latex": "a < b"}, "has_image": with_images,
+            "image": image, "refType": "other",
+        }],
+        "equipments": [{
+            "nama_alat": _ml("Alat", "Tool"), "manuf_model": _ml("m", "m"), "model": _ml("x", "x"),
+            "seri_measuring": "S1", "refType": "basic_x",
+        }],
+        "conditions": [{
+            "jenis_kondisi": "suhu", "desc": _ml("s", "t"), "tengah": "23", "rentang": "1",
+            "tengah_unit": {"unit": "°C"}, "rentang_unit": {"unit": "°C"},
+        }],
+        "results": [
+            {"parameters": _ml(f"Tabel {i}", f"Table {i}"), "columns": columns,
+             "uncertainty": {"factor": "2", "probability": "0.95", "distribution": "normal"}}
+            for i in range(n_results)
+        ],
+        "excel": os.path.basename(SAMPLE_WORKBOOK), "sheet_name": "Lap",
+        "statements": [{
+            "values": _ml("pernyataan", "statement"), "has_formula": True, "formula": {"latex": "x"},
+            "has_image": with_images, "image": image, "refType": "basic_conformity",
+        }],
+        "comment": {
+            "title": "Komentar", "desc": _ml("k", "c"), "has_file": with_images,
+            "files": [{"fileName": SAMPLE_IMAGE, "mimeType": "image/png", "base64": image_base64}] if with_images else None,
+        },
+    }
+    data.update(overrides)
+    return schemas.DCCFormCreate(**data)
@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine, inspect
+
+from api import models  # noqa: F401  (mendaftarkan tabel ke Base.metadata)
+from api.database import add_missing_columns
+
+def test_add_missing_columns_to_old_dcc_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE dcc (id INTEGER PRIMARY KEY, excel VARCHAR NOT NULL, sheet_name VARCHAR NOT NULL)")
+        conn.exec_driver_sql("INSERT INTO dcc (excel, sheet_name) VALUES ('a.xlsx', 'Lap')")
+
+    add_missing_columns(engine)
+    add_missing_columns(engine)  # kedua kali tidak mengubah apa-apa
+
+    columns = {column["name"] for column in inspect(engine).get_columns("dcc")}
+    assert {"extraction_template", "compact_units", "normalize_units", "results"} <= columns
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT extraction_template, compact_units, normalize_units FROM dcc").fetchall()
+    assert rows == [(None, None, None)]
+
+def test_create_dcc_stores_compact_units(tmp_path, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from conftest import SAMPLE_WORKBOOK, make_dcc
+    from api import crud, xml_backend
+    from api.database import Base
+
+    class PDFGenerator:
+        def generate_pdf_with_embedded_xml(self, xml_content, pdf_path, *args):
+            open(pdf_path, "wb").close()
+            return True
+
+    def get_project_paths(dcc, db_id=None):
+        base = tmp_path / f"{db_id}_{dcc.administrative_data.sertifikat}"
+        return {"word_output": base.with_suffix(".docx"), "pdf_output": base.with_suffix(".pdf"),
+                "xml_output": base.with_suffix(".xml"), "excel": SAMPLE_WORKBOOK}
+
+    monkeypatch.setattr(crud, "PDFGenerator", PDFGenerator)
+    monkeypatch.setattr(crud, "get_project_paths", get_project_paths)
+    engine = create_engine(f"sqlite:///{tmp_path / 'dcc.db'}")
+    Base.metadata.create_all(bind=engine)
+
+    with sessionmaker(bind=engine)() as db:
+        for compact_units in (True, False):
+            dcc = make_dcc(with_images=False, compact_units=compact_units)
+            result = crud.create_dcc(db, dcc, table_data=crud.read_validated_tables(dcc))
+            stored = db.get(models.DCC, result["database_id"])
+            assert stored.compact_units is compact_units
+            assert stored.normalize_units is False
+            root = xml_backend.parse(str(tmp_path / f"{result['certificate_name']}.xml"))
+            unit_lists = [e.text or "" for e in root.iter("{https://ptb.de/si}unitXMLList")]
+            # Satu satuan per kolom hanya jika compact_units
+            assert all(len(units.split()) <= 1 for units in unit_lists) is compact_units
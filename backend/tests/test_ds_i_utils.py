@@ -0,0 +1,161 @@
+import numpy as np
+import pytest
+
+from api import ds_i_utils
+from api.ds_i_utils import d_si
+
+# Keluaran d_si sebelum parser trie (termasuk input yang memang tidak dikenali)
+BASELINE = {
+    "°C": r"\degreecelsius",
+    "mV": r"\milli\volt",
+    "V/m": r"\volt\metre\tothe{-1}",
+    "m/s2": r"\metre\second\tothe{-2}",
+    "kg.m/s2": r"\kilo\gram\metre\second\tothe{-2}",
+    "N*m": r"\newton\metre",
+    "mm2": r"\milli\metre\tothe{2}",
+    "km^2": "km^2",
+    "km2": r"\kilo\metre\tothe{2}",
+    "Ω": r"\ohm",
+    "µA": r"\micro\ampere",
+    "μA": r"\micro\ampere",
+    "kΩ": r"\kilo\ohm",
+    "%": r"\percent",
+    "ppm": r"\ppm",
+    "dam": r"\deca\metre",
+    "da": "da",
+    "cd": r"\centi\day",
+    "mol": r"\mole",
+    "lx": r"\lux",
+    "h": r"\hour",
+    "min": r"\minute",
+    "s-1": "s-1",
+    "m.s-2": r"\metres-2",
+    "W/(m.K)": r"\watt(mK)",
+    "kg/m3": r"\kilo\gram\metre\tothe{-3}",
+    "L": "L",
+    "bar": r"\bar",
+    "mbar": r"\milli\bar",
+    "hPa": r"\hecto\pascal",
+    "kWh": "kWh",
+    "kibit": "kibit",
+    "°": r"\degree",
+    "rad": r"\radian",
+    "abc": "abc",
+    "": "",
+}
+
+@pytest.mark.parametrize("unit, expected", BASELINE.items())
+def test_d_si_matches_baseline(unit, expected):
+    assert d_si(unit) == expected
+
+def test_d_si_parses_each_distinct_unit_once():
+    ds_i_utils.unit_registry.to_ds_i.cache_clear()
+    for _ in range(1000):
+        for unit in ("mV", "°C", "kg/m3"):
+            d_si(unit)
+    info = ds_i_utils.unit_registry.to_ds_i.cache_info()
+    assert (info.misses, info.hits) == (3, 2997)
+
+# Simbol yang sekaligus prefix dan satuan: satu huruf dibaca sebagai satuan, prefix hanya di depan satuan lain
+@pytest.mark.parametrize("unit, expected", [
+    ("M", r"\nauticalmile"),
+    ("MM", r"\mega\nauticalmile"),
+    ("MPa", r"\mega\pascal"),
+    ("G", r"\gauss"),
+    ("mG", r"\milli\gauss"),
+    ("GHz", r"\giga\hertz"),
+    ("T", r"\tesla"),
+    ("mT", r"\milli\tesla"),
+    ("P", r"\poise"),
+    ("PP", r"\peta\poise"),
+    ("B", r"\bel"),
+    ("dB", r"\deci\bel"),
+    ("KiB", r"\kibi\byte"),
+    ("Mibit", r"\mebi\bit"),
+])
+def test_prefix_versus_unit(unit, expected):
+    assert d_si(unit) == expected
+
+@pytest.mark.parametrize("unit, text, html", [
+    ("°C", "°C", "°C"),
+    ("mV", "mV", "mV"),
+    ("km2", "km^2", "km<sup>2</sup>"),
+    ("m/s2", "ms^-2", "ms<sup>-2</sup>"),
+    ("MPa", "MPa", "MPa"),
+    ("μA", "μA", "μA"),
+    ("Ω", "Ω", "Ω"),
+    ("KiB", "KiB", "KiB"),
+    ("Mibit", "Mibit", "Mibit"),
+])
+def test_round_trip(unit, text, html):
+    ds_i = d_si(unit)
+    assert ds_i_utils.convert_unit(ds_i) == text
+    assert ds_i_utils.convert_latex_unit(ds_i) == html
+
+@pytest.mark.parametrize("unit", ["°C", "mV", "MPa", "μA", "Ω", "kΩ", "KiB", "Mibit", "mT", "dB"])
+def test_convert_unit_text_parses_back(unit):
+    assert d_si(ds_i_utils.convert_unit(d_si(unit))) == d_si(unit)
+
+def test_batch_conversion_converts_each_distinct_unit_once():
+    calls = []
+    def convert(unit):
+        calls.append(unit)
+        return unit.upper()
+
+    assert ds_i_utils.map_units(convert, r" \volt  \volt \metre ") == [r"\VOLT", r"\VOLT", r"\METRE"]
+    assert calls == [r"\volt", r"\metre"]
+    assert ds_i_utils.map_units(convert, np.array(["a", "a", "b"])) == ["A", "A", "B"]
+
+def test_batch_conversion_matches_single_conversion():
+    units = ["mV", "mV", "°C", "km2", "mV", ""]
+    ds_i = ds_i_utils.d_si_list(units)
+    assert ds_i == [d_si(unit) for unit in units]
+    xml_list = " ".join(ds_i)
+    assert ds_i_utils.convert_unit_list(xml_list) == [ds_i_utils.convert_unit(unit) for unit in xml_list.split()]
+    assert ds_i_utils.convert_latex_unit_list(ds_i) == [ds_i_utils.convert_latex_unit(unit) for unit in ds_i]
+
+def test_canonical_unit_and_compatibility():
+    assert ds_i_utils.canonical_unit(r"\milli\volt").scale == pytest.approx(1e-3)
+    assert ds_i_utils.canonical_unit(r"\milli\volt").dimensions == ds_i_utils.canonical_unit(r"\volt").dimensions
+    assert ds_i_utils.canonical_unit("abc") is None
+    assert ds_i_utils.is_compatible(r"\milli\volt", r"\volt")
+    assert ds_i_utils.is_compatible(r"\kilo\metre\tothe{2}", r"\metre\tothe{2}")
+    assert not ds_i_utils.is_compatible(r"\volt", r"\metre")
+    assert not ds_i_utils.is_compatible("abc", r"\metre")
+
+@pytest.mark.parametrize("values, from_unit, to_unit, difference, expected", [
+    ([1500, -250], r"\milli\volt", r"\volt", False, [1.5, -0.25]),
+    ([25, 0], r"\degreecelsius", r"\kelvin", False, [298.15, 273.15]),
+    # Selisih/uncertainty: titik nol tidak ikut dikonversi
+    ([1, 0.5], r"\degreecelsius", r"\kelvin", True, [1, 0.5]),
+    ([0], r"\kelvin", r"\degreecelsius", False, [-273.15]),
+    ([2], r"\kilo\metre\tothe{2}", r"\metre\tothe{2}", False, [2e6]),
+])
+def test_rescale(values, from_unit, to_unit, difference, expected):
+    assert ds_i_utils.rescale(values, from_unit, to_unit, difference).tolist() == pytest.approx(expected)
+
+def test_rescale_same_unit_returns_copy():
+    values = np.array([1.0, 2.0])
+    rescaled = ds_i_utils.rescale(values, r"\volt", r"\volt")
+    assert rescaled.tolist() == [1.0, 2.0]
+    assert rescaled is not values
+
+def test_rescale_mixed():
+    units = [r"\volt", r"\milli\volt", r"\kilo\volt", r"\milli\volt"]
+    assert ds_i_utils.rescale_mixed([1, 1500, 0.002, 10], units, r"\volt").tolist() == pytest.approx([1, 1.5, 2, 0.01])
+    with pytest.raises(ValueError, match="2 value"):
+        ds_i_utils.rescale_mixed([1, 2], units, r"\volt")
+
+@pytest.mark.parametrize("from_unit, to_unit, message", [
+    ("abc", r"\volt", "Unknown unit: abc"),
+    (r"\volt", "abc", "Unknown unit: abc"),
+    (r"\volt", r"\metre", "Incompatible units"),
+    (r"\degreecelsius", r"\metre", "Incompatible units"),
+])
+def test_unit_errors(from_unit, to_unit, message):
+    with pytest.raises(ds_i_utils.UnitError, match=message):
+        ds_i_utils.rescale([1], from_unit, to_unit)
+    with pytest.raises(ds_i_utils.UnitError, match=message):
+        ds_i_utils.rescale_mixed([1], [from_unit], to_unit)
+    # UnitError tetap ValueError untuk pemanggil lama
+    assert issubclass(ds_i_utils.UnitError, ValueError)
@@ -0,0 +1,92 @@
+import openpyxl
+import pytest
+
+from api import excel_reader
+
+@pytest.fixture
+def two_sheet_workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    for index, title in enumerate(["Suhu", "Tekanan"]):
+        ws = wb.active if index == 0 else wb.create_sheet()
+        ws.title = title
+        ws.append(["Titik", "Baca", "", "U", ""])
+        for row in range(1, 6):
+            ws.append([row * 10 * (index + 1), row + 0.25, "°C", 0.1 * row, "K"])
+    path = tmp_path / "sheets.xlsx"
+    wb.save(path)
+    return str(path)
+
+def _texts(extracted):
+    return {
+        name: [[(column.texts(), column.units()) for column in table] for table in tables]
+        for name, tables in extracted.items()
+    }
+
+def test_parallel_extraction_reuses_spawn_pool(two_sheet_workbook, monkeypatch):
+    counts = {"Suhu": 1, "Tekanan": 1}
+    sequential = _texts(excel_reader.extract_workbook_tables(two_sheet_workbook, counts))
+
+    monkeypatch.setattr(excel_reader, "PARALLEL_WORKBOOK_BYTES", 0)
+    parallel = _texts(excel_reader.extract_workbook_tables(two_sheet_workbook, counts))
+    pool = excel_reader._process_pool()
+    assert parallel == sequential
+    assert pool._mp_context.get_start_method() == "spawn"
+
+    assert _texts(excel_reader.extract_workbook_tables(two_sheet_workbook, counts)) == sequential
+    assert excel_reader._process_pool() is pool
+
+@pytest.fixture
+def offset_workbook(tmp_path):
+    # Blok D20:G23 jauh dari A1; sel formula tanpa cached value harus tetap dievaluasi
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Lap"
+    ws["A1"] = "Laporan kalibrasi"
+    ws["Z1"] = "di luar blok"
+    for offset, row in enumerate(range(20, 24)):
+        ws.cell(row, 4, 10 * (offset + 1))
+        ws.cell(row, 5, "°C")
+        ws.cell(row, 6, f"=D{row}/100").number_format = "0.000"
+        ws.cell(row, 7, "K")
+    path = tmp_path / "offset.xlsx"
+    wb.save(path)
+    return str(path)
+
+def test_extract_blocks_reads_only_block_range(offset_workbook):
+    blocks = [(19, 22, 3, 6, [3, 5], [4, 6]), (19, 20, 3, 4, None, None)]
+    first, second = excel_reader.extract_blocks(offset_workbook, "Lap", blocks)
+    assert [column.texts() for column in first] == [["10", "20", "30", "40"], ["0.100", "0.200", "0.300", "0.400"]]
+    assert [column.units() for column in first] == [["\\degreecelsius"] * 4, ["\\kelvin"] * 4]
+    assert [column.texts() for column in second] == [["10", "20"]]
+
+    grid = excel_reader.load_sheet_grid(offset_workbook, "Lap", max_row=23, max_col=7, min_row=20, min_col=4)
+    assert grid.shape == (4, 4)
+    assert grid.texts[0].tolist() == ["10", "°C", "0.100", "K"]
+
+def _large_workbook(path, formulas):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Lap"
+    ws.append(["Titik", "", "Koreksi", ""])
+    for row in range(2, 42):
+        ws.append([row * 10, "°C", f"=A{row}/100" if formulas else row / 10, "K"])
+    wb.save(path)
+    return str(path)
+
+def test_large_sheet_without_cached_values_uses_grid_path(tmp_path, monkeypatch):
+    from conftest import make_dcc
+    from api import crud
+    from api.result_table import StreamedColumn
+
+    monkeypatch.setattr(excel_reader, "STREAMING_ROW_THRESHOLD", 10)
+    plain = _large_workbook(tmp_path / "plain.xlsx", formulas=False)
+    formulas = _large_workbook(tmp_path / "formulas.xlsx", formulas=True)
+    assert excel_reader.is_large_sheet(plain, "Lap")
+    # openpyxl tidak menyimpan cached value formula; streaming akan membaca sel kosong
+    assert not excel_reader.is_large_sheet(formulas, "Lap")
+
+    results = make_dcc(with_images=False, n_results=1).results
+    table = next(iter(crud.read_excel_tables(formulas, "Lap", results).values()))
+    assert not any(isinstance(column, StreamedColumn) for column in table)
+    assert table.columns[1].texts()[:3] == ["0.2", "0.3", "0.4"]
+    assert len(table.columns[1]) == 40
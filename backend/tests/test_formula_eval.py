@@ -0,0 +1,121 @@
+import openpyxl
+import pytest
+from openpyxl.utils.cell import coordinate_to_tuple
+
+from conftest import SAMPLE_WORKBOOK
+
+from api import excel_reader, formula_eval
+from api.formula_eval import DIV0, NUM, REF, VALUE, FormulaError, parse_formula
+from api.table_cache import file_digest
+
+# Workbook yang disimpan openpyxl tidak punya cached value untuk sel formula
+FORMULAS = {
+    "A1": 2,
+    "A2": "=A1*3+1",
+    "A3": "=SUM(A1:A2,10)",
+    "A4": "=2^10",
+    "A5": "=-A1%",
+    "A6": '="a"&A1',
+    "A7": "=A1>1",
+    "A8": '=A1+"x"',
+    "B1": "=1/0",
+    "B2": "=B1+1",
+    "B3": "=SUM(B1:B2)",
+    "B4": '=B1&"x"',
+    "C1": "=C2+1",
+    "C2": "=C1+1",
+    "D1": "=D1",
+    "E1": "=ROUND(2.5,0)",
+    "E2": "=ROUND(-2.5,0)",
+    "E3": "=ROUND(2.675,2)",
+    "E4": "=SQRT(-1)",
+    "E5": "=AVERAGE(Z1:Z3)",
+    "E6": "=STDEV(A1)",
+    "F1": "=Other!A1*2",
+    "F2": "=Missing!A1",
+    "G1": "=FOO(1)",
+}
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    for ref, value in FORMULAS.items():
+        ws[ref] = value
+    wb.create_sheet("Other")["A1"] = 21
+    path = tmp_path / "formulas.xlsx"
+    wb.save(path)
+    return str(path)
+
+@pytest.fixture
+def evaluator(workbook):
+    evaluator = formula_eval.workbook_evaluator(workbook)
+    yield evaluator
+    evaluator.close()
+
+def _evaluate(evaluator, *refs):
+    positions = [coordinate_to_tuple(ref) for ref in refs]
+    results = evaluator.evaluate("Data", positions)
+    return [results[position] for position in positions]
+
+def test_detects_sheets_without_cached_values(workbook):
+    assert formula_eval.sheets_without_cached_values(workbook, file_digest(workbook)) == {"data"}
+
+def test_arithmetic_and_functions(evaluator):
+    assert _evaluate(evaluator, "A2", "A3", "A4", "A5", "A6", "A7") == [7.0, 19.0, 1024.0, -0.02, "a2", True]
+    assert _evaluate(evaluator, "A8") == [VALUE]
+
+def test_error_propagation(evaluator):
+    assert _evaluate(evaluator, "B1", "B2", "B3", "B4") == [DIV0] * 4
+    assert _evaluate(evaluator, "E4", "E5", "E6") == [NUM, DIV0, DIV0]
+
+def test_cycles_become_ref_errors(evaluator):
+    assert _evaluate(evaluator, "C1", "C2", "D1") == [REF] * 3
+
+def test_round_half_away_from_zero(evaluator):
+    assert _evaluate(evaluator, "E1", "E2", "E3") == [3.0, -3.0, 2.68]
+
+def test_sheet_references(evaluator):
+    assert _evaluate(evaluator, "F1", "F2") == [42.0, REF]
+
+def test_unsupported_function_is_left_unevaluated(evaluator):
+    assert _evaluate(evaluator, "G1") == [None]
+    with pytest.raises(FormulaError):
+        parse_formula("=A1 A2")
+
+def test_long_chain_does_not_recurse(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    ws["A1"] = 1
+    for row in range(2, 3001):
+        ws.cell(row, 1, f"=A{row - 1}+1")
+    path = tmp_path / "chain.xlsx"
+    wb.save(path)
+
+    evaluator = formula_eval.workbook_evaluator(str(path))
+    try:
+        assert evaluator.evaluate("Data", [(3000, 1)]) == {(3000, 1): 3000.0}
+    finally:
+        evaluator.close()
+
+def test_workbook_with_cached_values_needs_no_evaluator():
+    assert formula_eval.workbook_evaluator(str(SAMPLE_WORKBOOK)) is None
+
+def test_grid_shows_evaluated_table_cells(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Lap"
+    ws.append(["Setpoint", "Reading", "Error"])
+    for row in range(2, 5):
+        ws.cell(row, 1, row * 10)
+        ws.cell(row, 2, row * 10 + 0.5)
+        ws.cell(row, 3, f"=B{row}-A{row}").number_format = "0.00"
+    ws.cell(4, 3, "=1/0")
+    path = tmp_path / "table.xlsx"
+    wb.save(path)
+
+    grid = excel_reader.load_sheet_grid(str(path), "Lap")
+    assert grid.texts[1:, 2].tolist() == ["0.50", "0.50", "#DIV/0!"]
+    assert grid.numeric[1:, 2].tolist() == [True, True, False]
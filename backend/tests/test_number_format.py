@@ -0,0 +1,103 @@
+import pytest
+
+from api.number_format import compile_format, format_general, format_value, format_values
+
+@pytest.mark.parametrize("value, expected", [
+    (5, "5"),
+    (0.1 + 0.2, "0.3"),
+    (1e11, "1E+11"),
+    (123456789012, "1.23457E+11"),
+    (0.000012345, "1.2345E-05"),
+])
+def test_general(value, expected):
+    assert format_general(value) == expected
+    assert format_value(value) == expected
+
+@pytest.mark.parametrize("value, number_format, expected", [
+    # Pembulatan setengah ke atas pada 15 digit signifikan, bukan float biner
+    (2.675, "0.00", "2.68"),
+    (1.5, "0.0#", "1.5"),
+    (1.25, "0.0#", "1.25"),
+    (0.5, "#.##", ".5"),
+    (1, "0.00_)", "1.00 "),
+    (0.125, "0%", "13%"),
+    (1.5, "[$€-407] 0.00", "€ 1.50"),
+])
+def test_fixed_point(value, number_format, expected):
+    assert format_value(value, number_format) == expected
+
+@pytest.mark.parametrize("value, number_format, expected", [
+    (0.000123, "0.00E+00", "1.23E-04"),
+    (123456, "0.00E+00", "1.23E+05"),
+    (1, "0.00E-00", "1.00E00"),
+    (0, "0.00E+00", "0.00E+00"),
+    # Pembulatan menaikkan mantissa ke 10 -> eksponen ikut naik
+    (9.999, "0.00E+00", "1.00E+01"),
+    (99999, "0.0E+00", "1.0E+05"),
+    (0.00099999, "0.00E+00", "1.00E-03"),
+    # Notasi engineering: eksponen kelipatan jumlah digit bulat
+    (12345, "##0.0E+0", "12.3E+3"),
+    (999999, "##0.0E+0", "1.0E+6"),
+])
+def test_scientific(value, number_format, expected):
+    assert format_value(value, number_format) == expected
+
+@pytest.mark.parametrize("value, number_format, expected", [
+    (12345.678, "#,##0.00", "12,345.68"),
+    (-1234.5, "#,##0.0", "-1,234.5"),
+    (999.5, "#,##0", "1,000"),
+    # Koma di akhir placeholder membagi 1000 per koma
+    (1234567, "#,##0,", "1,235"),
+    (1234567, "0.0,,", "1.2"),
+    # Koma yang bukan pemisah ribuan/skala ditulis apa adanya
+    (12, '0","0', "1,2"),
+])
+def test_thousands_and_scale(value, number_format, expected):
+    assert format_value(value, number_format) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    (150, "big"),
+    (-3, "neg3"),
+    (5, "5.0"),
+])
+def test_conditional_sections(value, expected):
+    assert format_value(value, '[>=100]"big";[<0]"neg"0;0.0') == expected
+
+@pytest.mark.parametrize("value, expected", [
+    (5, "5.00"),
+    (-5, "(5.00)"),
+    (0, "zero"),
+    ("abc", "[abc]"),
+])
+def test_positive_negative_zero_text_sections(value, expected):
+    assert format_value(value, '0.00;(0.00);"zero";"["@"]"') == expected
+
+@pytest.mark.parametrize("value, number_format, expected", [
+    (1.5, "@", "1.5"),
+    (-2, "@", "-2"),
+    (1.5, '"x"@', "1.5"),
+    ("abc", "@", "abc"),
+    ("abc", '"x"@', "xabc"),
+])
+def test_text_only_format_shows_numbers_as_general(value, number_format, expected):
+    assert format_value(value, number_format) == expected
+
+def test_two_sections_zero_uses_first():
+    assert format_value(0, "0.0;(0.0)") == "0.0"
+
+def test_non_numeric_values():
+    assert format_value(None, "0.00") == ""
+    assert format_value(True, "0.00") == "TRUE"
+    assert format_value("text", "0.00") == "text"
+
+def test_dates_fall_back_to_general():
+    assert format_value(44000, "dd/mm/yyyy") == "44000"
+    assert format_value(0.5, "[h]:mm") == "0.5"
+
+def test_format_values_groups_by_format():
+    values = [1.234, 0.000123, 7, "x"]
+    formats = ["0.0", "0.00E+00", None, "0.0"]
+    assert format_values(values, formats) == ["1.2", "1.23E-04", "7", "x"]
+
+def test_compile_format_is_cached():
+    assert compile_format("0.000") is compile_format("0.000")
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from conftest import make_dcc
+
+from api.result_table import ResultColumn, ResultTable, normalize_units
+
+@pytest.fixture(scope="module")
+def config():
+    # Rentang, Titik Ukur, Pembacaan, Koreksi (+ uncertainty)
+    return make_dcc(with_images=False, n_results=1).results[0]
+
+def _column(numbers, units):
+    return ResultColumn.from_texts(numbers, units)
+
+def test_normalized_converts_minority_prefix():
+    column = _column(["1.50", "1500", "-250", "2.00"], [r"\volt", r"\milli\volt", r"\milli\volt", r"\volt"])
+    # Seri: \milli\volt dan \volt sama banyak, target satuan pertama hasil np.unique
+    assert column.normalized().units() == [r"\milli\volt"] * 4
+
+    column = _column(["1.50", "1500", "2.00"], [r"\volt", r"\milli\volt", r"\volt"])
+    normalized = column.normalized()
+    # Teks baris yang sudah bersatuan target tidak berubah
+    assert normalized.texts() == ["1.50", "1.5", "2.00"]
+    assert normalized.units() == [r"\volt"] * 3
+    assert normalized.values.tolist() == [1.5, 1.5, 2.0]
+    assert normalized.joined_units(compact=True) == r"\volt"
+    assert normalized.negated().texts() == ["-1.50", "-1.5", "-2.00"]
+
+def test_normalized_offset_units():
+    column = _column(["25", "300", "301"], [r"\degreecelsius", r"\kelvin", r"\kelvin"])
+    assert column.normalized().texts() == ["298.15", "300", "301"]
+    # Selisih suhu: 1 °C sama dengan 1 K
+    assert column.normalized(difference=True).texts() == ["25", "300", "301"]
+
+def test_normalized_keeps_uniform_column():
+    column = _column(["1", "2"], [r"\volt", r"\volt"])
+    assert column.normalized() is column
+
+def _table(config, columns):
+    return {"Table 0": ResultTable("Table 0", columns, config)}
+
+def test_normalize_units_uses_difference_for_error_columns(config):
+    units = [r"\degreecelsius", r"\kelvin", r"\kelvin"]
+    columns = [_column(["25", "300", "301"], units) for _ in range(5)]
+    table_data = _table(config, columns)
+
+    normalized = normalize_units(table_data)["Table 0"]
+    assert [column.texts() for column in normalized] == (
+        [["298.15", "300", "301"]] * 3 + [["25", "300", "301"]] * 2
+    )
+    # Tabel asli tidak diubah (bisa dipakai bersama dalam batch)
+    assert table_data["Table 0"].columns == columns
+    assert columns[0].texts() == ["25", "300", "301"]
+
+def test_normalize_units_rescales_uncertainty_with_its_value(config):
+    columns = [_column(["1", "2"], [r"\volt", r"\volt"]) for _ in range(3)]
+    # Koreksi dengan prefix campuran; uncertainty-nya tanpa satuan, dibaca dalam satuan koreksi
+    columns.append(_column(["1500", "1", "2"], [r"\milli\volt", r"\volt", r"\volt"]))
+    columns.append(_column(["2", "0.001", "0.001"], ["", "", ""]))
+
+    normalized = normalize_units(_table(config, columns))["Table 0"]
+    assert normalized[3].texts() == ["1.5", "1", "2"]
+    assert normalized[3].units() == [r"\volt"] * 3
+    assert normalized[4].texts() == ["0.002", "0.001", "0.001"]
+    assert normalized[4].values.tolist() == [0.002, 0.001, 0.001]
+
+def test_normalize_units_keeps_pair_when_uncertainty_cannot_follow(config):
+    columns = [_column(["1", "2"], [r"\volt", r"\volt"]) for _ in range(3)]
+    columns.append(_column(["1500", "1", "2"], [r"\milli\volt", r"\volt", r"\volt"]))
+    columns.append(_column(["2", "0.001"], ["", ""]))  # jumlah baris berbeda
+
+    normalized = normalize_units(_table(config, columns))["Table 0"]
+    assert normalized[3] is columns[3]
+    assert normalized[4] is columns[4]
+
+def test_normalize_units_leaves_incompatible_columns(config):
+    columns = [_column(["1", "2"], [r"\volt", r"\volt"]) for _ in range(5)]
+    columns[1] = _column(["1", "2", "3"], [r"\volt", r"\metre", r"\metre"])
+    columns[2] = _column(["1", "2", "3"], ["abc", r"\metre", r"\metre"])
+
+    normalized = normalize_units(_table(config, columns))["Table 0"]
+    assert normalized[1] is columns[1]
+    assert normalized[2] is columns[2]
+
+def test_read_dcc_tables_normalizes_only_when_requested(monkeypatch, config):
+    from api import crud
+
+    def read_excel_tables(excel_path, sheet_name, results, template=None):
+        return _table(config, [_column(["1000", "2"], [r"\milli\volt", r"\volt"])] * 5)
+    monkeypatch.setattr(crud, "read_excel_tables", read_excel_tables)
+
+    def units(dcc):
+        table = crud.read_dcc_tables(dcc, "lab.xlsx")["Table 0"]
+        return np.unique([unit for column in table for unit in column.units()]).tolist()
+
+    assert units(make_dcc(with_images=False)) == [r"\milli\volt", r"\volt"]
+    assert units(make_dcc(with_images=False, normalize_units=True)) == [r"\milli\volt"]
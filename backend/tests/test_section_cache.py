@@ -0,0 +1,58 @@
+import warnings
+
+from conftest import make_dcc
+
+from api import crud
+
+def test_generate_xml_reuses_sections_without_serialization_warnings():
+    dcc = make_dcc(with_images=False)
+    table_data = crud.read_validated_tables(dcc)
+    crud.SECTION_CACHE.clear()
+
+    with warnings.catch_warnings():
+        # Default bool bertipe int dulu memicu PydanticSerializationUnexpectedValue di setiap key section
+        warnings.simplefilter("error")
+        first = crud.generate_xml(dcc, table_data)
+        hits = crud.SECTION_CACHE.info()["hits"]
+        second = crud.generate_xml(dcc, table_data)
+
+    assert second == first
+    assert crud.SECTION_CACHE.info()["hits"] > hits
+
+def test_changed_upload_file_invalidates_cached_section(tmp_path, monkeypatch):
+    import base64
+    import shutil
+    from conftest import SAMPLE_IMAGE, UPLOAD_DIR
+
+    monkeypatch.setattr(crud, "UPLOAD_DIR", tmp_path)
+    image_path = tmp_path / SAMPLE_IMAGE
+    shutil.copyfile(f"{UPLOAD_DIR}/{SAMPLE_IMAGE}", image_path)
+    dcc = make_dcc(image_from_upload=True)
+    table_data = crud.read_validated_tables(dcc)
+    crud.SECTION_CACHE.clear()
+
+    first = crud.generate_xml(dcc, table_data)
+    assert crud.generate_xml(dcc, table_data) == first
+
+    # Isi file diganti dengan nama sama: stamp baru, fragment lama tidak boleh dipakai
+    image_path.write_bytes(b"new image content")
+    second = crud.generate_xml(dcc, table_data)
+    assert second != first
+    assert base64.b64encode(b"new image content").decode() in second
+
+def test_section_key_skips_inline_base64(monkeypatch):
+    dcc = make_dcc()
+    table_data = crud.read_validated_tables(dcc)
+    crud.SECTION_CACHE.clear()
+    keyed = []
+    section_key = crud._section_key
+
+    def recording_key(build, model, languages, stamps):
+        keyed.append(build.__name__)
+        return section_key(build, model, languages, stamps)
+    monkeypatch.setattr(crud, "_section_key", recording_key)
+
+    # Gambar metode membawa base64 dari form: section ditulis langsung, tanpa key
+    assert crud.generate_xml(dcc, table_data) == crud.generate_xml(dcc, table_data)
+    assert "_used_methods" not in keyed
+    assert "_customer" in keyed
@@ -0,0 +1,154 @@
+import logging
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+import pytest
+from openpyxl.workbook.defined_name import DefinedName
+
+from conftest import make_dcc
+
+from api import schemas, table_cache
+
+def _save_workbook(path, reading=1.5, label="Titik", hasil="$A$1:$D$3"):
+    """Dua sheet; named range global "Hasil" menunjuk blok di sheet Suhu"""
+    wb = openpyxl.Workbook()
+    suhu = wb.active
+    suhu.title = "Suhu"
+    for row in range(1, 8):
+        suhu.append([label, row, row * 2, "°C"])
+    tekanan = wb.create_sheet("Tekanan")
+    tekanan.append(["Tekanan", reading, "bar"])
+    wb.defined_names["Hasil"] = DefinedName("Hasil", attr_text=f"Suhu!{hasil}")
+    wb.save(path)
+    _share_strings(path)
+
+_INLINE_STRING = re.compile(r'<c r="(\w+)" t="inlineStr"><is><t>([^<]*)</t></is></c>')
+
+def _share_strings(path):
+    """openpyxl menulis teks sebagai inline string; ubah ke sharedStrings seperti file dari Excel"""
+    with zipfile.ZipFile(path) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+
+    strings = []
+    def shared(match):
+        if match.group(2) not in strings:
+            strings.append(match.group(2))
+        return f'<c r="{match.group(1)}" t="s"><v>{strings.index(match.group(2))}</v></c>'
+
+    for name in [name for name in parts if name.startswith("xl/worksheets/")]:
+        parts[name] = _INLINE_STRING.sub(shared, parts[name].decode("utf-8")).encode("utf-8")
+    items = "".join(f"<si><t>{text}</t></si>" for text in strings)
+    parts["xl/sharedStrings.xml"] = (
+        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        f'count="{len(strings)}" uniqueCount="{len(strings)}">{items}</sst>'
+    ).encode("utf-8")
+    parts["xl/_rels/workbook.xml.rels"] = parts["xl/_rels/workbook.xml.rels"].replace(
+        b"</Relationships>",
+        b'<Relationship Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+        b'Target="sharedStrings.xml" Id="rIdShared"/></Relationships>',
+    )
+    parts["[Content_Types].xml"] = parts["[Content_Types].xml"].replace(
+        b"</Types>",
+        b'<Override PartName="/xl/sharedStrings.xml" '
+        b'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>',
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+
+def _reupload(path, **changes):
+    previous = table_cache.sheet_digests(path)
+    _save_workbook(path, **changes)
+    table_cache.invalidate_changed(path, previous)
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / "reupload.xlsx")
+    _save_workbook(path)
+    return path
+
+def _cached_sheets(path):
+    """Sheet yang entri cache-nya masih bisa dipakai setelah upload ulang"""
+    results = make_dcc(with_images=False, n_results=1).results
+    return {
+        sheet for sheet in ("Suhu", "Tekanan")
+        if table_cache.get(table_cache.make_key(path, sheet, results)) is not None
+    }
+
+def _fill_cache(path):
+    results = make_dcc(with_images=False, n_results=1).results
+    for sheet in ("Suhu", "Tekanan"):
+        table_cache.put(table_cache.make_key(path, sheet, results), [sheet])
+
+@pytest.mark.parametrize("changes, reused", [
+    ({}, {"Suhu", "Tekanan"}),
+    # Hanya part sheet Tekanan yang berubah
+    ({"reading": 2.5}, {"Suhu"}),
+    # Named range yang menunjuk Suhu berpindah; part sheet tidak berubah
+    ({"hasil": "$A$5:$D$7"}, {"Tekanan"}),
+    # sharedStrings dipakai semua sheet
+    ({"label": "Point"}, set()),
+])
+def test_reupload_invalidates_only_changed_sheets(workbook, changes, reused):
+    _fill_cache(workbook)
+    _reupload(workbook, **changes)
+    assert _cached_sheets(workbook) == reused
+
+def test_refresh_index_invalidates_changed_sheets_from_previous_index(workbook):
+    from api import excel_index
+
+    excel_index.write_index(workbook)
+    _fill_cache(workbook)
+    # Seperti /upload-excel/: file ditimpa tanpa meng-hash isi lama, sisanya di background
+    _save_workbook(workbook, reading=2.5)
+    table_cache.forget(workbook)
+    excel_index.refresh_index(workbook)
+    # Entri sheet Tekanan yang lama dibuang dari disk
+    assert len([name for name in os.listdir(table_cache.CACHE_DIR) if name.endswith(".pkl")]) == 1
+
+    index = excel_index.load_index(workbook)
+    assert index is not None
+    assert index["sheets"]["Suhu"]["digest"] == table_cache.sheet_digest(workbook, "Suhu")
+    assert _cached_sheets(workbook) == {"Suhu"}
+
+def test_reupload_with_moved_named_range_rereads_template_block(workbook):
+    from api import crud
+
+    template = schemas.ExtractionTemplate(
+        id="hasil", lab="Kepala Laboratorium SNSU Suhu", tables=[{"named_range": "Hasil"}],
+    )
+    results = make_dcc(with_images=False, n_results=1).results
+
+    def read_values():
+        table_data = crud.read_excel_tables(workbook, "Suhu", results, template)
+        return [column.texts() for column in next(iter(table_data.values())).columns]
+
+    assert read_values() == [["1", "2", "3"], ["2", "4", "6"]]
+    _reupload(workbook, hasil="$A$5:$D$7")
+    assert read_values() == [["5", "6", "7"], ["10", "12", "14"]]
+
+def test_concurrent_put_get_and_invalidate(workbook, monkeypatch, caplog):
+    # Batas kecil supaya setiap put juga menjalankan eviction di disk
+    monkeypatch.setattr(table_cache, "DISK_MAX_BYTES", 64 * 1024)
+    monkeypatch.setattr(table_cache, "MEMORY_MAX_ENTRIES", 4)
+    start = threading.Barrier(8)
+
+    def worker(worker_id):
+        start.wait()
+        for i in range(50):
+            # Key sama dari beberapa thread: file .tmp yang sama tidak boleh ditulis bersamaan
+            key = f"{i % 5:04d}-key"
+            table_cache.put(key, list(range(2000)))
+            table_cache.get(key)
+            table_cache.sheet_digests(workbook)
+            table_cache.invalidate_changed(workbook, {"suhu": f"{worker_id:02d}{i:04d}"})
+
+    with caplog.at_level(logging.WARNING):
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(worker, range(8)))
+    assert not [record.getMessage() for record in caplog.records if record.levelno >= logging.WARNING]
+    assert len(table_cache._memory) <= 4
@@ -0,0 +1,83 @@
+import numpy as np
+import openpyxl
+
+from api.excel_reader import _bridge_gaps, _grid_from_rows, _label_components, detect_tables, load_sheet_grid
+
+def _mask(*rows):
+    return np.array([[char == "x" for char in row] for row in rows])
+
+def test_bridge_gaps_only_between_filled_cells():
+    mask = _mask(
+        "x..x...x",
+        "..x.....",
+    )
+    assert _bridge_gaps(mask, 2).astype(int).tolist() == [
+        [1, 1, 1, 1, 0, 0, 0, 1],
+        [0, 0, 1, 0, 0, 0, 0, 0],
+    ]
+    assert (_bridge_gaps(mask, 0) == mask).all()
+
+def test_label_components_is_four_neighbour():
+    labels, count = _label_components(_mask(
+        "xx.x",
+        ".x.x",
+        "xx..",
+        "...x",
+    ))
+    assert count == 3
+    assert labels.tolist() == [
+        [1, 1, 0, 2],
+        [0, 1, 0, 2],
+        [1, 1, 0, 0],
+        [0, 0, 0, 3],
+    ]
+
+def test_label_components_joins_runs_through_later_rows():
+    # Dua run di baris atas baru terhubung lewat baris bawah
+    labels, count = _label_components(_mask(
+        "x.x",
+        "x.x",
+        "xxx",
+    ))
+    assert count == 1
+    assert (labels[_mask("x.x", "x.x", "xxx")] == 1).all()
+
+def test_label_components_empty():
+    labels, count = _label_components(np.zeros((2, 3), dtype=bool))
+    assert count == 0
+    assert not labels.any()
+
+# Dua tabel berdampingan (dipisah 3 kolom kosong), lalu judul dan tabel ketiga dengan header
+# merged (sel kosong di dalam merge dijembatani)
+ROWS = [
+    ["Suhu", "Baca", "U", "", "", "", "Tekanan", "Baca", "U"],
+    ["10", "10.5", "0.1", "", "", "", "1", "2", "0.2"],
+    ["20", "20.5", "0.1", "", "", "", "2", "3", "0.2"],
+    ["30", "30.5", "0.1", "", "", "", "3", "4", "0.2"],
+    ["Tabel 2"],
+    ["Titik", "", "", "Baca", "U"],
+    ["1", "", "", "2", "3"],
+    ["4", "", "", "5", "6"],
+]
+EXPECTED = [(0, 3, 0, 2), (0, 3, 6, 8), (5, 7, 0, 4)]
+
+def test_detect_tables_on_grid():
+    grid = _grid_from_rows([list(row) for row in ROWS])
+    assert detect_tables(grid) == EXPECTED
+
+def test_detect_tables_without_gap_bridging():
+    grid = _grid_from_rows([list(row) for row in ROWS])
+    # Tanpa jembatan, baris tabel ketiga hanya punya run 1 dan 2 sel yang tidak terhubung
+    assert detect_tables(grid, max_gap=0) == EXPECTED[:2]
+
+def test_detect_adjacent_tables_in_spreadsheet(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Lap"
+    for row in ROWS:
+        ws.append([float(text) if text[:1].isdigit() else text or None for text in row])
+    ws.merge_cells("A6:C6")
+    path = tmp_path / "tables.xlsx"
+    wb.save(path)
+
+    assert detect_tables(load_sheet_grid(str(path), "Lap")) == EXPECTED
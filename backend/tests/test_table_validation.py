@@ -0,0 +1,76 @@
+import pytest
+
+from conftest import make_dcc
+
+from api.result_table import ResultColumn, ResultTable
+from api.table_validation import TableValidationError, column_layout, table_problems, validate_tables
+
+@pytest.fixture(scope="module")
+def config():
+    # Rentang, Titik Ukur, Pembacaan, Koreksi (+ uncertainty)
+    return make_dcc(with_images=False, n_results=1).results[0]
+
+def _column(numbers, unit="°C"):
+    units = unit if isinstance(unit, list) else [unit] * len(numbers)
+    return ResultColumn.from_texts(numbers, units)
+
+def _table(config, columns):
+    return ResultTable("Table 0", columns, config)
+
+def _valid_columns():
+    return [_column(["10", "20", "30"]) for _ in range(4)] + [_column(["0.1", "0.1", "0.2"], "K")]
+
+def test_column_layout(config):
+    assert column_layout(config) == [
+        ("Range", "value"), ("Measurement Point", "value"), ("Reading", "value"),
+        ("Correction", "value"), ("Correction", "uncertainty"),
+    ]
+
+def test_valid_table(config):
+    assert table_problems(_table(config, _valid_columns())) == []
+    validate_tables({"Table 0": _table(config, _valid_columns())}, [config])
+
+def test_missing_columns(config):
+    problems = table_problems(_table(config, _valid_columns()[:3]))
+    assert problems == ["Table 0: expected 5 numeric column(s) but found 3, missing 2 (1 uncertainty)"]
+
+def test_partially_missing_units(config):
+    columns = _valid_columns()
+    columns[2] = _column(["1", "2", "3"], ["°C", "", ""])
+    assert table_problems(_table(config, columns)) == [
+        "Table 0: column 'Reading' is missing units on 2 of 3 row(s)",
+    ]
+
+def test_columns_without_any_unit_are_allowed(config):
+    columns = _valid_columns()
+    columns[0] = _column(["1", "2", "3"], "")
+    assert table_problems(_table(config, columns)) == []
+
+def test_non_finite_and_empty_columns(config):
+    columns = _valid_columns()
+    columns[1] = _column(["1", "inf", "-inf"])
+    columns[3] = _column([])
+    columns[4] = _column([])
+    assert table_problems(_table(config, columns)) == [
+        "Table 0: column 'Measurement Point' has 2 non-finite value(s), first at row 2",
+        "Table 0: column 'Correction' has no numeric values",
+        "Table 0: column 'Correction' has no numeric values",
+    ]
+
+def test_uncertainty_count_mismatch(config):
+    columns = _valid_columns()
+    columns[4] = _column(["0.1", "0.1"], "K")
+    assert table_problems(_table(config, columns)) == [
+        "Table 0: column 'Correction' has 3 value(s) but 2 uncertainty value(s)",
+    ]
+
+def test_validate_tables_collects_all_problems(config):
+    columns = _valid_columns()
+    columns[4] = _column(["0.1"], "K")
+    with pytest.raises(TableValidationError) as excinfo:
+        validate_tables({"Table 0": _table(config, columns)}, [config, config])
+    assert excinfo.value.problems == [
+        "expected 2 result table(s) but found 1 in the sheet",
+        "Table 0: column 'Correction' has 3 value(s) but 1 uncertainty value(s)",
+    ]
+    assert str(excinfo.value) == "; ".join(excinfo.value.problems)
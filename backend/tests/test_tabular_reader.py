@@ -0,0 +1,53 @@
+import zipfile
+
+from api import excel_reader, tabular_reader
+
+CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content
+    xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+    xmlns:dc="http://purl.org/dc/elements/1.1/">
+<office:body><office:spreadsheet><table:table table:name="Lap">
+<table:table-row>
+  <table:table-cell><text:p>Titik</text:p></table:table-cell>
+  <table:table-cell>
+    <office:annotation><dc:creator>QA</dc:creator><text:p>cek ulang</text:p></office:annotation>
+    <text:p>Baca</text:p>
+  </table:table-cell>
+  <table:table-cell><text:p>U</text:p></table:table-cell>
+</table:table-row>
+<table:table-row>
+  <table:table-cell><text:p>1<text:s text:c="2"/>0</text:p></table:table-cell>
+  <table:table-cell>
+    <office:annotation><text:p>dari sertifikat lama</text:p><text:p>1.25</text:p></office:annotation>
+    <text:p>2.5</text:p>
+  </table:table-cell>
+  <table:table-cell><office:annotation><text:p>kosong</text:p></office:annotation></table:table-cell>
+</table:table-row>
+</table:table></office:spreadsheet></office:body>
+</office:document-content>
+"""
+
+def test_ods_cell_text_skips_annotations(tmp_path):
+    path = tmp_path / "sheet.ods"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("mimetype", "application/vnd.oasis.opendocument.spreadsheet")
+        zf.writestr("content.xml", CONTENT)
+
+    assert list(tabular_reader.iter_ods_tables(str(path))) == [
+        ("Lap", [["Titik", "Baca", "U"], ["1  0", "2.5"]]),
+    ]
+    grid = excel_reader.load_sheet_grid(str(path), "Lap")
+    assert grid.texts.tolist() == [["Titik", "Baca", "U"], ["1  0", "2.5", ""]]
+
+def test_upload_excel_rejects_xls_and_xlsb():
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    assert tabular_reader.is_supported("Lap.XLSX") and tabular_reader.is_supported("lap.tsv")
+    with TestClient(app) as client:
+        for name in ("lap.xls", "lap.xlsb"):
+            response = client.post("/upload-excel/", files={"excel": (name, b"\xd0\xcf\x11\xe0")})
+            assert response.status_code == 415
+            assert name in response.json()["detail"]
@@ -0,0 +1,96 @@
+import glob
+import os
+
+import pytest
+
+from conftest import DCC_FILES_DIR, SAMPLE_WORKBOOK, make_dcc
+
+from api import crud, xml_backend
+from api.xml_writer import IndentedXMLWriter
+
+pytestmark = pytest.mark.skipif(not xml_backend.HAVE_LXML, reason="lxml is not installed")
+
+CORPUS = sorted(glob.glob(os.path.join(DCC_FILES_DIR, "*.xml")))
+# Ditulis generator lama (baris kosong di dalam dcc:dataBase64 yang kosong)
+OLD_GENERATOR_FILES = {"80000.xml"}
+
+@pytest.fixture
+def sample_tables():
+    dcc = make_dcc(n_results=5)
+    return crud.read_excel_tables(SAMPLE_WORKBOOK, dcc.sheet_name, dcc.results)
+
+@pytest.mark.parametrize("with_images, image_from_upload, compact_units", [
+    (False, False, False),
+    (True, False, False),
+    (True, True, False),
+    (True, False, True),
+])
+def test_generated_xml_parses_with_both_parsers(sample_tables, with_images, image_from_upload, compact_units):
+    import xml.etree.ElementTree as ET
+    dcc = make_dcc(n_results=5, with_images=with_images, image_from_upload=image_from_upload,
+                   compact_units=compact_units)
+    chunks = []
+    crud.generate_xml(dcc, sample_tables, chunks.append)
+    content = "".join(chunks)
+    assert content == crud.generate_xml(dcc, sample_tables)
+    assert ("<dcc:dataBase64>\n" in content) == with_images
+
+    ns = {"si": "https://ptb.de/si"}
+    lxml_root = xml_backend.fromstring(content)
+    et_root = ET.fromstring(content.encode("utf-8"))
+    assert [e.text for e in lxml_root.findall(".//si:unitXMLList", ns)] == [
+        e.text for e in et_root.findall(".//si:unitXMLList", ns)
+    ]
+
+def _prefixed(elem, name):
+    if not name.startswith("{"):
+        return name
+    uri, local = name[1:].split("}", 1)
+    for prefix, namespace in elem.nsmap.items():
+        if namespace == uri:
+            return f"{prefix}:{local}" if prefix else local
+    raise ValueError(f"No prefix for namespace {uri}")
+
+def _replay_element(elem, tag, text):
+    attrs = [(_prefixed(elem, key), value) for key, value in elem.attrib.items()]
+    with tag(_prefixed(elem, elem.tag), *attrs):
+        if elem.text:
+            text(elem.text)
+        for child in elem:
+            if isinstance(child.tag, str):
+                _replay_element(child, tag, text)
+
+def _replay(source):
+    """Tulis ulang dokumen korpus lewat IndentedXMLWriter dengan tag/text, seperti generate_xml"""
+    root = xml_backend.fromstring(source)
+    root_name = _prefixed(root, root.tag)
+    root_start = source.index("<" + root_name)
+    chunks = []
+    doc, tag, text = IndentedXMLWriter(chunks.append).tagtext()
+    doc.asis(source[:root_start])
+    doc.asis(source[root_start:source.index(">", root_start) + 1])
+    for child in root:
+        if isinstance(child.tag, str):
+            _replay_element(child, tag, text)
+    doc.asis(f"</{root_name}>")
+    doc.close()
+    return "".join(chunks)
+
+@pytest.mark.parametrize("path", CORPUS, ids=os.path.basename)
+def test_corpus_round_trip(path):
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    replayed = _replay(source)
+    if os.path.basename(path) not in OLD_GENERATOR_FILES:
+        assert replayed == source
+    else:
+        assert xml_backend.fromstring(replayed).tag == xml_backend.fromstring(source).tag
+
+def test_parsers_agree_on_corpus():
+    import xml.etree.ElementTree as ET
+    ns = {"dcc": "https://ptb.de/dcc", "si": "https://ptb.de/si"}
+    for path in CORPUS:
+        lxml_root = xml_backend.parse(path)
+        et_root = ET.parse(path).getroot()
+        for query in (".//si:valueXMLList", ".//dcc:respPerson/dcc:person/dcc:name/dcc:content", ".//dcc:dataBase64"):
+            assert [e.text for e in lxml_root.findall(query, ns)] == [e.text for e in et_root.findall(query, ns)]
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import make_dcc
+
+from api.xml_writer import IndentedXMLWriter, StreamClosed, stream_xml
+
+def _collect(produce, **kwargs):
+    async def collect():
+        return [chunk async for chunk in stream_xml(produce, **kwargs)]
+    return asyncio.run(collect())
+
+def test_stream_xml_yields_chunks_in_order():
+    def produce(write):
+        for i in range(50):
+            write(f"<a>{i}</a>")
+    assert _collect(produce, queue_size=2) == [f"<a>{i}</a>" for i in range(50)]
+
+def test_stream_xml_reraises_producer_error():
+    def produce(write):
+        write("<a>")
+        raise ValueError("boom")
+    with pytest.raises(ValueError, match="boom"):
+        _collect(produce)
+
+def test_stream_xml_stops_producer_when_consumer_closes():
+    finished = threading.Event()
+    outcome = []
+
+    def produce(write):
+        try:
+            for i in range(1000):
+                write(f"<a>{i}</a>")
+            outcome.append("completed")
+        except StreamClosed:
+            outcome.append("closed")
+            raise
+        finally:
+            finished.set()
+
+    async def read_one():
+        stream = stream_xml(produce, queue_size=2, poll_interval=0.05)
+        assert await stream.__anext__() == "<a>0</a>"
+        # Seperti client putus: StreamingResponse menutup generator
+        await stream.aclose()
+        return await asyncio.to_thread(finished.wait, 5)
+
+    assert asyncio.run(read_one())
+    assert outcome == ["closed"]
+
+def _render(write_content):
+    chunks = []
+    doc, tag, text = IndentedXMLWriter(chunks.append).tagtext()
+    with tag("root"):
+        with tag("a"):
+            write_content(doc)
+        with tag("b"):
+            text("x")
+    doc.close()
+    return "".join(chunks)
+
+@pytest.mark.parametrize("chunks", [
+    ["", "  ", "abc"],
+    ["", "abc", "", "def"],
+    ["   "],
+    [],
+])
+def test_asis_stream_matches_asis_with_blank_leading_chunks(chunks):
+    def stream(doc):
+        doc.asis_stream(chunks)
+
+    def whole(doc):
+        for chunk in chunks:
+            doc.asis(chunk)
+
+    assert _render(stream) == _render(whole)
+    assert "".join(chunks).strip() in _render(stream)
+
+def test_generate_dcc_xml_endpoint_streams_certificate():
+    from fastapi.testclient import TestClient
+    from api import crud
+    from api.main import app
+
+    dcc = make_dcc(with_images=False)
+    expected = crud.generate_xml(dcc, crud.read_validated_tables(dcc))
+
+    with TestClient(app) as client:
+        response = client.post("/generate-dcc-xml/", json=dcc.model_dump(mode="json"))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/xml")
+    assert response.text == expected
+
+def test_generate_dcc_xml_endpoint_rejects_mismatched_tables():
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    dcc = make_dcc(with_images=False, n_results=50)
+    with TestClient(app) as client:
+        response = client.post("/generate-dcc-xml/", json=dcc.model_dump(mode="json"))
+    assert response.status_code == 422
+    assert "result table(s)" in response.json()["detail"]
+
+def test_attach_uploaded_files_keeps_base64_outside_upload_folder():
+    from api.main import attach_uploaded_files
+
+    dcc = make_dcc()
+    attach_uploaded_files(dcc)
+    # File ada di folder upload: hanya referensi nama, di-stream saat XML ditulis
+    assert dcc.methods[0].image.base64 is None
+    assert dcc.methods[0].image.fileName == dcc.methods[0].image.gambar
+
+    dcc = make_dcc()
+    dcc.methods[0].image.gambar = "not-uploaded.png"
+    base64_str = dcc.methods[0].image.base64
+    attach_uploaded_files(dcc)
+    assert dcc.methods[0].image.base64 == base64_str
+
+def test_missing_attachment_is_an_error():
+    from fastapi.testclient import TestClient
+    from api import crud
+    from api.main import app, attach_uploaded_files
+
+    dcc = make_dcc(image_from_upload=True)
+    dcc.methods[0].image.gambar = "removed.png"
+    with pytest.raises(crud.AttachmentNotFoundError, match="removed.png"):
+        attach_uploaded_files(dcc)
+    with pytest.raises(crud.AttachmentNotFoundError, match="removed.png"):
+        crud.generate_xml(dcc, crud.read_validated_tables(dcc))
+
+    with TestClient(app) as client:
+        response = client.post("/generate-dcc-xml/", json=dcc.model_dump(mode="json"))
+    assert response.status_code == 404
+    assert "removed.png" in response.json()["detail"]
@@ -800,7 +800,7 @@ export default function MeasurementForm({
           console.error("Error uploading image:", error);
           toast.error("Image upload failed.");
         }
-      } else if (file.name.endsWith(".xls") || file.name.endsWith(".xlsx") || file.name.endsWith(".xlsm") || file.name.endsWith(".xlsb")) {
+      } else if (file.name.endsWith(".xlsx") || file.name.endsWith(".xlsm") || file.name.endsWith(".ods") || file.name.endsWith(".csv") || file.name.endsWith(".tsv")) {
         const formData = new FormData();
         formData.append("excel", file);
 
@@ -2256,7 +2256,7 @@ export default function MeasurementForm({
                         <Input
                           type="file"
                           {...fileRefExcel}
-                          accept=".xls, .xlsx, .xlsm, .xlsb"
+                          accept=".xlsx, .xlsm, .ods, .csv, .tsv"
                           onChange={(e) => handleFileUpload(e, false)}
                         />
                       </FormControl>